@@ -2,101 +2,272 @@
 """
 Yelp Analytics Dashboard
 
-This Streamlit app visualizes Yelp analytics data from BigQuery:
+This Streamlit app visualizes Yelp analytics data from BigQuery, or offline
+from exported gold tables (DASHBOARD_BACKEND=parquet):
 - Business metrics by state
-- Review trends over time
+- Review trends over time, at a resolution picked from the date range
+- Category breakdowns
+- Review density by geohash cell and businesses within a radius
+- Monthly top businesses per city and category
+- Distinct reviewers and rating percentiles, merged from sketches
+
+Importing the app stays cheap: the BigQuery client and plotly are only
+loaded when first used, and the time to first render is checked against a
+startup budget.
 """
 
-from dotenv import load_dotenv
+import time
+
+STARTED_AT = time.perf_counter()
+
+import json
+import logging
 import os
+import sys
 from pathlib import Path
 
 # Get the project root directory (2 levels up from this file)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
-load_dotenv(PROJECT_ROOT / '.env')  # Load environment variables from .env
-
-# Set the service account key path
-key_path = str(PROJECT_ROOT / 'yelp-dataflow-sa-key.json')
-os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = key_path
-
-# Debug information
-print(f"Project root: {PROJECT_ROOT}")
-print(f"Key file path: {key_path}")
-print(f"Key file exists: {os.path.exists(key_path)}")
-print(f"GOOGLE_APPLICATION_CREDENTIALS: {os.getenv('GOOGLE_APPLICATION_CREDENTIALS')}")
+# `streamlit run` only puts this file's directory on the path
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
 
 import streamlit as st
 import pandas as pd
-from google.cloud import bigquery
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-
-# Page config
-st.set_page_config(
-    page_title="Yelp Analytics Dashboard",
-    page_icon="📊",
-    layout="wide"
+from src.dashboard.backends import get_backend
+from src.dashboard.cache import SingleFlightCache
+from src.geohash import GEOHASH_PRECISIONS, distance_km
+from src.sketches import quantile_column, summarize_distribution
+from src.dashboard.queries import (
+    business_metrics_query, business_metrics_count_query, review_trends_query, review_trends_count_query,
+    states_query, period_bounds_query, category_metrics_query, categories_query, category_businesses_query,
+    category_businesses_count_query, geo_cells_query, businesses_within_query,
+    review_distribution_query, leaderboard_query, leaderboard_cities_query, leaderboard_categories_query,
+    review_timeseries_query, LEADERBOARD_RANKINGS
 )
+from src.dashboard.timeseries import downsample, pick_resolution
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+# Seconds a session's first run may take to render the charts
+STARTUP_BUDGET_SECONDS = float(os.getenv("DASHBOARD_STARTUP_BUDGET", "3.0"))
+
+def load_environment():
+    """Load environment variables from the project's .env file, if python-dotenv is installed."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv(PROJECT_ROOT / '.env')
+
+@st.cache_resource
+def backend():
+    """Process-wide data backend; its client is created on the first query."""
+    load_environment()
+    return get_backend()
+
+@st.cache_resource
+def data_cache():
+    """Process-wide cache shared by all sessions and reruns."""
+    load_environment()
+    return SingleFlightCache(
+        ttl_seconds=int(os.getenv("DASHBOARD_CACHE_TTL", "600")),
+        snapshot_dir=os.getenv("DASHBOARD_SNAPSHOT_DIR", str(PROJECT_ROOT / ".cache" / "dashboard")),
+        max_entries=int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "256"))
+    )
+
+@st.cache_resource
+def table_checks():
+    """Process-wide table name -> (exists, checked_at) of optional gold tables."""
+    return {}
+
+def has_gold_table(table):
+    """Whether an optional gold table was written; asked of the backend at most once per cache TTL."""
+    exists, checked_at = table_checks().get(table, (False, None))
+    if checked_at is None or time.time() - checked_at >= data_cache().ttl_seconds:
+        exists = backend().has_table(table)
+        table_checks()[table] = (exists, time.time())
+    return exists
+
+def gold_table_version(table):
+    """Return a callable giving the last-modified time of a gold table."""
+    return lambda: backend().last_modified(table)
+
+def table_ref(table):
+    """Backend-specific SQL reference for a gold table."""
+    return backend().table(table)
+
+def run_query(query):
+    """Run a parameterized query against the backend."""
+    return backend().query(query)
+
+def load(table, query):
+    """Run a query through the cache, re-querying only when `table` changed."""
+    key = json.dumps([query.sql, query.params], sort_keys=True)
+    return data_cache().get(key, lambda: run_query(query), gold_table_version(table))
+
+def load_business_metrics(states=None, limit=None, offset=0):
+    """Load business metrics for the selected states, best first."""
+    return load("business_metrics", business_metrics_query(table_ref("business_metrics"), states, limit=limit,
+                                                           offset=offset))
+
+def load_business_metrics_count(states=None):
+    """Count business metric rows for the selected states."""
+    return int(load("business_metrics",
+                    business_metrics_count_query(table_ref("business_metrics"), states))["row_count"][0])
 
-# Initialize BigQuery client
-try:
-    client = bigquery.Client()
-    print("Successfully initialized BigQuery client")
-except Exception as e:
-    print(f"Error initializing BigQuery client: {str(e)}")
-    raise
-
-def load_business_metrics():
-    """Load business metrics from BigQuery."""
-    query = """
-    SELECT 
-        state,
-        total_reviews,
-        avg_rating,
-        avg_business_reviews
-    FROM `pivotal-rhino-462807-c1.yelp_analytics.business_metrics`
-    ORDER BY total_reviews DESC
+def load_review_trends(start=None, end=None, limit=None, offset=0):
+    """Load review trends between (year, month) bounds."""
+    return load("review_trends", review_trends_query(table_ref("review_trends"), start, end, limit, offset))
+
+def load_review_trends_count(start=None, end=None):
+    """Count review trend rows between (year, month) bounds."""
+    return int(load("review_trends", review_trends_count_query(table_ref("review_trends"), start, end))["row_count"][0])
+
+def load_review_timeseries(start=None, end=None):
+    """Load the review time series between (year, month) bounds, at the resolution picked for the range.
+
+    Returns the resolution and the series, with each period's first day in `period_start`.
     """
-    return client.query(query).to_dataframe()
-
-def load_review_trends():
-    """Load review trends from BigQuery."""
-    query = """
-    SELECT 
-        year,
-        month,
-        total_reviews,
-        avg_rating
-    FROM `pivotal-rhino-462807-c1.yelp_analytics.review_trends`
-    ORDER BY year, month
+    resolution = pick_resolution(start, end)
+    series = load("review_timeseries", review_timeseries_query(table_ref("review_timeseries"), resolution, start, end))
+    keys = series["period_key"].astype("int64")
+    period_start = pd.to_datetime(pd.DataFrame({"year": keys // 10000, "month": keys // 100 % 100, "day": keys % 100}))
+    return resolution, series.assign(period_start=period_start)
+
+def load_states():
+    """Load the states available for filtering."""
+    return load("business_metrics", states_query(table_ref("business_metrics")))["state"].tolist()
+
+def load_periods():
+    """Load every (year, month) period covered by the review trends."""
+    bounds = load("review_trends", period_bounds_query(table_ref("review_trends")))
+    first, last = bounds["first_period"][0], bounds["last_period"][0]
+    if pd.isna(first):
+        return []
+    months = pd.period_range(f"{int(first) // 100}-{int(first) % 100:02d}",
+                             f"{int(last) // 100}-{int(last) % 100:02d}", freq="M")
+    return [(period.year, period.month) for period in months]
+
+def load_category_metrics(states=None, limit=None):
+    """Load category metrics rolled up over the selected states, by review volume."""
+    return load("category_metrics", category_metrics_query(table_ref("category_metrics"), states, limit))
+
+def load_categories():
+    """Load the categories available for lookup."""
+    return load("category_metrics", categories_query(table_ref("category_metrics")))["category"].tolist()
+
+def load_category_businesses(category, states=None, limit=None, offset=0):
+    """Look up the businesses listed under a category."""
+    return load("category_index",
+                category_businesses_query(table_ref("category_index"), category, states, limit, offset))
+
+def load_category_businesses_count(category, states=None):
+    """Count the businesses listed under a category."""
+    return int(load("category_index", category_businesses_count_query(
+        table_ref("category_index"), category, states))["row_count"][0])
+
+def load_geo_cells(precision, limit=None):
+    """Load the busiest geohash cells of one precision."""
+    return load("geo_cell_metrics", geo_cells_query(table_ref("geo_cell_metrics"), precision, limit))
+
+def load_businesses_within(latitude, longitude, radius_km):
+    """Look up the businesses within `radius_km` of a point, nearest first."""
+    candidates = load("business_geo_index", businesses_within_query(
+        table_ref("business_geo_index"), latitude, longitude, radius_km))
+    distances = [distance_km(latitude, longitude, lat, lon)
+                 for lat, lon in zip(candidates["latitude"], candidates["longitude"])]
+    nearby = candidates.assign(distance_km=distances)
+    return nearby[nearby["distance_km"] <= radius_km].sort_values("distance_km").reset_index(drop=True)
+
+def load_leaderboard_cities():
+    """Load the (state, city) pairs with a leaderboard, busiest first."""
+    cities = load("city_leaderboard", leaderboard_cities_query(table_ref("city_leaderboard")))
+    return list(zip(cities["state"], cities["city"]))
+
+def load_leaderboard_categories(state, city):
+    """Load the categories with a leaderboard in a city."""
+    return load("category_leaderboard", leaderboard_categories_query(
+        table_ref("category_leaderboard"), state, city))["category"].tolist()
+
+def load_leaderboard(ranking, year, month, state, city, category=None):
+    """Load one month's top businesses of a city, or of a category within it."""
+    table = "city_leaderboard" if category is None else "category_leaderboard"
+    return load(table, leaderboard_query(table_ref(table), ranking, year, month, state, city, category))
+
+def load_review_distribution(states=None, start=None, end=None):
+    """Merge the review distribution sketches of the selected states and period.
+
+    Returns None when the table was not written (it needs an `--approx` run).
     """
-    return client.query(query).to_dataframe()
+    if not has_gold_table("review_distribution"):
+        return None
+    rows = load("review_distribution", review_distribution_query(table_ref("review_distribution"), states, start, end))
+    bins = sorted((column for column in rows.columns if column.startswith("rating_bin_")),
+                  key=lambda column: int(column.rsplit("_", 1)[1]))
+    return summarize_distribution([int(rows[column].sum()) for column in bins], rows["reviewer_sketch"].tolist())
+
+def paged_table(key, row_count, load_page):
+    """Render one page of a raw-data table with a page selector."""
+    pages = max(1, -(-row_count // PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=key)
+    st.caption(f"Page {page} of {pages} ({row_count} rows)")
+    st.dataframe(load_page(PAGE_SIZE, (page - 1) * PAGE_SIZE))
+
+def check_startup_budget(started_at):
+    """Log a warning when a run took longer than the startup budget to render."""
+    elapsed = time.perf_counter() - started_at
+    if elapsed > STARTUP_BUDGET_SECONDS:
+        logger.warning("Dashboard took %.2fs to render, over the %.2fs startup budget",
+                       elapsed, STARTUP_BUDGET_SECONDS)
+    return elapsed
 
 def main():
+    import plotly.express as px
+
+    st.set_page_config(
+        page_title="Yelp Analytics Dashboard",
+        page_icon="📊",
+        layout="wide"
+    )
     st.title("📊 Yelp Analytics Dashboard")
-    
-    # Load data
-    with st.spinner("Loading data from BigQuery..."):
-        business_metrics = load_business_metrics()
-        review_trends = load_review_trends()
+
+    if st.sidebar.button("Refresh data"):
+        data_cache().invalidate()
     
     # Sidebar filters
     st.sidebar.header("Filters")
+    states = st.sidebar.multiselect("States", load_states(), help="Leave empty for all states")
+    top_n = st.sidebar.slider("Top N states", min_value=5, max_value=50, value=10, step=5)
+    periods = load_periods()
+    start = end = None
+    if periods:
+        start, end = st.sidebar.select_slider(
+            "Date range",
+            options=periods,
+            value=(periods[0], periods[-1]),
+            format_func=lambda period: f"{period[0]}-{period[1]:02d}"
+        )
+
+    # Load only the rows being rendered
+    with st.spinner(f"Loading data from {backend().name}..."):
+        business_metrics = load_business_metrics(states, limit=top_n)
+        resolution, review_timeseries = load_review_timeseries(start, end)
     
     # Business Metrics Section
     st.header("Business Metrics by State")
     
-    # Top 10 states by total reviews
+    # Top N states by total reviews
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Top 10 States by Total Reviews")
+        st.subheader(f"Top {top_n} States by Total Reviews")
         fig = px.bar(
-            business_metrics.head(10),
+            business_metrics,
             x="state",
             y="total_reviews",
-            title="Total Reviews by State (Top 10)",
+            title=f"Total Reviews by State (Top {top_n})",
             labels={"state": "State", "total_reviews": "Total Reviews"},
             color="total_reviews",
             color_continuous_scale="Viridis"
@@ -106,10 +277,10 @@ def main():
     with col2:
         st.subheader("Average Rating by State")
         fig = px.bar(
-            business_metrics.head(10),
+            business_metrics,
             x="state",
             y="avg_rating",
-            title="Average Rating by State (Top 10)",
+            title=f"Average Rating by State (Top {top_n})",
             labels={"state": "State", "avg_rating": "Average Rating"},
             color="avg_rating",
             color_continuous_scale="RdYlGn"
@@ -119,46 +290,163 @@ def main():
     # Review Trends Section
     st.header("Review Trends Over Time")
     
-    # Convert year and month to datetime for better plotting
-    review_trends['date'] = pd.to_datetime(
-        review_trends['year'].astype(str) + '-' + 
-        review_trends['month'].astype(str) + '-01'
-    )
-    
+    # Each chart plots at most MAX_CHART_POINTS periods, keeping the peaks and dips
     col3, col4 = st.columns(2)
     
     with col3:
-        st.subheader("Monthly Review Volume")
+        st.subheader("Review Volume")
         fig = px.line(
-            review_trends,
-            x="date",
+            downsample(review_timeseries, "period_start", "total_reviews"),
+            x="period_start",
             y="total_reviews",
-            title="Monthly Review Volume",
-            labels={"date": "Date", "total_reviews": "Total Reviews"}
+            title=f"Review Volume per {resolution.capitalize()}",
+            labels={"period_start": "Date", "total_reviews": "Total Reviews"}
         )
         st.plotly_chart(fig, use_container_width=True)
     
     with col4:
         st.subheader("Average Rating Trend")
         fig = px.line(
-            review_trends,
-            x="date",
+            downsample(review_timeseries, "period_start", "avg_rating"),
+            x="period_start",
             y="avg_rating",
-            title="Average Rating Trend",
-            labels={"date": "Date", "avg_rating": "Average Rating"}
+            title=f"Average Rating per {resolution.capitalize()}",
+            labels={"period_start": "Date", "avg_rating": "Average Rating"}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Streamlit re-executes this script on every run, so STARTED_AT marks the start of this run
+    if "rendered" not in st.session_state:
+        st.session_state["rendered"] = True
+        check_startup_budget(STARTED_AT)
+
+    # Category Section
+    st.header("Categories")
+
+    category_metrics = load_category_metrics(states, limit=top_n)
+    col5, col6 = st.columns(2)
+
+    with col5:
+        st.subheader(f"Top {top_n} Categories by Total Reviews")
+        fig = px.bar(
+            category_metrics,
+            x="category",
+            y="total_reviews",
+            title=f"Total Reviews by Category (Top {top_n})",
+            labels={"category": "Category", "total_reviews": "Total Reviews"},
+            color="avg_rating",
+            color_continuous_scale="RdYlGn"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col6:
+        st.subheader("Share of Open Businesses")
+        fig = px.bar(
+            category_metrics,
+            x="category",
+            y="open_ratio",
+            title=f"Open Ratio by Category (Top {top_n})",
+            labels={"category": "Category", "open_ratio": "Open Ratio"}
         )
         st.plotly_chart(fig, use_container_width=True)
     
+    # Geography Section
+    st.header("Geography")
+
+    precision = st.selectbox("Cell precision (geohash characters)", GEOHASH_PRECISIONS, index=1)
+    geo_cells = load_geo_cells(precision, limit=500)
+    col7, col8 = st.columns(2)
+
+    with col7:
+        st.subheader("Review Density by Cell")
+        fig = px.scatter_map(
+            geo_cells,
+            lat="center_latitude",
+            lon="center_longitude",
+            size="total_reviews",
+            color="avg_rating",
+            hover_name="geohash",
+            hover_data=["businesses", "reviews_per_km2"],
+            color_continuous_scale="RdYlGn",
+            map_style="open-street-map",
+            zoom=3
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col8:
+        st.subheader("Businesses Within a Radius")
+        busiest = geo_cells.iloc[0] if len(geo_cells) else None
+        latitude = st.number_input("Latitude", min_value=-90.0, max_value=90.0, format="%.5f",
+                                   value=float(busiest["center_latitude"]) if busiest is not None else 0.0)
+        longitude = st.number_input("Longitude", min_value=-180.0, max_value=180.0, format="%.5f",
+                                    value=float(busiest["center_longitude"]) if busiest is not None else 0.0)
+        radius_km = st.slider("Radius (km)", min_value=1, max_value=25, value=5)
+        st.dataframe(load_businesses_within(latitude, longitude, radius_km).head(PAGE_SIZE))
+
+    # Leaderboard Section: the latest month of the selected date range
+    st.header("Top Businesses")
+
+    cities = load_leaderboard_cities()
+    if cities and end:
+        col_city, col_category, col_ranking = st.columns(3)
+        with col_city:
+            state, city = st.selectbox("City", cities, format_func=lambda place: f"{place[1]}, {place[0]}")
+        with col_category:
+            category = st.selectbox("Category", [None] + load_leaderboard_categories(state, city),
+                                    format_func=lambda name: "All categories" if name is None else name)
+        with col_ranking:
+            ranking = st.radio("Rank by", LEADERBOARD_RANKINGS, horizontal=True,
+                               format_func=lambda name: "Review volume" if name == "reviews" else "Rating")
+        st.caption(f"{end[0]}-{end[1]:02d}")
+        st.dataframe(load_leaderboard(ranking, end[0], end[1], state, city, category), hide_index=True)
+
+    # Reviewer and Rating Distribution Section (written by approximate-mode runs)
+    st.header("Reviewers and Rating Distribution")
+
+    distribution = load_review_distribution(states, start, end)
+    if distribution is None:
+        st.caption("No review distribution yet; run the pipeline with `--approx` to write it.")
+    else:
+        col9, col10 = st.columns(2)
+
+        with col9:
+            reviewers = distribution["distinct_reviewers"]
+            st.metric("Distinct reviewers (approx.)", f"{reviewers:,.0f}" if reviewers is not None else "n/a")
+            if reviewers is None:
+                st.caption("Install `datasketches` to merge the reviewer sketches.")
+            st.table(pd.DataFrame({
+                "Percentile": [quantile_column(quantile) for quantile in distribution["percentiles"]],
+                "Rating": list(distribution["percentiles"].values())
+            }))
+
+        with col10:
+            st.subheader("Rating Histogram")
+            fig = px.bar(
+                x=list(distribution["histogram"]),
+                y=list(distribution["histogram"].values()),
+                labels={"x": "Rating", "y": "Reviews"}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
     # Raw Data Tables
     st.header("Raw Data")
     
-    tab1, tab2 = st.tabs(["Business Metrics", "Review Trends"])
+    tab1, tab2, tab3 = st.tabs(["Business Metrics", "Review Trends", "Businesses by Category"])
     
     with tab1:
-        st.dataframe(business_metrics)
+        paged_table("business_metrics_page", load_business_metrics_count(states),
+                    lambda limit, offset: load_business_metrics(states, limit, offset))
     
     with tab2:
-        st.dataframe(review_trends)
+        paged_table("review_trends_page", load_review_trends_count(start, end),
+                    lambda limit, offset: load_review_trends(start, end, limit, offset))
+
+    with tab3:
+        categories = load_categories()
+        if categories:
+            category = st.selectbox("Category", categories)
+            paged_table("category_businesses_page", load_category_businesses_count(category, states),
+                        lambda limit, offset: load_category_businesses(category, states, limit, offset))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
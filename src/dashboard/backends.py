@@ -0,0 +1,151 @@
+"""
+Data backends for the dashboard.
+
+Both backends answer the same parameterized queries (see `queries`):
+- BigQueryBackend: the gold dataset in BigQuery
+- ParquetBackend: gold tables exported as Parquet, for running offline
+
+Heavy clients are created on first use, so importing this module (and the
+app) stays cheap and does not need GCP credentials.
+"""
+
+import glob
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+GOLD_DATASET = "pivotal-rhino-462807-c1.yelp_analytics"
+
+def _query_parameter(bigquery, name, value):
+    if isinstance(value, bool):
+        return bigquery.ScalarQueryParameter(name, "BOOL", value)
+    if isinstance(value, int):
+        return bigquery.ScalarQueryParameter(name, "INT64", value)
+    if isinstance(value, float):
+        return bigquery.ScalarQueryParameter(name, "FLOAT64", value)
+    return bigquery.ScalarQueryParameter(name, "STRING", value)
+
+class BigQueryBackend:
+    """Gold tables in BigQuery; the client is created on the first query."""
+
+    name = "BigQuery"
+
+    def __init__(self, dataset=GOLD_DATASET, key_path=None):
+        self.dataset = dataset
+        self.key_path = key_path or str(PROJECT_ROOT / "yelp-dataflow-sa-key.json")
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google.cloud import bigquery
+
+                # Fall back to the project's service account key when no credentials are configured
+                if not os.getenv("GOOGLE_APPLICATION_CREDENTIALS") and os.path.exists(self.key_path):
+                    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.key_path
+                self._client = bigquery.Client()
+                logger.info("Initialized BigQuery client")
+            return self._client
+
+    def table(self, name):
+        """Return the SQL reference for a gold table."""
+        return f"`{self.dataset}.{name}`"
+
+    def query(self, query):
+        """Run a parameterized query and return a DataFrame."""
+        from google.cloud import bigquery
+
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[_query_parameter(bigquery, name, value) for name, value in query.params.items()]
+        )
+        return self.client.query(query.sql, job_config=job_config).to_dataframe()
+
+    def last_modified(self, name):
+        """Return the gold table's last-modified time as an ISO string."""
+        return self.client.get_table(f"{self.dataset}.{name}").modified.isoformat()
+
+    def has_table(self, name):
+        """Whether the gold table exists (optional tables are only written by some runs)."""
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.client.get_table(f"{self.dataset}.{name}")
+        except NotFound:
+            return False
+        return True
+
+class ParquetBackend:
+    """Gold tables exported as Parquet, one file or directory per table under `root`.
+
+    Tables are loaded into an in-memory SQLite database on first use (and
+    reloaded when their files change), so the dashboard's SQL runs unchanged
+    without any GCP access.
+    """
+
+    name = "local Parquet"
+
+    def __init__(self, root):
+        self.root = root
+        self._connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self._tables = set()
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _files(self, name):
+        path = os.path.join(self.root, name)
+        if os.path.isdir(path):
+            return sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True))
+        return [f"{path}.parquet"] if os.path.exists(f"{path}.parquet") else []
+
+    def last_modified(self, name):
+        """Return the newest modification time of the table's files."""
+        files = self._files(name)
+        if not files:
+            raise FileNotFoundError(f"No Parquet data for table {name} under {self.root}")
+        return str(max(os.path.getmtime(path) for path in files))
+
+    def has_table(self, name):
+        """Whether the gold table was exported (optional tables are only written by some runs)."""
+        return bool(self._files(name))
+
+    def _ensure_loaded(self, name):
+        version = self.last_modified(name)
+        if self._loaded.get(name) != version:
+            path = os.path.join(self.root, name)
+            frame = pd.read_parquet(path if os.path.isdir(path) else f"{path}.parquet")
+            # Hive partition columns come back as categoricals, which SQLite cannot store
+            for column in frame.select_dtypes("category").columns:
+                frame[column] = frame[column].astype(frame[column].cat.categories.dtype)
+            frame.to_sql(name, self._connection, index=False, if_exists="replace")
+            self._loaded[name] = version
+
+    def table(self, name):
+        """Return the SQL reference for a gold table; it is loaded when a query uses it."""
+        with self._lock:
+            self._tables.add(name)
+        return f'"{name}"'
+
+    def query(self, query):
+        """Run a parameterized query and return a DataFrame."""
+        with self._lock:
+            for name in self._tables:
+                if f'"{name}"' in query.sql:
+                    self._ensure_loaded(name)
+            return pd.read_sql_query(query.sql, self._connection, params=query.params)
+
+def get_backend():
+    """Create the backend selected by DASHBOARD_BACKEND (`bigquery` or `parquet`)."""
+    kind = os.getenv("DASHBOARD_BACKEND", "bigquery").lower()
+    if kind == "parquet":
+        return ParquetBackend(os.getenv("DASHBOARD_PARQUET_DIR", str(PROJECT_ROOT / "data" / "gold")))
+    if kind == "bigquery":
+        return BigQueryBackend(os.getenv("DASHBOARD_DATASET", GOLD_DATASET))
+    raise ValueError(f"Unknown dashboard backend: {kind}")
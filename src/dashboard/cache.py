@@ -0,0 +1,169 @@
+"""
+Cached, single-flight data loading for the dashboard.
+
+Streamlit reruns the whole script on every interaction, so loaders are routed
+through a process-wide cache:
+- entries are served from memory until their TTL expires
+- after expiry, the gold table's last-modified time is checked and the data
+  is only re-queried if the table actually changed
+- concurrent sessions asking for the same key share one in-flight load
+- every load is snapshotted to Parquet so a cold start can skip the query
+- at most `max_entries` keys are kept; the least recently used key is
+  evicted along with its snapshot, and its lock once no load waits on it,
+  so paging and filter combinations do not grow the process without bound
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class _Entry:
+    def __init__(self, value, version, loaded_at):
+        self.value = value
+        self.version = version
+        self.loaded_at = loaded_at
+
+class _KeyLock:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = 0
+
+class SingleFlightCache:
+    """TTL cache of DataFrames keyed by name, invalidated by a data version."""
+
+    def __init__(self, ttl_seconds=600, snapshot_dir=None, clock=time.time, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_dir = snapshot_dir
+        self.clock = clock
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _key_lock(self, key):
+        """Hold the per-key load lock; it is dropped once no thread waits on it and the key is not cached."""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, _KeyLock())
+            key_lock.waiters += 1
+        try:
+            with key_lock.lock:
+                yield
+        finally:
+            with self._lock:
+                key_lock.waiters -= 1
+                if key not in self._entries:
+                    self._drop_key_lock(key)
+
+    def _drop_key_lock(self, key):
+        # Callers hold self._lock; a lock some thread still waits on or holds is kept
+        key_lock = self._key_locks.get(key)
+        if key_lock is not None and key_lock.waiters == 0:
+            del self._key_locks[key]
+
+    def _fresh(self, entry):
+        return entry is not None and self.clock() - entry.loaded_at < self.ttl_seconds
+
+    def _store(self, key, entry):
+        """Keep `entry` as the most recently used, evicting the least recently used keys over the limit."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._remove_snapshot(evicted)
+                self._drop_key_lock(evicted)
+
+    def _remove_snapshot(self, key):
+        if self.snapshot_dir:
+            for path in self._snapshot_paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _snapshot_paths(self, key):
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.snapshot_dir, f"{name}.parquet"), os.path.join(self.snapshot_dir, f"{name}.json")
+
+    def _read_snapshot(self, key):
+        if not self.snapshot_dir:
+            return None
+        data_path, meta_path = self._snapshot_paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path) as meta:
+                info = json.load(meta)
+            return _Entry(pd.read_parquet(data_path), info["version"], info["loaded_at"])
+        except Exception as e:
+            logger.warning("Ignoring unreadable snapshot for %s: %s", key, e)
+            return None
+
+    def _write_snapshot(self, key, entry, include_data=True):
+        if not self.snapshot_dir:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        data_path, meta_path = self._snapshot_paths(key)
+        try:
+            if include_data:
+                entry.value.to_parquet(data_path, index=False)
+            with open(meta_path, "w") as meta:
+                json.dump({"key": key, "version": entry.version, "loaded_at": entry.loaded_at}, meta)
+        except Exception as e:
+            logger.warning("Could not snapshot %s: %s", key, e)
+
+    def get(self, key, loader, version=None):
+        """Return the cached value for `key`, calling `loader()` only when needed.
+
+        `version` is an optional callable returning the current data version
+        (e.g. the gold table's last-modified time); it is only consulted once
+        the TTL has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._fresh(entry):
+                self._entries.move_to_end(key)
+                return entry.value
+
+        with self._key_lock(key):
+            # Another session may have finished the load while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+            entry = entry or self._read_snapshot(key)
+            if self._fresh(entry):
+                self._store(key, entry)
+                return entry.value
+
+            current_version = version() if version else None
+            unchanged = entry is not None and current_version is not None and entry.version == current_version
+            if unchanged:
+                # Data unchanged since the last load; just extend its lifetime
+                entry = _Entry(entry.value, entry.version, self.clock())
+            else:
+                entry = _Entry(loader(), current_version, self.clock())
+            self._write_snapshot(key, entry, include_data=not unchanged)
+            self._store(key, entry)
+            return entry.value
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key along with every snapshot on disk, including other processes' keys."""
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+                self._remove_snapshot(key)
+                self._drop_key_lock(key)
+                return
+            self._entries.clear()
+            for name in list(self._key_locks):
+                self._drop_key_lock(name)
+            if self.snapshot_dir and os.path.isdir(self.snapshot_dir):
+                for name in os.listdir(self.snapshot_dir):
+                    if name.endswith((".parquet", ".json")):
+                        os.remove(os.path.join(self.snapshot_dir, name))
@@ -0,0 +1,254 @@
+"""
+Parameterized dashboard queries.
+
+Filters (state, date range, top-N) and paging are pushed down into SQL so only
+the rows being rendered leave the backend. Builders return a Query of SQL text
+and named parameters. The SQL sticks to a portable subset with `@name`
+placeholders, which BigQuery and SQLite both accept, so the same queries can
+run against a local stand-in backend. Table references are passed in by the
+caller.
+"""
+
+from collections import namedtuple
+from src.geohash import INDEX_PRECISION, bounding_box, covering_cells
+
+Query = namedtuple("Query", ["sql", "params"])
+
+BUSINESS_METRICS_COLUMNS = ["state", "total_reviews", "avg_rating", "avg_business_reviews"]
+REVIEW_TRENDS_COLUMNS = ["year", "month", "total_reviews", "avg_rating"]
+REVIEW_TIMESERIES_COLUMNS = ["period_key", "total_reviews", "avg_rating"]
+TIMESERIES_RESOLUTIONS = ["day", "week", "month", "quarter"]
+CATEGORY_INDEX_COLUMNS = ["business_id", "state", "is_open"]
+GEO_CELL_COLUMNS = ["geohash", "center_latitude", "center_longitude", "businesses", "total_reviews", "avg_rating",
+                    "reviews_per_km2"]
+GEO_INDEX_COLUMNS = ["business_id", "name", "city", "state", "latitude", "longitude", "review_count", "avg_rating"]
+LEADERBOARD_COLUMNS = ["rank", "business_id", "name", "review_count", "avg_rating"]
+LEADERBOARD_RANKINGS = ["reviews", "rating"]
+
+def _in_list(column, name, values, params):
+    placeholders = []
+    for index, value in enumerate(values):
+        key = f"{name}_{index}"
+        params[key] = value
+        placeholders.append(f"@{key}")
+    return f"{column} IN ({', '.join(placeholders)})"
+
+def _page(limit, offset):
+    # LIMIT/OFFSET are inlined after validation; not every backend binds them
+    clause = ""
+    if limit is not None:
+        clause += f"\n    LIMIT {int(limit)}"
+        if offset:
+            clause += f" OFFSET {int(offset)}"
+    return clause
+
+def _where(conditions):
+    return f"\n    WHERE {' AND '.join(conditions)}" if conditions else ""
+
+def period(year, month):
+    """Encode a year and month as a sortable integer (YYYYMM)."""
+    return int(year) * 100 + int(month)
+
+def business_metrics_query(table, states=None, order_by="total_reviews", limit=None, offset=0):
+    """Business metrics for the selected states, best first, one page at a time."""
+    if order_by not in BUSINESS_METRICS_COLUMNS:
+        raise ValueError(f"Cannot order business metrics by {order_by}")
+    params = {}
+    conditions = [_in_list("state", "state", states, params)] if states else []
+    sql = f"""
+    SELECT {', '.join(BUSINESS_METRICS_COLUMNS)}
+    FROM {table}{_where(conditions)}
+    ORDER BY {order_by} DESC, state{_page(limit, offset)}
+    """
+    return Query(sql, params)
+
+def business_metrics_count_query(table, states=None):
+    """Number of business metric rows matching the state filter."""
+    params = {}
+    conditions = [_in_list("state", "state", states, params)] if states else []
+    return Query(f"SELECT COUNT(*) AS row_count FROM {table}{_where(conditions)}", params)
+
+def _period_conditions(start, end, params):
+    conditions = []
+    if start is not None:
+        params["start_period"] = period(*start)
+        conditions.append("year * 100 + month >= @start_period")
+    if end is not None:
+        params["end_period"] = period(*end)
+        conditions.append("year * 100 + month <= @end_period")
+    return conditions
+
+def review_trends_query(table, start=None, end=None, limit=None, offset=0):
+    """Review trends between (year, month) bounds, inclusive, in date order."""
+    params = {}
+    conditions = _period_conditions(start, end, params)
+    sql = f"""
+    SELECT {', '.join(REVIEW_TRENDS_COLUMNS)}
+    FROM {table}{_where(conditions)}
+    ORDER BY year, month{_page(limit, offset)}
+    """
+    return Query(sql, params)
+
+def review_trends_count_query(table, start=None, end=None):
+    """Number of review trend rows between (year, month) bounds."""
+    params = {}
+    conditions = _period_conditions(start, end, params)
+    return Query(f"SELECT COUNT(*) AS row_count FROM {table}{_where(conditions)}", params)
+
+def review_timeseries_query(table, resolution, start=None, end=None):
+    """Review time series at one resolution, for periods starting between (year, month) bounds, in date order.
+
+    Periods are identified by `period_key`, their first day as a yyyymmdd integer.
+    """
+    if resolution not in TIMESERIES_RESOLUTIONS:
+        raise ValueError(f"Unknown time-series resolution {resolution}")
+    params = {"resolution": resolution}
+    conditions = ["resolution = @resolution"]
+    if start is not None:
+        params["start_key"] = period(*start) * 100 + 1
+        conditions.append("period_key >= @start_key")
+    if end is not None:
+        params["end_key"] = period(*end) * 100 + 31
+        conditions.append("period_key <= @end_key")
+    sql = f"""
+    SELECT {', '.join(REVIEW_TIMESERIES_COLUMNS)}
+    FROM {table}{_where(conditions)}
+    ORDER BY period_key
+    """
+    return Query(sql, params)
+
+def states_query(table):
+    """Distinct states, for the filter controls."""
+    return Query(f"SELECT DISTINCT state FROM {table} WHERE state IS NOT NULL ORDER BY state", {})
+
+def period_bounds_query(table):
+    """First and last (year, month) period, for the date range control."""
+    return Query(f"SELECT MIN(year * 100 + month) AS first_period, MAX(year * 100 + month) AS last_period "
+                 f"FROM {table}", {})
+
+def category_metrics_query(table, states=None, limit=None, offset=0):
+    """Category metrics rolled up over the selected states, by review volume."""
+    params = {}
+    conditions = [_in_list("state", "state", states, params)] if states else []
+    # Ratios are rebuilt from the per-state counts so the roll-up stays exact
+    sql = f"""
+    SELECT category,
+        SUM(businesses) AS businesses,
+        1.0 * SUM(open_businesses) / NULLIF(SUM(businesses), 0) AS open_ratio,
+        SUM(total_reviews) AS total_reviews,
+        SUM(avg_rating * rated_reviews) / NULLIF(SUM(rated_reviews), 0) AS avg_rating
+    FROM {table}{_where(conditions)}
+    GROUP BY category
+    ORDER BY total_reviews DESC, category{_page(limit, offset)}
+    """
+    return Query(sql, params)
+
+def categories_query(table):
+    """Distinct categories, for the category lookup."""
+    return Query(f"SELECT DISTINCT category FROM {table} ORDER BY category", {})
+
+def _category_conditions(category, states, params):
+    params["category"] = category
+    conditions = ["category = @category"]
+    if states:
+        conditions.append(_in_list("state", "state", states, params))
+    return conditions
+
+def category_businesses_query(table, category, states=None, limit=None, offset=0):
+    """Businesses listed under a category in the category index."""
+    params = {}
+    conditions = _category_conditions(category, states, params)
+    sql = f"""
+    SELECT {', '.join(CATEGORY_INDEX_COLUMNS)}
+    FROM {table}{_where(conditions)}
+    ORDER BY business_id{_page(limit, offset)}
+    """
+    return Query(sql, params)
+
+def category_businesses_count_query(table, category, states=None):
+    """Number of businesses listed under a category."""
+    params = {}
+    conditions = _category_conditions(category, states, params)
+    return Query(f"SELECT COUNT(*) AS row_count FROM {table}{_where(conditions)}", params)
+
+def geo_cells_query(table, precision, limit=None):
+    """Geohash cells of one precision, busiest first."""
+    sql = f"""
+    SELECT {', '.join(GEO_CELL_COLUMNS)}
+    FROM {table}
+    WHERE precision = @precision
+    ORDER BY total_reviews DESC, geohash{_page(limit, 0)}
+    """
+    return Query(sql, {"precision": int(precision)})
+
+def businesses_within_query(table, latitude, longitude, radius_km):
+    """Candidate businesses for a radius lookup in the spatial index.
+
+    Only the index cells covering the circle are read (the table is
+    clustered on `geohash`), narrowed to the circle's bounding box; the
+    caller drops the candidates in the box's corners by exact distance.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    params = {"min_lat": min_lat, "max_lat": max_lat, "min_lon": min_lon, "max_lon": max_lon}
+    conditions = [
+        _in_list("geohash", "cell", covering_cells(latitude, longitude, radius_km, INDEX_PRECISION), params),
+        "latitude BETWEEN @min_lat AND @max_lat"
+    ]
+    # A box crossing the antimeridian is left to the cell filter
+    if -180.0 <= min_lon and max_lon <= 180.0:
+        conditions.append("longitude BETWEEN @min_lon AND @max_lon")
+    sql = f"""
+    SELECT {', '.join(GEO_INDEX_COLUMNS)}
+    FROM {table}{_where(conditions)}
+    """
+    return Query(sql, params)
+
+def review_distribution_query(table, states=None, start=None, end=None):
+    """Sketch rows of the review distribution for the selected states and (year, month) bounds.
+
+    Every column is returned: the caller merges the reviewer sketches and
+    rating histogram bins (see `src.sketches.summarize_distribution`), whose
+    number depends on the pipeline's configuration.
+    """
+    params = {}
+    conditions = _period_conditions(start, end, params)
+    if states:
+        conditions.append(_in_list("state", "state", states, params))
+    return Query(f"SELECT * FROM {table}{_where(conditions)}", params)
+
+def leaderboard_query(table, ranking, year, month, state, city, category=None, limit=None):
+    """One month's leaderboard of a city, or of a category within it, best first."""
+    if ranking not in LEADERBOARD_RANKINGS:
+        raise ValueError(f"Unknown leaderboard ranking {ranking}")
+    params = {"ranking": ranking, "year": int(year), "month": int(month), "state": state, "city": city}
+    conditions = ["ranking = @ranking", "year = @year", "month = @month", "state = @state", "city = @city"]
+    if category is not None:
+        params["category"] = category
+        conditions.append("category = @category")
+    sql = f"""
+    SELECT {', '.join(LEADERBOARD_COLUMNS)}
+    FROM {table}{_where(conditions)}
+    ORDER BY rank{_page(limit, 0)}
+    """
+    return Query(sql, params)
+
+def leaderboard_cities_query(table):
+    """Cities with a leaderboard, busiest first by the reviews of their ranked businesses."""
+    sql = f"""
+    SELECT state, city, SUM(review_count) AS ranked_reviews
+    FROM {table}
+    WHERE ranking = @ranking
+    GROUP BY state, city
+    ORDER BY ranked_reviews DESC, state, city
+    """
+    return Query(sql, {"ranking": "reviews"})
+
+def leaderboard_categories_query(table, state, city):
+    """Categories with a leaderboard in a city."""
+    sql = f"""
+    SELECT DISTINCT category
+    FROM {table}
+    WHERE state = @state AND city = @city
+    ORDER BY category
+    """
+    return Query(sql, {"state": state, "city": city})
@@ -0,0 +1,86 @@
+"""
+Time-series resolution choice and downsampling for the dashboard charts.
+
+The pipeline stores the review time series at day, week, month and quarter
+resolution (`review_timeseries`), so charts never aggregate on the fly:
+- `pick_resolution` picks the finest resolution that keeps the selected date
+  range under a row budget, so daily zoom reads days and long ranges read
+  weeks or months
+- `downsample` reduces the rows to a chart budget with Largest-Triangle-
+  Three-Buckets (LTTB), which keeps the peaks and dips a plain stride would
+  drop; triangle areas are computed with numpy, one bucket at a time
+"""
+
+import numpy as np
+import pandas as pd
+
+# Resolution -> approximate period length in days, finest first
+RESOLUTION_DAYS = {"day": 1.0, "week": 7.0, "month": 30.44, "quarter": 91.31}
+
+# Rows read per series, and points plotted per chart
+MAX_QUERY_POINTS = 2000
+MAX_CHART_POINTS = 500
+
+def range_days(start, end):
+    """Number of days from the first day of the `start` (year, month) to the last day of `end`."""
+    first = pd.Timestamp(year=int(start[0]), month=int(start[1]), day=1)
+    last = pd.Timestamp(year=int(end[0]), month=int(end[1]), day=1) + pd.offsets.MonthEnd(0)
+    return (last - first).days + 1
+
+def pick_resolution(start, end, max_points=MAX_QUERY_POINTS):
+    """Finest resolution with at most `max_points` periods between (year, month) bounds.
+
+    Falls back to the coarsest resolution for longer ranges, and to months
+    when the range is unknown.
+    """
+    if start is None or end is None:
+        return "month"
+    days = range_days(start, end)
+    for resolution, period_days in RESOLUTION_DAYS.items():
+        if days / period_days <= max_points:
+            return resolution
+    return list(RESOLUTION_DAYS)[-1]
+
+def lttb(x, y, threshold):
+    """Indices of the `threshold` points of (x, y) picked by Largest-Triangle-Three-Buckets.
+
+    `x` must be increasing. The first and last points are always kept; the
+    points in between are split into `threshold - 2` buckets, and each bucket
+    keeps the point forming the largest triangle with the point kept from
+    the previous bucket and the mean of the next one. Series with at most
+    `threshold` points (or a threshold under 3) are kept whole.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(x)
+    if threshold < 3 or size <= threshold:
+        return np.arange(size)
+
+    # Bucket b spans [edges[b], edges[b + 1]); the last point forms a bucket of its own
+    edges = np.linspace(1, size - 1, threshold - 1).astype(int)
+    edges = np.append(edges, size)
+    x_sums = np.concatenate([[0.0], np.cumsum(x)])
+    y_sums = np.concatenate([[0.0], np.cumsum(y)])
+    lengths = edges[1:] - edges[:-1]
+    x_means = (x_sums[edges[1:]] - x_sums[edges[:-1]]) / lengths
+    y_means = (y_sums[edges[1:]] - y_sums[edges[:-1]]) / lengths
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        next_x, next_y = x_means[bucket + 1], y_means[bucket + 1]
+        areas = np.abs((x[previous] - next_x) * (y[low:high] - y[previous])
+                       - (x[previous] - x[low:high]) * (next_y - y[previous]))
+        previous = low + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+def downsample(frame, x, y, threshold=MAX_CHART_POINTS):
+    """Rows of `frame` kept by LTTB on columns `x` and `y`; rows with a missing `y` are dropped first."""
+    frame = frame[frame[y].notna()]
+    values = frame[x].to_numpy()
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[ns]").astype("int64")
+    return frame.iloc[lttb(values, frame[y].to_numpy(dtype=float), threshold)]
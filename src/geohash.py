@@ -0,0 +1,80 @@
+"""
+Geohash cells.
+
+A geohash of precision p names a cell of a fixed latitude/longitude grid in p
+base-32 characters (5 bits each, longitude and latitude bits interleaved,
+longitude first). Cells nest: a hash's prefixes are the cells containing it.
+Shared by the pipeline, which assigns cells (see `spark.geo`), and the
+dashboard, which turns a radius into the cells it has to look up:
+- encode: the cell of a point
+- cell_size: a cell's height and width in degrees
+- covering_cells: the cells overlapping a circle's bounding box
+- distance_km: great-circle distance between two points
+"""
+
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Cell precisions assigned to businesses: ~39 km, ~4.9 km and ~1.2 km wide cells
+GEOHASH_PRECISIONS = [4, 5, 6]
+
+# Precision of the spatial index's `geohash` column
+INDEX_PRECISION = 5
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+def bits(precision):
+    """Return the number of (latitude, longitude) bits in a hash of `precision` characters."""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+def cell_size(precision):
+    """Return a cell's (height, width) in degrees."""
+    lat_bits, lon_bits = bits(precision)
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+def cell_index(value, low, span, bit_count):
+    """Return the grid row (or column) of a coordinate, clamped to the grid."""
+    cells = 2 ** bit_count
+    return min(max(int(math.floor((value - low) / span * cells)), 0), cells - 1)
+
+def encode(latitude, longitude, precision):
+    """Return the geohash of a point."""
+    lat_bits, lon_bits = bits(precision)
+    lat_index = cell_index(latitude, -90.0, 180.0, lat_bits)
+    lon_index = cell_index(longitude, -180.0, 360.0, lon_bits)
+    code = 0
+    for position in range(5 * precision):
+        if position % 2 == 0:
+            bit = lon_index >> (lon_bits - 1 - position // 2) & 1
+        else:
+            bit = lat_index >> (lat_bits - 1 - position // 2) & 1
+        code = code << 1 | bit
+    return "".join(BASE32[code >> 5 * (precision - 1 - char) & 31] for char in range(precision))
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) of a circle; longitudes are not wrapped."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+    return (max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0),
+            longitude - lon_delta, longitude + lon_delta)
+
+def covering_cells(latitude, longitude, radius_km, precision):
+    """Return the sorted cells overlapping the bounding box of a circle."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    height, width = cell_size(precision)
+    lat_bits, lon_bits = bits(precision)
+    rows = range(cell_index(min_lat, -90.0, 180.0, lat_bits), cell_index(max_lat, -90.0, 180.0, lat_bits) + 1)
+    first_column = int(math.floor((min_lon + 180.0) / width))
+    last_column = int(math.floor((max_lon + 180.0) / width))
+    columns = {column % 2 ** lon_bits for column in range(first_column, last_column + 1)}
+    return sorted({encode(-90.0 + (row + 0.5) * height, -180.0 + (column + 0.5) * width, precision)
+                   for row in rows for column in columns})
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance between two points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,98 @@
+"""
+Mergeable approximate aggregates.
+
+Gold tables in approximate mode store sketches next to their estimates, so
+any coarser grain can be rebuilt by merging rows instead of rescanning
+reviews:
+- distinct reviewers: a HyperLogLog sketch (Apache DataSketches HLL, as
+  produced by Spark's `hll_sketch_agg`); merged sketches stay within the
+  same relative error, about 1.04 / sqrt(2^lg_config_k)
+- rating percentiles: a histogram of review stars in fixed-width bins,
+  merged by adding bin counts; a percentile is the lower edge of the bin
+  holding its rank, so it is off by less than one bin width (exact for
+  stars on the bin grid, e.g. whole stars with the default width of 1)
+Shared by the pipeline (see `spark.approx`) and the dashboard, which needs
+the optional `datasketches` package to merge HLL sketches.
+"""
+
+import math
+from collections import namedtuple
+
+SketchConfig = namedtuple("SketchConfig", ["lg_config_k", "rating_bin_width"])
+SketchConfig.__doc__ = "Accuracy settings of the approximate aggregates."
+
+# 2^12 HLL registers: ~1.6% relative standard error in ~4 KB per sketch
+DEFAULT_LG_CONFIG_K = 12
+DEFAULT_RATING_BIN_WIDTH = 1.0
+DEFAULT_SKETCHES = SketchConfig(DEFAULT_LG_CONFIG_K, DEFAULT_RATING_BIN_WIDTH)
+
+# Largest lg_config_k Spark accepts; a union at this size keeps every input's accuracy
+MAX_LG_CONFIG_K = 21
+
+# Range of review star ratings covered by the histogram
+RATING_LOW = 1.0
+RATING_HIGH = 5.0
+
+# Rating percentiles stored in the gold tables
+RATING_QUANTILES = [0.25, 0.5, 0.75, 0.9]
+
+def hll_relative_error(lg_config_k):
+    """Relative standard error of an HLL sketch with 2^lg_config_k registers."""
+    return 1.04 / math.sqrt(2 ** lg_config_k)
+
+def rating_bin_count(width):
+    """Number of histogram bins; the last one holds RATING_HIGH itself."""
+    steps = (RATING_HIGH - RATING_LOW) / width
+    if width <= 0 or abs(steps - round(steps)) > 1e-9:
+        raise ValueError(f"Rating bin width {width} does not divide the {RATING_LOW}-{RATING_HIGH} rating range")
+    return int(round(steps)) + 1
+
+def rating_bin_columns(width):
+    """Names of the histogram's bin count columns."""
+    return [f"rating_bin_{index}" for index in range(rating_bin_count(width))]
+
+def rating_bin_width(bin_count):
+    """Bin width of a histogram with `bin_count` bins (inverse of `rating_bin_count`)."""
+    return (RATING_HIGH - RATING_LOW) / (bin_count - 1) if bin_count > 1 else RATING_HIGH - RATING_LOW
+
+def quantile_column(quantile):
+    """Name of a stored rating percentile column, e.g. `rating_p50`."""
+    return f"rating_p{int(round(quantile * 100))}"
+
+def histogram_quantile(counts, quantile, width):
+    """Nearest-rank quantile of a rating histogram, as its bin's lower edge; None when empty."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = max(math.ceil(quantile * total), 1)
+    cumulative = 0
+    for index, bin_count in enumerate(counts):
+        cumulative += bin_count
+        if cumulative >= rank:
+            return RATING_LOW + index * width
+    return RATING_LOW + (len(counts) - 1) * width
+
+def merge_hll(sketches):
+    """Estimate the distinct count of several serialized HLL sketches merged together.
+
+    Returns None when the optional `datasketches` package is not installed.
+    """
+    try:
+        from datasketches import hll_sketch, hll_union
+    except ImportError:
+        return None
+    union = hll_union(MAX_LG_CONFIG_K)
+    for sketch in sketches:
+        if sketch is not None:
+            union.update(hll_sketch.deserialize(bytes(sketch)))
+    return union.get_estimate()
+
+def summarize_distribution(bin_counts, sketches, quantiles=RATING_QUANTILES):
+    """Merge stored histograms (summed `bin_counts`) and reviewer sketches into estimates."""
+    width = rating_bin_width(len(bin_counts))
+    return {
+        "rated_reviews": sum(bin_counts),
+        "distinct_reviewers": merge_hll(sketches),
+        "percentiles": {quantile: histogram_quantile(bin_counts, quantile, width) for quantile in quantiles},
+        "histogram": {RATING_LOW + index * width: bin_count for index, bin_count in enumerate(bin_counts)}
+    }
@@ -0,0 +1,77 @@
+"""
+Approximate aggregation mode.
+
+Adds mergeable sketches (see `src.sketches`) to the review aggregates, so
+distinct reviewers and rating percentiles need no countDistinct or exact
+percentile shuffle over the review fact:
+- `sketch_aggregates` builds a reviewer HLL sketch and a rating histogram
+  per business and month, in the same pass as the other review measures
+- `merge_measure` merges a stored measure: sketches by HLL union, every
+  other measure (histogram bins included) by adding
+- `distribution_metrics` rebuilds estimates from merged sketches at any
+  grain, keeping the merged sketches for further rollups
+"""
+
+from pyspark.sql.functions import (
+    ceil, col, count, floor, greatest, hll_sketch_agg, hll_sketch_estimate, hll_union_agg, least, lit, when
+)
+from pyspark.sql.functions import sum as spark_sum
+from src.sketches import (
+    DEFAULT_SKETCHES, RATING_LOW, RATING_QUANTILES, quantile_column, rating_bin_columns, rating_bin_count
+)
+
+# Measures holding serialized HLL sketches, merged by union instead of addition
+SKETCH_COLUMNS = ["reviewer_sketch"]
+
+def is_sketch_measure(name):
+    """Whether a review aggregate column belongs to the approximate mode."""
+    return name in SKETCH_COLUMNS or name.startswith("rating_bin_")
+
+def rating_bin(stars, width):
+    """Histogram bin of a rating Column, clamped to the rating range; null stays null."""
+    index = floor((stars - lit(RATING_LOW)) / lit(width))
+    return when(stars.isNotNull(), least(greatest(index, lit(0)), lit(rating_bin_count(width) - 1)))
+
+def sketch_aggregates(config=DEFAULT_SKETCHES, user_column="user_id", stars_column="review_stars"):
+    """Aggregate columns sketching distinct reviewers and the rating distribution."""
+    bins = rating_bin(col(stars_column), config.rating_bin_width)
+    return [
+        hll_sketch_agg(col(user_column), config.lg_config_k).alias("reviewer_sketch"),
+        *[count(when(bins == index, 1)).alias(name)
+          for index, name in enumerate(rating_bin_columns(config.rating_bin_width))]
+    ]
+
+def merge_measure(name):
+    """Aggregate column merging a stored measure across rows."""
+    if name in SKETCH_COLUMNS:
+        # Sketches written with a different lg_config_k are merged at the smaller one
+        return hll_union_agg(col(name), True).alias(name)
+    return spark_sum(name).alias(name)
+
+def quantile_from_bins(bin_totals, quantile, width):
+    """Nearest-rank quantile Column over histogram bin count Columns; null when empty."""
+    total = sum(bin_totals[1:], bin_totals[0])
+    rank = greatest(ceil(lit(quantile) * total), lit(1))
+    result, cumulative = None, None
+    for index, bin_total in enumerate(bin_totals):
+        cumulative = bin_total if cumulative is None else cumulative + bin_total
+        edge = lit(RATING_LOW + index * width)
+        result = when(cumulative >= rank, edge) if result is None else result.when(cumulative >= rank, edge)
+    return when(total > 0, result)
+
+def distribution_metrics(config=DEFAULT_SKETCHES, count_column="review_count"):
+    """Gold metrics of distinct reviewers and rating percentiles, rebuilt from merged sketches.
+
+    The merged sketch and bin counts are kept as columns so the rows can be
+    merged again to a coarser grain.
+    """
+    width = config.rating_bin_width
+    bins = rating_bin_columns(width)
+    return [
+        ("total_reviews", lambda: spark_sum(count_column)),
+        ("distinct_reviewers", lambda: hll_sketch_estimate(hll_union_agg(col("reviewer_sketch"), True))),
+        *[(quantile_column(quantile), lambda quantile=quantile: quantile_from_bins(
+            [spark_sum(name) for name in bins], quantile, width)) for quantile in RATING_QUANTILES],
+        ("reviewer_sketch", lambda: hll_union_agg(col("reviewer_sketch"), True)),
+        *[(name, lambda name=name: spark_sum(name)) for name in bins]
+    ]
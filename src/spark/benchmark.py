@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Scale-factor benchmark for the Yelp Analytics pipeline.
+
+Runs read_bronze_data, silver_layer and gold_layer on a generated dataset
+under a local Spark master, optionally followed by writing the gold tables
+to local Parquet, and records, per layer, wall time, shuffle bytes and peak
+execution memory. Each run is appended to a JSON results file so
+regressions can be compared run over run.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pyspark import StorageLevel
+from pyspark.sql import SparkSession
+from src.spark.datagen import generate_yelp_dataset
+from src.spark.instrumentation import collect_job_group_metrics, job_group
+from src.spark.schemas import BRONZE_FILES
+from src.spark.sentiment import add_sentiment, reviews_per_second_per_core
+from src.spark.sinks import ParquetSink, write_gold_tables
+from src.spark.yelp_analytics import SILVER_COLUMNS, gold_layer, read_bronze_data, silver_layer, with_text_columns
+
+logger = logging.getLogger(__name__)
+
+# Metrics compared between runs; a higher value is a regression
+COMPARED_METRICS = ["wall_time_s", "shuffle_write_bytes", "shuffle_read_bytes", "peak_execution_memory_bytes",
+                    "persisted_bytes"]
+
+def force(*frames):
+    """Fully evaluate DataFrames without collecting them to the driver."""
+    for df in frames:
+        df.write.format("noop").mode("overwrite").save()
+
+def cached_bytes(spark):
+    """Return the memory and disk bytes held by every persisted dataset."""
+    return sum(info.memSize() + info.diskSize() for info in spark.sparkContext._jsc.sc().getRDDStorageInfo())
+
+def measure_layer(spark, name, build, isolate=True):
+    """Build and evaluate one layer, returning its outputs and metrics.
+
+    `build` returns a tuple of DataFrames. With `isolate`, the outputs are
+    persisted so the next layer's numbers exclude this layer's work, and
+    their size is reported as `persisted_bytes`.
+    """
+    group_id = f"benchmark:{name}:{time.time_ns()}"
+    cached_before = cached_bytes(spark)
+    with job_group(spark, group_id, f"Benchmark {name} layer"):
+        started = time.perf_counter()
+        frames = build()
+        if isolate:
+            frames = tuple(df.persist(StorageLevel.MEMORY_AND_DISK) for df in frames)
+        force(*frames)
+        wall_time = time.perf_counter() - started
+
+    metrics = collect_job_group_metrics(spark, group_id) or {}
+    metrics["wall_time_s"] = round(wall_time, 3)
+    if isolate:
+        metrics["persisted_bytes"] = cached_bytes(spark) - cached_before
+    logger.info("%s layer: %.2fs, shuffle write %d bytes", name, wall_time, metrics.get("shuffle_write_bytes", 0))
+    return frames, metrics
+
+def measure_write(spark, tables, sink):
+    """Write gold tables (name -> DataFrame) through `sink` and return the write metrics."""
+    group_id = f"benchmark:write:{time.time_ns()}"
+    with job_group(spark, group_id, "Benchmark gold writes"):
+        started = time.perf_counter()
+        timings = write_gold_tables(tables, sink)
+        wall_time = time.perf_counter() - started
+
+    metrics = collect_job_group_metrics(spark, group_id) or {}
+    metrics["wall_time_s"] = round(wall_time, 3)
+    metrics["tables"] = timings
+    logger.info("write layer: %.2fs to %s", wall_time, sink.name)
+    return metrics
+
+def measure_sentiment(spark, input_path, model_path=None):
+    """Score every review's text and report throughput in reviews per second per core.
+
+    Throughput is taken over the summed task time, so it does not depend on
+    how many cores ran the job.
+    """
+    reviews = read_bronze_data(spark, input_path, {"review": ["review_id", "text"]})[1]
+    _, metrics = measure_layer(
+        spark, "sentiment", lambda: (add_sentiment(reviews, model_path=model_path),), isolate=False)
+    metrics["reviews_per_s_per_core"] = reviews_per_second_per_core(
+        metrics.get("input_records", 0), metrics.get("task_time_ms", 0))
+    logger.info("sentiment: %s reviews/s/core", metrics["reviews_per_s_per_core"])
+    return metrics
+
+def run_benchmark(spark, input_path, isolate=True, sink=None, sentiment=False, silver_text=False):
+    """Benchmark the bronze, silver and gold layers over `input_path`.
+
+    With a `sink`, writing the gold tables is measured as a further layer;
+    with `sentiment`, so is scoring the review text. `silver_text` keeps
+    review text in the silver fact, the layout before it was split out, for
+    comparison.
+    """
+    layers = {}
+    columns = with_text_columns(SILVER_COLUMNS) if silver_text else SILVER_COLUMNS
+    bronze, layers["bronze"] = measure_layer(
+        spark, "bronze", lambda: read_bronze_data(spark, input_path, columns), isolate)
+    silver, layers["silver"] = measure_layer(
+        spark, "silver", lambda: (silver_layer(*bronze, with_text=silver_text),), isolate)
+    gold, layers["gold"] = measure_layer(
+        spark, "gold", lambda: gold_layer(silver[0]), isolate)
+    if sink is not None:
+        layers["write"] = measure_write(spark, dict(zip(["business_metrics", "review_trends"], gold)), sink)
+    if sentiment:
+        layers["sentiment"] = measure_sentiment(spark, input_path)
+
+    for df in bronze + silver + gold:
+        df.unpersist()
+    return layers
+
+def input_size_bytes(input_path):
+    """Return the total size of the bronze JSON files under a local path."""
+    return sum(os.path.getsize(os.path.join(input_path, name)) for name in BRONZE_FILES.values())
+
+def load_results(path):
+    """Load previous benchmark runs, or an empty list if there are none."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as results:
+        return json.load(results)
+
+def append_result(path, run):
+    """Append a run to the JSON results file."""
+    runs = load_results(path)
+    runs.append(run)
+    with open(path, "w") as results:
+        json.dump(runs, results, indent=2)
+    return runs
+
+def compare_runs(previous, current):
+    """Return per-layer ratios current/previous for the compared metrics."""
+    ratios = {}
+    for layer, metrics in current["layers"].items():
+        baseline = previous["layers"].get(layer, {})
+        ratios[layer] = {
+            name: round(metrics[name] / baseline[name], 3)
+            for name in COMPARED_METRICS
+            if baseline.get(name) and name in metrics
+        }
+    return ratios
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Yelp Analytics pipeline on generated data")
+    parser.add_argument("--scale-factor", type=float, default=1.0, help="Generated dataset size relative to SF 1")
+    parser.add_argument("--data-dir", help="Directory of the generated dataset (default: /tmp/yelp-sf<SF>)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the run is appended to")
+    parser.add_argument("--master", default="local[*]", help="Spark master")
+    parser.add_argument("--no-isolate", action="store_true", help="Do not persist layer outputs between layers")
+    parser.add_argument("--sentiment", action="store_true", help="Also benchmark sentiment scoring of the review text")
+    parser.add_argument("--silver-with-text", action="store_true",
+                        help="Keep review text in the silver fact, as before it was split out, for comparison")
+    parser.add_argument("--gold-path", help="Also benchmark writing the gold tables as Parquet under this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    data_dir = args.data_dir or f"/tmp/yelp-sf{args.scale_factor:g}"
+    if not os.path.exists(os.path.join(data_dir, BRONZE_FILES["review"])):
+        logger.info("Generating scale factor %g dataset at %s", args.scale_factor, data_dir)
+        generate_yelp_dataset(data_dir, args.scale_factor)
+
+    spark = SparkSession.builder.appName("Yelp Analytics Benchmark").master(args.master).getOrCreate()
+    try:
+        sink = ParquetSink(args.gold_path) if args.gold_path else None
+        layers = run_benchmark(spark, data_dir, isolate=not args.no_isolate, sink=sink, sentiment=args.sentiment,
+                               silver_text=args.silver_with_text)
+        run = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "scale_factor": args.scale_factor,
+            "input_bytes": input_size_bytes(data_dir),
+            "spark_version": spark.version,
+            "master": args.master,
+            "default_parallelism": spark.sparkContext.defaultParallelism,
+            "isolated_layers": not args.no_isolate,
+            "silver_with_text": args.silver_with_text,
+            "layers": layers
+        }
+    finally:
+        spark.stop()
+
+    runs = append_result(args.output, run)
+    previous = [r for r in runs[:-1] if r["scale_factor"] == args.scale_factor]
+    print(json.dumps(run["layers"], indent=2))
+    if previous:
+        print("Ratios against the previous run at this scale factor:")
+        print(json.dumps(compare_runs(previous[-1], run), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Columnar cache of the bronze layer.
+
+Converts the raw Yelp JSON into Parquet once so later runs get column pruning
+and predicate pushdown instead of a full JSON parse:
+- reviews are partitioned by review year
+- businesses are partitioned by state
+- users are written unpartitioned
+Each partition value is spread over up to WRITE_SALTS write tasks by a hash
+of the entity key, so one busy value (e.g. a recent review year) is not
+written by a single task, and files are capped at MAX_RECORDS_PER_FILE rows.
+
+A cached entity is only used while its `_SUCCESS` marker is newer than the
+JSON it was converted from.
+"""
+
+import argparse
+import logging
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import col, pmod, xxhash64, year
+from pyspark.sql.types import IntegerType, StructField, StructType
+from src.spark.hadoop_fs import modification_time
+from src.spark.schemas import BRONZE_FILES, SCHEMA_VERSION, get_bronze_schema
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = {
+    "business": "state",
+    "review": "review_year",
+    "user": None
+}
+
+# Unique key of each entity, hashed to spread a partition value over several write tasks
+KEY_COLUMNS = {
+    "business": "business_id",
+    "review": "review_id",
+    "user": "user_id"
+}
+
+WRITE_SALTS = 16
+MAX_RECORDS_PER_FILE = 1000000
+
+def cache_entity_path(cache_path, entity, schema_version=SCHEMA_VERSION):
+    """Return the Parquet directory for an entity; caches are kept per schema version."""
+    return f"{cache_path}/{schema_version}/{entity}"
+
+def cache_schema(entity, schema_version=SCHEMA_VERSION):
+    """Return the schema of a cached entity, including derived partition columns."""
+    schema = get_bronze_schema(entity, version=schema_version)
+    if entity == "review":
+        return StructType(schema.fields + [StructField("review_year", IntegerType(), True)])
+    return schema
+
+def is_cache_fresh(spark, input_path, cache_path, entity, schema_version=SCHEMA_VERSION):
+    """Return True if the cached copy of an entity exists and is newer than its JSON source."""
+    cached_at = modification_time(spark, f"{cache_entity_path(cache_path, entity, schema_version)}/_SUCCESS")
+    source_at = modification_time(spark, f"{input_path}/{BRONZE_FILES[entity]}")
+    return cached_at is not None and source_at is not None and cached_at >= source_at
+
+def ingest_bronze(spark, input_path, cache_path, entities=None, schema_version=SCHEMA_VERSION, force=False):
+    """Convert bronze JSON to partitioned Parquet, skipping entities whose cache is fresh.
+
+    Returns the list of entities that were (re)written.
+    """
+    written = []
+    for entity in entities or BRONZE_FILES:
+        if not force and is_cache_fresh(spark, input_path, cache_path, entity, schema_version):
+            logger.info("Bronze cache for %s is up to date", entity)
+            continue
+
+        df = spark.read.schema(get_bronze_schema(entity, version=schema_version)) \
+            .json(f"{input_path}/{BRONZE_FILES[entity]}")
+        if entity == "review":
+            df = df.withColumn("review_year", year(col("date")))
+
+        writer_df = df
+        partition_column = PARTITION_COLUMNS[entity]
+        if partition_column:
+            # Up to WRITE_SALTS tasks (and files) per partition value keeps directories small without
+            # leaving a whole value to one task
+            writer_df = df.repartition(col(partition_column), pmod(xxhash64(KEY_COLUMNS[entity]), WRITE_SALTS))
+        writer = writer_df.write.mode("overwrite").option("maxRecordsPerFile", MAX_RECORDS_PER_FILE)
+        if partition_column:
+            writer = writer.partitionBy(partition_column)
+
+        target = cache_entity_path(cache_path, entity, schema_version)
+        logger.info("Converting bronze %s to Parquet at %s", entity, target)
+        writer.parquet(target)
+        written.append(entity)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Yelp bronze JSON to a partitioned Parquet cache")
+    parser.add_argument("--input-path", required=True, help="Directory containing the bronze JSON files")
+    parser.add_argument("--cache-path", required=True, help="Directory for the Parquet cache")
+    parser.add_argument("--schema-version", default=SCHEMA_VERSION, help="Bronze schema registry version")
+    parser.add_argument("--force", action="store_true", help="Rewrite the cache even if it is up to date")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    spark = SparkSession.builder.appName("Yelp Bronze Cache").getOrCreate()
+    try:
+        ingest_bronze(spark, args.input_path, args.cache_path, schema_version=args.schema_version, force=args.force)
+    finally:
+        spark.stop()
+
+if __name__ == "__main__":
+    main()
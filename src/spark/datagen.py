@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Synthetic Yelp data generator.
+
+Writes business, review and user JSON-lines files shaped like the Yelp Open
+Dataset, so the pipeline can be exercised and benchmarked without GCP:
+- sizes scale linearly with a scale factor (SF 1 = 1k businesses, 5k users, 25k reviews)
+- businesses and users are drawn from Zipf-like distributions to reproduce
+  mega-businesses and power users
+- review text lengths are log-normal and word choice follows the rating
+- review dates grow denser towards the end of the date range
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from src.spark.schemas import BRONZE_FILES
+
+ROWS_PER_SCALE_FACTOR = {"business": 1000, "user": 5000, "review": 25000}
+
+CITIES = [
+    ("Philadelphia", "PA", 39.95, -75.16), ("Tucson", "AZ", 32.22, -110.97), ("Tampa", "FL", 27.95, -82.46),
+    ("Indianapolis", "IN", 39.77, -86.16), ("Nashville", "TN", 36.16, -86.78), ("New Orleans", "LA", 29.95, -90.07),
+    ("Reno", "NV", 39.53, -119.81), ("Edmonton", "AB", 53.55, -113.49), ("Saint Louis", "MO", 38.63, -90.20),
+    ("Santa Barbara", "CA", 34.42, -119.70), ("Boise", "ID", 43.62, -116.20), ("Wilmington", "DE", 39.74, -75.55)
+]
+CITY_WEIGHTS = [14, 9, 9, 7, 6, 6, 4, 4, 4, 3, 2, 1]
+
+CATEGORIES = [
+    "Restaurants", "Food", "Shopping", "Home Services", "Beauty & Spas", "Nightlife", "Health & Medical",
+    "Local Services", "Bars", "Automotive", "Event Planning & Services", "Sandwiches", "American (Traditional)",
+    "Pizza", "Coffee & Tea", "Fast Food", "Breakfast & Brunch", "Mexican", "Italian", "Chinese", "Hotels & Travel",
+    "Burgers", "Seafood", "Japanese", "Active Life", "Salad", "Bakeries", "Desserts", "Pets", "Fitness & Instruction"
+]
+
+POSITIVE_WORDS = ["great", "amazing", "delicious", "friendly", "excellent", "love", "perfect", "fresh", "best",
+                  "awesome", "recommend", "wonderful", "fantastic", "tasty", "helpful"]
+NEGATIVE_WORDS = ["terrible", "rude", "slow", "bland", "awful", "dirty", "worst", "cold", "overpriced",
+                  "disappointing", "horrible", "never", "bad", "wrong", "mediocre"]
+NEUTRAL_WORDS = ["the", "a", "and", "was", "we", "food", "place", "service", "ordered", "staff", "table", "time",
+                 "menu", "came", "with", "our", "for", "it", "they", "to", "of", "visit", "price", "order", "here",
+                 "there", "dinner", "lunch", "drinks", "wait", "minutes", "location", "parking", "again", "back"]
+
+# Share of reviews per star rating in the public dataset, 1 to 5 stars
+STAR_WEIGHTS = [14, 8, 11, 22, 45]
+
+START_DATE = datetime(2005, 1, 1)
+END_DATE = datetime(2022, 1, 19)
+
+def zipf_cum_weights(n, exponent):
+    """Cumulative Zipf weights for n ranked items, for use with random.choices."""
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+def random_date(rng, start=START_DATE, end=END_DATE):
+    """Draw a timestamp whose density grows linearly towards `end`."""
+    span = (end - start).total_seconds()
+    return start + timedelta(seconds=span * math.sqrt(rng.random()))
+
+def review_text(rng, stars, mean_words=80):
+    """Build review text whose length is log-normal and whose tone follows the rating."""
+    length = max(3, int(rng.lognormvariate(math.log(mean_words), 0.7)))
+    positive_share = (stars - 1) / 4
+    words = []
+    for _ in range(length):
+        draw = rng.random()
+        if draw < 0.15 * positive_share:
+            words.append(rng.choice(POSITIVE_WORDS))
+        elif draw < 0.15:
+            words.append(rng.choice(NEGATIVE_WORDS))
+        else:
+            words.append(rng.choice(NEUTRAL_WORDS))
+    return " ".join(words).capitalize() + "."
+
+def _write_json_lines(path, records):
+    with open(path, "w") as out:
+        for record in records:
+            out.write(json.dumps(record))
+            out.write("\n")
+
+def generate_yelp_dataset(output_path, scale_factor=1.0, seed=42, skew=1.1, mean_words=80):
+    """Write Yelp-shaped bronze JSON files to `output_path`.
+
+    Returns the number of rows written per entity.
+    """
+    rng = random.Random(seed)
+    counts = {entity: max(1, int(rows * scale_factor)) for entity, rows in ROWS_PER_SCALE_FACTOR.items()}
+    os.makedirs(output_path, exist_ok=True)
+
+    business_ids = [f"bus{index:09d}" for index in range(counts["business"])]
+    user_ids = [f"usr{index:09d}" for index in range(counts["user"])]
+    business_weights = zipf_cum_weights(len(business_ids), skew)
+    user_weights = zipf_cum_weights(len(user_ids), skew)
+
+    business_reviews = {}
+    user_reviews = {}
+
+    def reviews():
+        for index in range(counts["review"]):
+            business_id = rng.choices(business_ids, cum_weights=business_weights)[0]
+            user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+            stars = rng.choices(range(1, 6), weights=STAR_WEIGHTS)[0]
+            business_reviews.setdefault(business_id, []).append(stars)
+            user_reviews.setdefault(user_id, []).append(stars)
+            yield {
+                "review_id": f"rev{index:012d}",
+                "user_id": user_id,
+                "business_id": business_id,
+                "stars": float(stars),
+                "useful": int(rng.expovariate(0.8)),
+                "funny": int(rng.expovariate(2.0)),
+                "cool": int(rng.expovariate(1.5)),
+                "text": review_text(rng, stars, mean_words),
+                "date": random_date(rng).strftime("%Y-%m-%d %H:%M:%S")
+            }
+
+    def businesses():
+        for business_id in business_ids:
+            city, state, latitude, longitude = rng.choices(CITIES, weights=CITY_WEIGHTS)[0]
+            ratings = business_reviews.get(business_id, [])
+            stars = round(2 * sum(ratings) / len(ratings)) / 2 if ratings else float(rng.randint(2, 10)) / 2
+            yield {
+                "business_id": business_id,
+                "name": f"Business {business_id[3:].lstrip('0') or '0'}",
+                "address": f"{rng.randint(1, 9999)} Main St",
+                "city": city,
+                "state": state,
+                "postal_code": f"{rng.randint(10000, 99999)}",
+                "latitude": round(latitude + rng.uniform(-0.2, 0.2), 7),
+                "longitude": round(longitude + rng.uniform(-0.2, 0.2), 7),
+                "stars": stars,
+                "review_count": len(ratings),
+                "is_open": int(rng.random() < 0.8),
+                "attributes": {"RestaurantsPriceRange2": str(rng.randint(1, 4)), "WiFi": rng.choice(["free", "no"])},
+                "categories": ", ".join(rng.sample(CATEGORIES, rng.randint(1, 4))),
+                "hours": {"Monday": "9:0-21:0", "Saturday": "10:0-22:0"}
+            }
+
+    def users():
+        for user_id in user_ids:
+            ratings = user_reviews.get(user_id, [])
+            yield {
+                "user_id": user_id,
+                "name": f"User {user_id[3:].lstrip('0') or '0'}",
+                "review_count": len(ratings),
+                "yelping_since": random_date(rng, START_DATE, datetime(2015, 1, 1)).strftime("%Y-%m-%d %H:%M:%S"),
+                "useful": int(rng.expovariate(0.05)),
+                "funny": int(rng.expovariate(0.1)),
+                "cool": int(rng.expovariate(0.1)),
+                "elite": "",
+                "friends": "None",
+                "fans": int(rng.expovariate(0.5)),
+                "average_stars": round(sum(ratings) / len(ratings), 2) if ratings else 0.0
+            }
+
+    # Reviews first: business and user aggregates are derived from them
+    _write_json_lines(os.path.join(output_path, BRONZE_FILES["review"]), reviews())
+    _write_json_lines(os.path.join(output_path, BRONZE_FILES["business"]), businesses())
+    _write_json_lines(os.path.join(output_path, BRONZE_FILES["user"]), users())
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Yelp dataset")
+    parser.add_argument("--output-path", required=True, help="Directory for the generated JSON files")
+    parser.add_argument("--scale-factor", type=float, default=1.0, help="Dataset size relative to SF 1")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for business and user popularity")
+    args = parser.parse_args()
+
+    counts = generate_yelp_dataset(args.output_path, args.scale_factor, args.seed, args.skew)
+    print(f"Generated {counts} at {args.output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Geohash enrichment and geographic gold sources.
+
+Businesses are assigned geohash cells (see `src.geohash`) with native Spark
+expressions, so no Python UDF runs per row:
+- the hash is computed once, at the finest precision; coarser cells are its
+  prefixes
+- `geo_cells` rolls per-business review totals (from the persisted
+  "business_months" source) up into one row per business and precision, so
+  every cell-level rollup comes from the single pass over the review fact
+- `business_geo_index` lists located businesses by their cell at
+  INDEX_PRECISION; written clustered (or sorted) on `geohash`, a radius query
+  only reads the cells covering the circle
+"""
+
+from pyspark.sql.functions import (
+    array, col, concat, cos, explode, floor, greatest, least, lit, radians, shiftleft, shiftright, struct, substring,
+    when
+)
+from src.geohash import BASE32, GEOHASH_PRECISIONS, INDEX_PRECISION, KM_PER_DEGREE, bits, cell_size
+from src.spark.gold import ratio, with_business_totals
+
+def _cell_index(value, low, span, bit_count):
+    cells = 2 ** bit_count
+    # greatest/least skip nulls, so keep a missing coordinate null explicitly
+    index = floor((value - lit(low)) / lit(span) * lit(cells))
+    return when(value.isNotNull(), least(greatest(index, lit(0)), lit(cells - 1)))
+
+def geohash(latitude, longitude, precision):
+    """Geohash Column of a point; null when either coordinate is null."""
+    lat_bits, lon_bits = bits(precision)
+    lat_index = _cell_index(latitude, -90.0, 180.0, lat_bits)
+    lon_index = _cell_index(longitude, -180.0, 360.0, lon_bits)
+    chars = []
+    for char in range(precision):
+        value = lit(0)
+        for offset in range(5):
+            position = 5 * char + offset
+            if position % 2 == 0:
+                bit = shiftright(lon_index, lon_bits - 1 - position // 2).bitwiseAND(1)
+            else:
+                bit = shiftright(lat_index, lat_bits - 1 - position // 2).bitwiseAND(1)
+            value = value + shiftleft(bit, 4 - offset)
+        chars.append(lit(BASE32).substr(value + 1, lit(1)))
+    return concat(*chars)
+
+def cell_center(latitude, longitude, precision):
+    """Return (latitude, longitude) Columns of the center of a point's cell."""
+    lat_bits, lon_bits = bits(precision)
+    height, width = cell_size(precision)
+    return (lit(-90.0) + (_cell_index(latitude, -90.0, 180.0, lat_bits) + 0.5) * height,
+            lit(-180.0) + (_cell_index(longitude, -180.0, 360.0, lon_bits) + 0.5) * width)
+
+def cell_area_km2(center_latitude, precision):
+    """Area Column of a cell, from its center latitude."""
+    height, width = cell_size(precision)
+    return lit(height * KM_PER_DEGREE * width * KM_PER_DEGREE) * cos(radians(center_latitude))
+
+def with_geohash(df, precisions=GEOHASH_PRECISIONS, latitude="latitude", longitude="longitude"):
+    """Add a `geohash_<p>` column per precision, all prefixes of the finest one."""
+    finest = max(precisions)
+    df = df.withColumn(f"geohash_{finest}", geohash(col(latitude), col(longitude), finest))
+    for precision in sorted(precisions, reverse=True)[1:]:
+        df = df.withColumn(f"geohash_{precision}", substring(col(f"geohash_{finest}"), 1, precision))
+    return df
+
+def located(business_df):
+    """Businesses with both coordinates."""
+    return business_df.filter(col("latitude").isNotNull() & col("longitude").isNotNull())
+
+def business_geo_index(business_months_df, business_df, precision=INDEX_PRECISION):
+    """Spatial index: located businesses with their review totals, keyed by `geohash`."""
+    businesses = located(business_df).select(
+        "business_id", "name", "city", "state", "latitude", "longitude",
+        geohash(col("latitude"), col("longitude"), precision).alias("geohash")
+    )
+    return with_business_totals(businesses, business_months_df).select(
+        "geohash", "business_id", "name", "city", "state", "latitude", "longitude", "review_count",
+        ratio(col("star_sum"), col("star_count")).alias("avg_rating")
+    )
+
+def geo_cells(business_months_df, business_df, precisions=GEOHASH_PRECISIONS):
+    """One row per located business and precision, with its cell and review totals.
+
+    Only the business dimension is multiplied by the number of precisions;
+    review totals come from the business-month source.
+    """
+    cells = []
+    for precision in precisions:
+        center_latitude, center_longitude = cell_center(col("latitude"), col("longitude"), precision)
+        cells.append(struct(
+            lit(precision).alias("precision"),
+            substring(col("geohash"), 1, precision).alias("geohash"),
+            center_latitude.alias("center_latitude"),
+            center_longitude.alias("center_longitude"),
+            cell_area_km2(center_latitude, precision).alias("area_km2")
+        ))
+    businesses = located(business_df).select(
+        "business_id", "latitude", "longitude",
+        geohash(col("latitude"), col("longitude"), max(precisions)).alias("geohash")
+    ).select("business_id", explode(array(*cells)).alias("cell")).select("business_id", "cell.*")
+    return with_business_totals(businesses, business_months_df)
+
+def geo_sources(business_months_df, business_df):
+    """Build the spatial index and the per-cell geo source."""
+    return {"business_geo_index": business_geo_index(business_months_df, business_df),
+            "geo_cells": geo_cells(business_months_df, business_df)}
@@ -0,0 +1,386 @@
+"""
+Gold table engine.
+
+All gold tables are rollups of one shared intermediate, the per-business
+monthly review aggregates joined to the business dimension ("business_months").
+Measures are kept as sums and counts so any coarser grain can be rebuilt
+exactly. Gold tables are declared in GOLD_TABLES; each declaration groups the
+shared intermediate, so adding a table does not add another scan of the reviews.
+
+Category tables use a second source: only the (small) business dimension is
+exploded into one row per business and category ("category_index"), and
+per-business totals rolled up from "business_months" are joined to it
+("category_businesses"), so the review fact is never multiplied by the
+number of categories or scanned again. Geographic tables are built the same
+way from the business dimension's geohash cells (see `geo`).
+
+In approximate mode, the review aggregates also carry mergeable sketches
+(see `approx`), and `review_distribution` rebuilds distinct reviewers and
+rating percentiles from them.
+
+Leaderboards (see `leaderboards`) are declared alongside the gold tables but
+rank businesses per group with bounded top-K heaps instead of aggregating.
+
+The review time series uses a daily source instead ("review_days"). Reviews
+are aggregated once per business and day ("review_business_days"), and both
+the monthly review aggregates and the days are rolled up from those rows, so
+the reviews are scanned once for both. Every day row is assigned to its day,
+week, month and quarter in the same pass ("review_periods"), so all
+resolutions are rolled up by one aggregation and kept as sums and counts.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from pyspark import StorageLevel
+from pyspark.sql.functions import (
+    array, avg, col, count, date_format, date_trunc, desc, explode, lit, lower, month, split, struct, to_date, trim,
+    when, year
+)
+from pyspark.sql.functions import max as spark_max, sum as spark_sum
+from src.sketches import DEFAULT_SKETCHES
+from src.spark.approx import distribution_metrics, is_sketch_measure, merge_measure, sketch_aggregates
+from src.spark.leaderboards import DEFAULT_LEADERBOARD_SIZE, DEFAULT_MIN_REVIEWS, Leaderboard, build_leaderboard
+from src.spark.sentiment import SENTIMENT_COLUMNS, sentiment_aggregates
+
+GoldTable = namedtuple("GoldTable", ["name", "source", "group_by", "metrics", "order_by"])
+GoldTable.__doc__ = """Declaration of a gold table.
+
+`metrics` is a list of (alias, builder) pairs where builder() returns an
+aggregate Column over the source; `order_by` is a list of (column, ascending).
+"""
+
+def ratio(numerator, denominator):
+    """Divide two columns, returning null instead of dividing by zero."""
+    return when(denominator > 0, numerator / denominator)
+
+def total(column):
+    """Metric builder summing a mergeable column."""
+    return lambda: spark_sum(column)
+
+def mean(sum_column, count_column):
+    """Metric builder rebuilding an average from a sum and a count column."""
+    return lambda: ratio(spark_sum(sum_column), spark_sum(count_column))
+
+GOLD_TABLES = [
+    GoldTable(
+        name="business_metrics",
+        source="business_months",
+        group_by=["state"],
+        metrics=[
+            ("total_reviews", total("review_count")),
+            ("avg_rating", mean("star_sum", "star_count")),
+            ("avg_business_reviews", mean("business_review_sum", "business_review_weight"))
+        ],
+        order_by=[("total_reviews", False)]
+    ),
+    GoldTable(
+        name="review_trends",
+        source="business_months",
+        group_by=["year", "month"],
+        metrics=[
+            ("total_reviews", total("review_count")),
+            ("avg_rating", mean("star_sum", "star_count"))
+        ],
+        order_by=[("year", True), ("month", True)]
+    )
+]
+
+# Built when the reviews were scored for sentiment (see `sentiment.add_sentiment`)
+SENTIMENT_TABLES = [
+    GoldTable(
+        name="sentiment_trends",
+        source="business_months",
+        group_by=["state", "year", "month"],
+        metrics=[
+            ("scored_reviews", total("sentiment_count")),
+            ("avg_sentiment", mean("sentiment_sum", "sentiment_count")),
+            ("positive_reviews", total("positive_count")),
+            ("negative_reviews", total("negative_count")),
+            ("neutral_reviews", total("neutral_count")),
+            ("positive_share", mean("positive_count", "sentiment_count")),
+            ("negative_share", mean("negative_count", "sentiment_count"))
+        ],
+        order_by=[("state", True), ("year", True), ("month", True)]
+    )
+]
+
+# Built from the category sources (see `category_sources`)
+CATEGORY_TABLES = [
+    GoldTable(
+        name="category_metrics",
+        source="category_businesses",
+        group_by=["category", "state"],
+        metrics=[
+            ("businesses", lambda: count(lit(1))),
+            ("open_businesses", total("is_open")),
+            ("open_ratio", lambda: avg("is_open")),
+            ("total_reviews", total("review_count")),
+            ("rated_reviews", total("star_count")),
+            ("avg_rating", mean("star_sum", "star_count"))
+        ],
+        order_by=[("total_reviews", False), ("category", True), ("state", True)]
+    )
+]
+
+# Built from the geo sources (see `geo.geo_sources`); one row per cell at each precision
+GEO_TABLES = [
+    GoldTable(
+        name="geo_cell_metrics",
+        source="geo_cells",
+        group_by=["precision", "geohash"],
+        metrics=[
+            ("center_latitude", lambda: spark_max("center_latitude")),
+            ("center_longitude", lambda: spark_max("center_longitude")),
+            ("area_km2", lambda: spark_max("area_km2")),
+            ("businesses", lambda: count(lit(1))),
+            ("total_reviews", total("review_count")),
+            ("rated_reviews", total("star_count")),
+            ("avg_rating", mean("star_sum", "star_count")),
+            ("reviews_per_km2", lambda: ratio(spark_sum("review_count"), spark_max("area_km2")))
+        ],
+        order_by=[("precision", True), ("geohash", True)]
+    )
+]
+
+# Time-series resolutions, finest first; each is a `date_trunc` unit (weeks start on Monday)
+TIMESERIES_RESOLUTIONS = ["day", "week", "month", "quarter"]
+
+# Built from the daily review source (see `review_periods`); one row per period at each resolution
+TIMESERIES_TABLES = [
+    GoldTable(
+        name="review_timeseries",
+        source="review_periods",
+        group_by=["resolution", "period_start", "period_key"],
+        metrics=[
+            ("total_reviews", total("review_count")),
+            ("star_sum", total("star_sum")),
+            ("rated_reviews", total("star_count")),
+            ("avg_rating", mean("star_sum", "star_count"))
+        ],
+        order_by=[("resolution", True), ("period_start", True)]
+    )
+]
+
+def sketch_tables(config=DEFAULT_SKETCHES):
+    """Declare the approximate-mode tables for the sketch accuracy in `config`."""
+    return [
+        GoldTable(
+            name="review_distribution",
+            source="business_months",
+            group_by=["state", "year", "month"],
+            metrics=distribution_metrics(config),
+            order_by=[("state", True), ("year", True), ("month", True)]
+        )
+    ]
+
+def review_business_days(review_df, user_df=None, sketches=None):
+    """Pre-aggregate reviews per business and day before any join: the one scan of the reviews.
+
+    Stars are kept as a sum and a non-null count so averages can be rebuilt
+    exactly after the join; `last_review_date` tracks the newest review
+    aggregated into each row. Reviews scored for sentiment also get the
+    sentiment sums and counts, and with a SketchConfig in `sketches`, the
+    approximate-mode sketches. Passing `user_df` keeps silver's inner join to
+    users as a semi-join on `user_id` (assumed unique); omit it to skip the
+    user table entirely. Both the monthly (`review_months`) and the daily
+    (`review_days`) aggregates are rolled up from these rows. Reviews without
+    a parseable date are left out: they fall in no day or month, and an
+    incremental run could not tell them apart from reviews it already merged.
+    """
+    scored = "sentiment_score" in review_df.columns
+    reviews = review_df.select(col("user_id"), col("business_id"), col("stars").alias("review_stars"), col("date"),
+                               *(["sentiment_score", "sentiment"] if scored else []))
+    if user_df is not None:
+        reviews = reviews.join(user_df.select("user_id"), "user_id", "left_semi")
+
+    return reviews.where(col("date").isNotNull()).groupBy(col("business_id"), to_date("date").alias("day")).agg(
+        count("*").alias("review_count"),
+        spark_sum("review_stars").alias("star_sum"),
+        count("review_stars").alias("star_count"),
+        spark_max("date").alias("last_review_date"),
+        *(sentiment_aggregates() if scored else []),
+        *(sketch_aggregates(sketches) if sketches else [])
+    )
+
+def rollup_reviews(aggregates_df, keys):
+    """Merge review aggregate rows to the grain of `keys`: sums are added and sketches unioned."""
+    measures = [name for name in aggregates_df.columns
+                if name not in keys + ["business_id", "day", "last_review_date"]]
+    return aggregates_df.groupBy(*keys).agg(
+        *[merge_measure(name) for name in measures],
+        spark_max("last_review_date").alias("last_review_date")
+    )
+
+def review_months(business_days_df):
+    """Roll the per-business daily aggregates up to business and month (the review aggregates)."""
+    return rollup_reviews(business_days_df.withColumn("year", year("day")).withColumn("month", month("day")),
+                          ["business_id", "year", "month"])
+
+def review_aggregates(review_df, user_df=None, sketches=None):
+    """Pre-aggregate reviews per business and month before any join (see `review_business_days`)."""
+    return review_months(review_business_days(review_df, user_df, sketches))
+
+def review_days(business_days_df, business_df):
+    """Roll the per-business daily aggregates up to days, for the time-series rollups.
+
+    Rows are semi-joined to the business dimension so the series counts the
+    same reviews as the business-month source. Only the review counts and
+    stars are kept.
+    """
+    days = business_days_df.select(
+        "business_id", "day", "review_count", "star_sum", "star_count", "last_review_date"
+    ).join(business_df.select("business_id"), "business_id", "left_semi")
+    return rollup_reviews(days, ["day"])
+
+def review_periods(days_df, resolutions=TIMESERIES_RESOLUTIONS):
+    """Assign every day row to its period at each resolution (the time-series source).
+
+    `period_start` is the first day of the period and `period_key` the same
+    date as a yyyymmdd integer, which filters portably in the dashboard.
+    """
+    periods = array(*[struct(lit(resolution).alias("resolution"),
+                             date_trunc(resolution, col("day")).cast("date").alias("period_start"))
+                      for resolution in resolutions])
+    return days_df.select(explode(periods).alias("period"), "review_count", "star_sum", "star_count").select(
+        col("period.resolution").alias("resolution"),
+        col("period.period_start").alias("period_start"),
+        date_format(col("period.period_start"), "yyyyMMdd").cast("int").alias("period_key"),
+        "review_count", "star_sum", "star_count"
+    )
+
+def business_months(review_aggs, business_df):
+    """Join pre-aggregated reviews to the business dimension (the shared gold source)."""
+    business_dim = business_df.select(
+        col("business_id"),
+        col("state"),
+        col("review_count").alias("business_review_count")
+    )
+    # business_review_count is averaged over review rows, so weight it by the review count
+    return review_aggs.join(business_dim, "business_id").select(
+        col("business_id"),
+        col("state"),
+        col("year"),
+        col("month"),
+        col("review_count"),
+        col("star_sum"),
+        col("star_count"),
+        (col("business_review_count") * col("review_count")).alias("business_review_sum"),
+        when(col("business_review_count").isNotNull(), col("review_count")).otherwise(0).alias("business_review_weight"),
+        *[col(name) for name in SENTIMENT_COLUMNS if name in review_aggs.columns],
+        *[col(name) for name in review_aggs.columns if is_sketch_measure(name)]
+    )
+
+def business_months_from_silver(silver_df):
+    """Build the shared gold source from an already joined silver DataFrame.
+
+    Reviews without a parseable date are left out, as in `review_business_days`.
+    """
+    return silver_df.where(col("date").isNotNull()).groupBy(
+        col("business_id"), col("state"), year("date").alias("year"), month("date").alias("month")
+    ).agg(
+        count("*").alias("review_count"),
+        spark_sum("review_stars").alias("star_sum"),
+        count("review_stars").alias("star_count"),
+        spark_sum("business_review_count").alias("business_review_sum"),
+        count("business_review_count").alias("business_review_weight"),
+        *(sentiment_aggregates() if "sentiment_score" in silver_df.columns else [])
+    )
+
+def leaderboard_tables(size=DEFAULT_LEADERBOARD_SIZE, min_reviews=DEFAULT_MIN_REVIEWS):
+    """Declare the monthly top-`size` leaderboards per city and per category within a city.
+
+    Built from the leaderboard sources (see `leaderboards.leaderboard_sources`).
+    """
+    return [
+        Leaderboard(
+            name="city_leaderboard",
+            source="leaderboard_months",
+            group_by=["state", "city", "year", "month"],
+            size=size,
+            min_reviews=min_reviews
+        ),
+        Leaderboard(
+            name="category_leaderboard",
+            source="category_leaderboard_months",
+            group_by=["category", "state", "city", "year", "month"],
+            size=size,
+            min_reviews=min_reviews
+        )
+    ]
+
+def category_index(business_df):
+    """Explode the business dimension into one row per business and category.
+
+    Categories are lower-cased and trimmed; Yelp separates them with commas
+    (older dumps with `|`). Businesses without categories are left out.
+    """
+    categories = split(lower(col("categories")), "[,|]")
+    return business_df.select(
+        col("business_id"), col("state"), col("is_open"), explode(categories).alias("category")
+    ).select(
+        trim(col("category")).alias("category"), col("business_id"), col("state"), col("is_open")
+    ).filter(col("category") != "").dropDuplicates(["category", "business_id"])
+
+def business_totals(business_months_df):
+    """Roll the business-month source up to one row of review sums and counts per business."""
+    return business_months_df.groupBy("business_id").agg(
+        spark_sum("review_count").alias("review_count"),
+        spark_sum("star_sum").alias("star_sum"),
+        spark_sum("star_count").alias("star_count")
+    )
+
+def with_business_totals(df, business_months_df):
+    """Left-join per-business review totals to `df`; businesses without reviews get zero counts."""
+    return df.join(business_totals(business_months_df), "business_id", "left") \
+        .fillna(0, ["review_count", "star_count"]) \
+        .fillna(0.0, ["star_sum"])
+
+def category_businesses(business_months_df, index_df):
+    """Join per-business review totals to the category index.
+
+    The business-month source is rolled up to one row per business before
+    the join, and businesses without reviews keep zero counts so they still
+    count towards the open ratio.
+    """
+    return with_business_totals(index_df, business_months_df)
+
+def category_sources(business_months_df, business_df):
+    """Build the category index and the per-business category source."""
+    index_df = category_index(business_df)
+    return {"category_index": index_df, "category_businesses": category_businesses(business_months_df, index_df)}
+
+def build_gold_table(sources, table):
+    """Build one declared gold table from its source DataFrame."""
+    aggregates = [builder().alias(alias) for alias, builder in table.metrics]
+    result = sources[table.source].groupBy(*table.group_by).agg(*aggregates)
+    if table.order_by:
+        result = result.orderBy(*[col(name) if ascending else desc(name) for name, ascending in table.order_by])
+    return result
+
+def rollup_distribution(distribution_df, group_by, config=DEFAULT_SKETCHES):
+    """Merge `review_distribution` rows to a coarser grain, without touching the reviews."""
+    rollup = GoldTable("review_distribution_rollup", "review_distribution", group_by,
+                       distribution_metrics(config, count_column="total_reviews"), None)
+    return build_gold_table({"review_distribution": distribution_df}, rollup)
+
+def compute_gold_tables(sources, tables=None):
+    """Build every declared gold table (or leaderboard) over the given sources (name -> DataFrame)."""
+    return {table.name: build_leaderboard(sources, table) if isinstance(table, Leaderboard)
+            else build_gold_table(sources, table) for table in (tables or GOLD_TABLES)}
+
+@contextmanager
+def gold_scan(sources, tables=None, storage_level=StorageLevel.MEMORY_AND_DISK, exports=()):
+    """Persist the gold sources for the duration of the block and yield the gold tables.
+
+    The first write materializes each source once; every other table reads the
+    persisted copy. Sources named in `exports` (e.g. `category_index`) are
+    yielded as tables of their own. Sources are unpersisted when the block exits.
+    """
+    persisted = {name: df.persist(storage_level) for name, df in sources.items()}
+    try:
+        gold_tables = compute_gold_tables(persisted, tables)
+        gold_tables.update({name: persisted[name] for name in exports})
+        yield gold_tables
+    finally:
+        for df in persisted.values():
+            df.unpersist()
@@ -0,0 +1,68 @@
+"""
+Filesystem helpers backed by the Hadoop FileSystem API.
+
+Going through the JVM keeps `gs://` and local paths on the same code path, so
+pipeline stages that need file metadata behave the same on Dataproc and under
+`local[*]`.
+"""
+
+def _filesystem(spark, path):
+    jvm = spark.sparkContext._jvm
+    hadoop_path = jvm.org.apache.hadoop.fs.Path(path)
+    return hadoop_path.getFileSystem(spark.sparkContext._jsc.hadoopConfiguration()), hadoop_path
+
+def path_exists(spark, path):
+    """Return True if `path` exists."""
+    fs, hadoop_path = _filesystem(spark, path)
+    return fs.exists(hadoop_path)
+
+def modification_time(spark, path):
+    """Return the modification time of `path` in epoch milliseconds, or None if it does not exist."""
+    fs, hadoop_path = _filesystem(spark, path)
+    if not fs.exists(hadoop_path):
+        return None
+    return fs.getFileStatus(hadoop_path).getModificationTime()
+
+def read_text(spark, path):
+    """Return the UTF-8 contents of a small file, or None if it does not exist."""
+    fs, hadoop_path = _filesystem(spark, path)
+    if not fs.exists(hadoop_path):
+        return None
+    stream = fs.open(hadoop_path)
+    try:
+        return spark.sparkContext._jvm.org.apache.commons.io.IOUtils.toString(stream, "UTF-8")
+    finally:
+        stream.close()
+
+def write_text(spark, path, text):
+    """Write a small UTF-8 file, replacing any existing one."""
+    fs, hadoop_path = _filesystem(spark, path)
+    stream = fs.create(hadoop_path, True)
+    try:
+        stream.write(bytearray(text.encode("utf-8")))
+    finally:
+        stream.close()
+
+def delete_path(spark, path):
+    """Recursively delete `path`; returns False if it did not exist."""
+    fs, hadoop_path = _filesystem(spark, path)
+    return fs.delete(hadoop_path, True)
+
+def list_files(spark, path):
+    """Return (path, length, modification time) of every file under `path`, recursively; [] if missing."""
+    fs, hadoop_path = _filesystem(spark, path)
+    if not fs.exists(hadoop_path):
+        return []
+    files = []
+    iterator = fs.listFiles(hadoop_path, True)
+    while iterator.hasNext():
+        status = iterator.next()
+        files.append((status.getPath().toString(), status.getLen(), status.getModificationTime()))
+    return sorted(files)
+
+def list_directories(spark, path):
+    """Return the paths of the directories directly under `path`; [] if missing."""
+    fs, hadoop_path = _filesystem(spark, path)
+    if not fs.exists(hadoop_path):
+        return []
+    return sorted(status.getPath().toString() for status in fs.listStatus(hadoop_path) if status.isDirectory())
@@ -0,0 +1,212 @@
+"""
+Spark job metrics collection.
+
+Work is attributed by tagging the Spark jobs it triggers with a job group;
+task metrics of the group's stages are then read back from the status API
+(`statusTracker` plus the UI's REST endpoint). Nothing here triggers a Spark
+action.
+- job_group / collect_job_group_metrics: tag and measure one block of work
+- PipelineMetrics: per-run report over the medallion stages of a job
+"""
+
+import json
+import logging
+import os
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# REST stage field -> reported metric name; values are summed across stages
+STAGE_METRICS = {
+    "executorRunTime": "task_time_ms",
+    "executorCpuTime": "task_cpu_time_ns",
+    "jvmGcTime": "gc_time_ms",
+    "inputBytes": "input_bytes",
+    "inputRecords": "input_records",
+    "outputBytes": "output_bytes",
+    "outputRecords": "output_records",
+    "shuffleReadBytes": "shuffle_read_bytes",
+    "shuffleReadRecords": "shuffle_read_records",
+    "shuffleWriteBytes": "shuffle_write_bytes",
+    "shuffleWriteRecords": "shuffle_write_records",
+    "memoryBytesSpilled": "memory_bytes_spilled",
+    "diskBytesSpilled": "disk_bytes_spilled"
+}
+
+@contextmanager
+def job_group(spark, group_id, description=None):
+    """Tag every Spark job started inside the block with `group_id`."""
+    sc = spark.sparkContext
+    sc.setJobGroup(group_id, description or group_id)
+    try:
+        yield group_id
+    finally:
+        sc.setLocalProperty("spark.jobGroup.id", None)
+        sc.setLocalProperty("spark.job.description", None)
+
+def _rest_stage_attempts(spark, stage_id):
+    sc = spark.sparkContext
+    url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}/stages/{stage_id}"
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.load(response)
+
+def _wait_for_jobs(tracker, job_ids, timeout):
+    # Job end events reach the status store asynchronously
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        infos = [tracker.getJobInfo(job_id) for job_id in job_ids]
+        if all(info is not None and info.status in ("SUCCEEDED", "FAILED") for info in infos):
+            return infos
+        time.sleep(0.1)
+    return [tracker.getJobInfo(job_id) for job_id in job_ids]
+
+def stage_kind(attempt):
+    """Classify a Spark stage by what it did.
+
+    `scan` stages read input (bronze files or persisted intermediates),
+    `exchange` stages feed a shuffle (joins and aggregations) and `output`
+    stages produce the final result or write it out.
+    """
+    if attempt.get("shuffleWriteBytes", 0) > 0:
+        return "exchange" if attempt.get("shuffleReadBytes", 0) > 0 or not attempt.get("inputRecords", 0) else "scan"
+    if attempt.get("inputRecords", 0) > 0 and attempt.get("shuffleReadBytes", 0) == 0:
+        return "scan"
+    return "output"
+
+def empty_metrics():
+    """Return a metrics dict with every counter at zero."""
+    metrics = {name: 0 for name in STAGE_METRICS.values()}
+    metrics.update({"jobs": 0, "stages": 0, "tasks": 0, "peak_execution_memory_bytes": 0})
+    return metrics
+
+def collect_job_group_metrics(spark, group_id, timeout=10, breakdown=False):
+    """Aggregate the task metrics of all stages run under a job group.
+
+    Returns a dict of summed counters (see STAGE_METRICS) plus job, stage and
+    task counts and the largest stage peak execution memory (summed over the
+    stage's tasks, as the status store reports it), or None when
+    the Spark UI (and so the REST API) is disabled. With `breakdown`, the
+    dict also lists each Spark stage under `spark_stages` with its kind.
+    """
+    sc = spark.sparkContext
+    tracker = sc.statusTracker()
+    job_ids = tracker.getJobIdsForGroup(group_id)
+    infos = [info for info in _wait_for_jobs(tracker, job_ids, timeout) if info is not None]
+
+    if not sc.uiWebUrl:
+        return None
+
+    metrics = empty_metrics()
+    metrics["jobs"] = len(infos)
+    spark_stages = []
+    for stage_id in sorted({stage_id for info in infos for stage_id in info.stageIds}):
+        try:
+            attempts = _rest_stage_attempts(spark, stage_id)
+        except Exception as e:
+            logger.warning("Could not read metrics for stage %s: %s", stage_id, e)
+            continue
+        for attempt in attempts:
+            # Skipped stages reused earlier shuffle output and did no work
+            if attempt.get("status") == "SKIPPED":
+                continue
+            metrics["stages"] += 1
+            metrics["tasks"] += attempt.get("numCompleteTasks", 0) + attempt.get("numFailedTasks", 0)
+            for field, name in STAGE_METRICS.items():
+                metrics[name] += attempt.get(field, 0)
+            metrics["peak_execution_memory_bytes"] = max(
+                metrics["peak_execution_memory_bytes"], attempt.get("peakExecutionMemory", 0))
+            if breakdown:
+                stage = {name: attempt.get(field, 0) for field, name in STAGE_METRICS.items()}
+                stage.update({
+                    "stage_id": stage_id,
+                    "attempt": attempt.get("attemptId", 0),
+                    "name": attempt.get("name"),
+                    "kind": stage_kind(attempt),
+                    "tasks": attempt.get("numCompleteTasks", 0) + attempt.get("numFailedTasks", 0),
+                    "peak_execution_memory_bytes": attempt.get("peakExecutionMemory", 0)
+                })
+                spark_stages.append(stage)
+    if breakdown:
+        metrics["spark_stages"] = spark_stages
+    return metrics
+
+class PipelineMetrics:
+    """Collects a structured metrics report for one pipeline run.
+
+    Each `stage()` block tags the Spark jobs it starts; `report()` reads their
+    task metrics back once the work is done. Because Spark is lazy, scans and
+    joins run inside whichever block triggers them (usually a write), so the
+    report also totals Spark stages by kind across the run.
+    """
+
+    def __init__(self, spark, run_id=None):
+        self.spark = spark
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc)
+        self._stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Tag the Spark jobs started inside the block as pipeline stage `name`."""
+        group_id = f"{self.run_id}:{name}"
+        started = time.perf_counter()
+        status = "failed"
+        try:
+            with job_group(self.spark, group_id, f"Yelp pipeline {name}"):
+                yield
+            status = "succeeded"
+        finally:
+            self._stages[name] = {
+                "group_id": group_id,
+                "status": status,
+                "wall_time_s": round(time.perf_counter() - started, 3)
+            }
+
+    def report(self):
+        """Return the run report; call before the Spark session is stopped."""
+        stages = {}
+        by_kind = {}
+        for name, stage in self._stages.items():
+            metrics = collect_job_group_metrics(self.spark, stage["group_id"], breakdown=True)
+            stages[name] = dict(stage, metrics=metrics)
+            for spark_stage in (metrics or {}).get("spark_stages", []):
+                totals = by_kind.setdefault(spark_stage["kind"], empty_metrics())
+                totals["stages"] += 1
+                totals["tasks"] += spark_stage["tasks"]
+                for metric in STAGE_METRICS.values():
+                    totals[metric] += spark_stage[metric]
+                totals["peak_execution_memory_bytes"] = max(
+                    totals["peak_execution_memory_bytes"], spark_stage["peak_execution_memory_bytes"])
+
+        return {
+            "run_id": self.run_id,
+            "application_id": self.spark.sparkContext.applicationId,
+            "started_at": self.started_at.isoformat(),
+            "wall_time_s": round((datetime.now(timezone.utc) - self.started_at).total_seconds(), 3),
+            "stages": stages,
+            "by_kind": by_kind
+        }
+
+    def log_report(self, report):
+        """Log a one-line summary per pipeline stage."""
+        for name, stage in report["stages"].items():
+            metrics = stage["metrics"] or {}
+            logger.info("%s: %s in %.2fs, task time %dms, input %d bytes, shuffle read/write %d/%d bytes, spill %d bytes",
+                        name, stage["status"], stage["wall_time_s"], metrics.get("task_time_ms", 0),
+                        metrics.get("input_bytes", 0), metrics.get("shuffle_read_bytes", 0),
+                        metrics.get("shuffle_write_bytes", 0),
+                        metrics.get("memory_bytes_spilled", 0) + metrics.get("disk_bytes_spilled", 0))
+
+    def write_report(self, path, report=None):
+        """Write the run report as JSON to a local path."""
+        report = report or self.report()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as out:
+            json.dump(report, out, indent=2)
+        return report
@@ -0,0 +1,113 @@
+"""
+Top-K business leaderboards.
+
+Leaderboards rank businesses per group (e.g. city and month) by review
+volume and by rating, without sorting or windowing whole groups:
+- they are built from the business-month source, already one row per
+  business and group, so the review fact is never touched; businesses with
+  fewer than `min_reviews` reviews in a group are dropped before ranking
+- each partition keeps the best `size` businesses per group and ranking in a
+  bounded heap (a map-side combiner of `aggregateByKey`), so at most `size`
+  rows per group and partition are shuffled, and merging two partial
+  leaderboards keeps the bound
+- the result is one compact row per group, ranking and rank
+"""
+
+import heapq
+from collections import namedtuple
+from pyspark.sql.functions import col
+from pyspark.sql.types import DoubleType, IntegerType, LongType, StringType, StructField, StructType
+
+Leaderboard = namedtuple("Leaderboard", ["name", "source", "group_by", "size", "min_reviews"])
+Leaderboard.__doc__ = """Declaration of a top-K leaderboard table.
+
+The `source` must hold one row per business and `group_by` group, with
+`business_id`, `name`, `review_count`, `star_sum` and `star_count`.
+"""
+
+DEFAULT_LEADERBOARD_SIZE = 10
+DEFAULT_MIN_REVIEWS = 5
+
+Entry = namedtuple("Entry", ["business_id", "name", "review_count", "avg_rating"])
+
+# Ranking -> sort key, best first; ties go to the other measure, then to the smaller business_id
+RANKINGS = {
+    "reviews": lambda entry: (-entry.review_count, -(entry.avg_rating or 0.0), entry.business_id),
+    "rating": lambda entry: (entry.avg_rating is None, -(entry.avg_rating or 0.0), -entry.review_count,
+                             entry.business_id)
+}
+
+def empty_leaderboard():
+    """Partial leaderboard of a group: ranking -> kept entries."""
+    return {ranking: [] for ranking in RANKINGS}
+
+def add_entry(board, entry, size):
+    """Add a business to a partial leaderboard, keeping at most about 2 * `size` entries per ranking.
+
+    Entries are appended and cut back to the best `size` with a bounded heap
+    once twice that many accumulate, so adding stays amortized O(log size).
+    """
+    for ranking, key in RANKINGS.items():
+        kept = board[ranking]
+        kept.append(entry)
+        if len(kept) >= 2 * size:
+            board[ranking] = heapq.nsmallest(size, kept, key=key)
+    return board
+
+def merge_leaderboards(left, right, size):
+    """Merge two partial leaderboards of the same group, keeping the best `size` per ranking."""
+    return {ranking: heapq.nsmallest(size, left[ranking] + right[ranking], key=key)
+            for ranking, key in RANKINGS.items()}
+
+def ranked_rows(group, board, size):
+    """Final rows of a group's leaderboard: group values, ranking, rank and the entry's fields."""
+    return [(*group, ranking, rank, *entry)
+            for ranking, key in RANKINGS.items()
+            for rank, entry in enumerate(heapq.nsmallest(size, board[ranking], key=key), start=1)]
+
+def leaderboard_schema(source_schema, group_by):
+    """Schema of a leaderboard table over a source with `source_schema`."""
+    return StructType([
+        *[StructField(name, source_schema[name].dataType, True) for name in group_by],
+        StructField("ranking", StringType(), False),
+        StructField("rank", IntegerType(), False),
+        StructField("business_id", StringType(), True),
+        StructField("name", StringType(), True),
+        StructField("review_count", LongType(), True),
+        StructField("avg_rating", DoubleType(), True)
+    ])
+
+def build_leaderboard(sources, board):
+    """Build one declared leaderboard table from its source DataFrame."""
+    df = sources[board.source]
+    group_by, size = list(board.group_by), board.size
+    # Only qualifying businesses, and only the columns that are ranked, leave the JVM
+    candidates = df.where(col("review_count") >= board.min_reviews).select(
+        *group_by, "business_id", "name", "review_count",
+        (col("star_sum") / col("star_count")).alias("avg_rating")
+    )
+    width = len(group_by)
+    tops = candidates.rdd.map(
+        lambda row: (tuple(row[:width]), Entry(*row[width:]))
+    ).aggregateByKey(
+        empty_leaderboard(),
+        lambda partial, entry: add_entry(partial, entry, size),
+        lambda left, right: merge_leaderboards(left, right, size)
+    )
+    rows = tops.flatMap(lambda item: ranked_rows(item[0], item[1], size))
+    return df.sparkSession.createDataFrame(rows, leaderboard_schema(df.schema, group_by))
+
+def leaderboard_sources(business_months_df, business_df, index_df=None):
+    """Build the business-month leaderboard sources, with names and cities from the business dimension.
+
+    With the category index in `index_df`, the category source lists each
+    business-month once per category of the business.
+    """
+    names = business_df.select("business_id", "name", "city")
+    months = business_months_df.select(
+        "business_id", "state", "year", "month", "review_count", "star_sum", "star_count"
+    ).join(names, "business_id")
+    sources = {"leaderboard_months": months}
+    if index_df is not None:
+        sources["category_leaderboard_months"] = months.join(index_df.select("business_id", "category"), "business_id")
+    return sources
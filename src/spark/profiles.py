@@ -0,0 +1,99 @@
+"""
+Spark session profiles.
+
+A profile fixes where a run executes and how its shuffles are sized, so the
+9-row unit-test fixture and the full dataset no longer share one set of
+defaults:
+- static settings (master, serializer) are applied when the session is built
+- once the session exists, the bronze input is sized from a file listing
+  (no data is read) and the runtime SQL settings are derived from it:
+  shuffle partitions of about `target_partition_bytes` each, a broadcast
+  threshold that covers the business dimension, and adaptive execution
+  coalescing towards the same partition size
+"""
+
+import logging
+import math
+from collections import namedtuple
+from pyspark.sql import SparkSession
+from src.spark.hadoop_fs import list_files
+from src.spark.schemas import BRONZE_FILES
+
+logger = logging.getLogger(__name__)
+
+Profile = namedtuple("Profile", [
+    "name", "master", "settings", "target_partition_bytes", "max_partitions", "max_broadcast_bytes"
+])
+Profile.__doc__ = "Execution profile: static session settings and the bounds of the input-size tuning."
+
+MB = 1024 * 1024
+
+# Spark's default broadcast threshold; tuning never goes below it
+DEFAULT_BROADCAST_BYTES = 10 * MB
+
+KRYO = {"spark.serializer": "org.apache.spark.serializer.KryoSerializer"}
+
+PROFILES = {
+    "local": Profile("local", "local[*]", KRYO, 64 * MB, 200, 64 * MB),
+    "test": Profile("test", "local[*]", {**KRYO, "spark.sql.shuffle.partitions": "4",
+                                         "spark.ui.showConsoleProgress": "false"}, 8 * MB, 4, DEFAULT_BROADCAST_BYTES),
+    # The master comes from spark-submit on the cluster
+    "dataproc": Profile("dataproc", None, KRYO, 128 * MB, 2000, 256 * MB)
+}
+
+def get_profile(name):
+    """Look up a profile by name."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown Spark profile {name!r}; expected one of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+def session_builder(profile, app_name):
+    """SparkSession builder with the profile's static settings."""
+    builder = SparkSession.builder.appName(app_name)
+    if profile.master:
+        builder = builder.master(profile.master)
+    for key, value in profile.settings.items():
+        builder = builder.config(key, value)
+    return builder
+
+def estimate_input_bytes(spark, input_path, files=BRONZE_FILES):
+    """Bytes of each bronze file (entity -> bytes) from a listing; missing files count as 0."""
+    return {entity: sum(length for _, length, _ in list_files(spark, f"{input_path}/{file_name}"))
+            for entity, file_name in files.items()}
+
+def tune_settings(profile, input_bytes, parallelism):
+    """Runtime SQL settings for inputs of `input_bytes` (entity -> bytes) on `parallelism` cores.
+
+    Shuffle partitions are a whole number of waves over the cores, capped by
+    the profile. The broadcast threshold is raised to the business file's
+    size, an upper bound of the projected dimension Spark estimates, so it
+    is broadcast whenever it fits under the profile's cap.
+    """
+    target = profile.target_partition_bytes
+    waves = max(math.ceil(sum(input_bytes.values()) / target / parallelism), 1)
+    partitions = min(waves * parallelism, profile.max_partitions)
+    broadcast = min(max(input_bytes.get("business", 0), DEFAULT_BROADCAST_BYTES), profile.max_broadcast_bytes)
+    return {
+        "spark.sql.shuffle.partitions": str(partitions),
+        "spark.sql.files.maxPartitionBytes": str(target),
+        "spark.sql.autoBroadcastJoinThreshold": str(broadcast),
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.adaptive.autoBroadcastJoinThreshold": str(broadcast),
+        "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        "spark.sql.adaptive.advisoryPartitionSizeInBytes": str(target),
+        "spark.sql.adaptive.skewJoin.enabled": "true"
+    }
+
+def configure_session(spark, profile, input_path):
+    """Size the bronze input under `input_path` and apply the profile's tuned settings; returns them."""
+    input_bytes = estimate_input_bytes(spark, input_path)
+    settings = tune_settings(profile, input_bytes, spark.sparkContext.defaultParallelism)
+    for key, value in settings.items():
+        spark.conf.set(key, value)
+    logger.info("Spark profile %s for %.1f MB of bronze input (%s) on %d cores",
+                profile.name, sum(input_bytes.values()) / MB,
+                ", ".join(f"{entity} {size / MB:.1f} MB" for entity, size in input_bytes.items()),
+                spark.sparkContext.defaultParallelism)
+    for key, value in sorted({**profile.settings, **settings}.items()):
+        logger.info("  %s = %s", key, value)
+    return settings
@@ -0,0 +1,165 @@
+"""
+Single-pass data-quality profiling.
+
+Checks ride along with the transformations they guard instead of running as
+extra `count()`/`filter()` scans: each profiled DataFrame carries a Spark
+`Observation`, whose aggregates are computed by whichever action writes or
+persists the data anyway.
+- `DataQuality.profile` observes row counts, nulls, out-of-range values,
+  unparseable dates, min/max and approximate distinct counts of the columns
+  listed in PROFILED_COLUMNS
+- `DataQuality.observe` observes arbitrary aggregates, e.g. the join misses
+  counted by `silver_layer`
+- `DataQuality.check` turns counts into rates per row once the observed
+  data has been computed, and compares them against thresholds: breaches
+  are logged, and failing ones raise DataQualityError
+"""
+
+import logging
+from collections import namedtuple
+from pyspark.sql import Observation
+from pyspark.sql.functions import approx_count_distinct, col, count, lit, to_timestamp, when
+from pyspark.sql.functions import max as spark_max
+from pyspark.sql.functions import min as spark_min
+
+logger = logging.getLogger(__name__)
+
+# Bronze columns profiled per entity: keys get null and distinct counts, ranged
+# columns out-of-range counts and min/max, dates unparseable counts and min/max
+PROFILED_COLUMNS = {
+    "business": {
+        "keys": ["business_id"],
+        "ranges": {"stars": (1.0, 5.0), "latitude": (-90.0, 90.0), "longitude": (-180.0, 180.0)},
+        "dates": []
+    },
+    "review": {
+        "keys": ["review_id", "user_id", "business_id"],
+        "ranges": {"stars": (1.0, 5.0)},
+        "dates": ["date"]
+    },
+    "user": {
+        "keys": ["user_id"],
+        "ranges": {"average_stars": (1.0, 5.0)},
+        "dates": ["yelping_since"]
+    }
+}
+
+Threshold = namedtuple("Threshold", ["max_rate", "action"])
+Threshold.__doc__ = "Largest tolerated share of rows for a check, and whether a breach warns or fails the run."
+
+ACTIONS = ["warn", "fail"]
+
+# "<observation>.<metric>" -> Threshold; rates are metric counts over the observation's rows
+DEFAULT_THRESHOLDS = {
+    "business.business_id_nulls": Threshold(0.0, "fail"),
+    "business.latitude_out_of_range": Threshold(0.0, "warn"),
+    "business.longitude_out_of_range": Threshold(0.0, "warn"),
+    "review.business_id_nulls": Threshold(0.0, "fail"),
+    "review.user_id_nulls": Threshold(0.0, "warn"),
+    "review.date_unparseable": Threshold(0.001, "fail"),
+    "review.stars_out_of_range": Threshold(0.001, "warn"),
+    "silver.business_misses": Threshold(0.01, "warn"),
+    "silver.user_misses": Threshold(0.05, "warn")
+}
+
+class DataQualityError(Exception):
+    """Raised when a data-quality check with a `fail` action is breached."""
+
+    def __init__(self, breaches):
+        self.breaches = breaches
+        super().__init__("Data-quality checks failed: " + "; ".join(
+            f"{breach['check']} rate {breach['rate']:.4%} > {breach['max_rate']:.4%}" for breach in breaches))
+
+def parse_threshold(text):
+    """Parse a `<observation>.<metric>=<max rate>[:warn|fail]` option into (check, Threshold)."""
+    name, _, value = text.partition("=")
+    rate, _, action = value.partition(":")
+    action = action or "fail"
+    if "." not in name or not rate or action not in ACTIONS:
+        raise ValueError(f"Invalid data-quality threshold {text!r}; expected <observation>.<metric>=<rate>[:warn|fail]")
+    return name, Threshold(float(rate), action)
+
+def column_profile(df, spec):
+    """Aggregate columns profiling the columns of `spec` (see PROFILED_COLUMNS) present in `df`."""
+    present = set(df.columns)
+    aggregates = []
+    for name in spec["keys"]:
+        if name in present:
+            aggregates += [count(when(col(name).isNull(), 1)).alias(f"{name}_nulls"),
+                           approx_count_distinct(name).alias(f"{name}_distinct")]
+    for name, (low, high) in spec["ranges"].items():
+        if name in present:
+            aggregates += [count(when(col(name).isNull(), 1)).alias(f"{name}_nulls"),
+                           count(when(~col(name).between(low, high), 1)).alias(f"{name}_out_of_range"),
+                           spark_min(name).alias(f"{name}_min"), spark_max(name).alias(f"{name}_max")]
+    for name in spec["dates"]:
+        if name in present:
+            parsed = to_timestamp(col(name))
+            aggregates += [count(when(col(name).isNull(), 1)).alias(f"{name}_nulls"),
+                           count(when(col(name).isNotNull() & parsed.isNull(), 1)).alias(f"{name}_unparseable"),
+                           spark_min(parsed).cast("string").alias(f"{name}_min"),
+                           spark_max(parsed).cast("string").alias(f"{name}_max")]
+    return aggregates
+
+class DataQuality:
+    """Observed data-quality metrics of one run, checked against `thresholds`.
+
+    An observation is only computed by an action over the DataFrame it was
+    attached to, so `check` must be called after that action; observations
+    of stages that were not computed (e.g. reused from a stage store) must
+    not be registered.
+    """
+
+    def __init__(self, thresholds=DEFAULT_THRESHOLDS):
+        self.thresholds = dict(thresholds)
+        self.results = {}
+        self._pending = {}
+
+    @property
+    def pending(self):
+        """Names of observations not collected yet."""
+        return sorted(self._pending)
+
+    def observe(self, name, df, *aggregates):
+        """Attach a row count and `aggregates` to `df` as observation `name`."""
+        observation = Observation()
+        self._pending[name] = observation
+        return df.observe(observation, count(lit(1)).alias("rows"), *aggregates)
+
+    def profile(self, name, df, spec=None):
+        """Attach the column profile of entity `name` (or `spec`) to `df`."""
+        return self.observe(name, df, *column_profile(df, spec or PROFILED_COLUMNS[name]))
+
+    def collect(self):
+        """Read back the pending observations; blocks until their actions have run."""
+        for name, observation in sorted(self._pending.items()):
+            self.results[name] = observation.get
+        collected = {name: self.results[name] for name in self._pending}
+        self._pending = {}
+        return collected
+
+    def check(self):
+        """Collect the pending observations and compare them against the thresholds.
+
+        Returns the breaches; raises DataQualityError if any has a `fail` action.
+        """
+        collected = self.collect()
+        breaches = []
+        for check, threshold in sorted(self.thresholds.items()):
+            name, _, metric = check.partition(".")
+            if metric not in collected.get(name, {}):
+                continue
+            rows = collected[name]["rows"]
+            rate = collected[name][metric] / rows if rows else 0.0
+            if rate > threshold.max_rate:
+                breaches.append({"check": check, "count": collected[name][metric], "rows": rows, "rate": rate,
+                                 "max_rate": threshold.max_rate, "action": threshold.action})
+        for name, metrics in collected.items():
+            logger.info("Data quality of %s: %s", name, metrics)
+        for breach in breaches:
+            logger.warning("Data-quality check %s breached: %d of %d rows (%.4f%% > %.4f%%)", breach["check"],
+                           breach["count"], breach["rows"], 100 * breach["rate"], 100 * breach["max_rate"])
+        failures = [breach for breach in breaches if breach["action"] == "fail"]
+        if failures:
+            raise DataQualityError(failures)
+        return breaches
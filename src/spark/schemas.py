@@ -0,0 +1,136 @@
+"""
+Bronze schema registry for the Yelp Open Dataset.
+
+Explicit schemas let Spark parse the raw JSON in a single pass instead of
+scanning every file once up front to infer types. Schemas are versioned so a
+change in the upstream dataset is introduced deliberately:
+- get_bronze_schema: registry lookup, optionally pruned to a column subset
+- sample_json_schema: cheap inference over the first lines of a file
+- detect_schema_drift: compare a sampled schema against the registry
+"""
+
+from pyspark.sql.types import (
+    StructType, StructField, StringType, LongType, DoubleType, MapType, NumericType
+)
+
+SCHEMA_VERSION = "v1"
+
+BRONZE_FILES = {
+    "business": "yelp_academic_dataset_business.json",
+    "review": "yelp_academic_dataset_review.json",
+    "user": "yelp_academic_dataset_user.json"
+}
+
+BRONZE_SCHEMAS = {
+    "v1": {
+        "business": StructType([
+            StructField("business_id", StringType(), True),
+            StructField("name", StringType(), True),
+            StructField("address", StringType(), True),
+            StructField("city", StringType(), True),
+            StructField("state", StringType(), True),
+            StructField("postal_code", StringType(), True),
+            StructField("latitude", DoubleType(), True),
+            StructField("longitude", DoubleType(), True),
+            StructField("stars", DoubleType(), True),
+            StructField("review_count", LongType(), True),
+            StructField("is_open", LongType(), True),
+            StructField("attributes", MapType(StringType(), StringType()), True),
+            StructField("categories", StringType(), True),
+            StructField("hours", MapType(StringType(), StringType()), True)
+        ]),
+        "review": StructType([
+            StructField("review_id", StringType(), True),
+            StructField("user_id", StringType(), True),
+            StructField("business_id", StringType(), True),
+            StructField("stars", DoubleType(), True),
+            StructField("useful", LongType(), True),
+            StructField("funny", LongType(), True),
+            StructField("cool", LongType(), True),
+            StructField("text", StringType(), True),
+            StructField("date", StringType(), True)
+        ]),
+        "user": StructType([
+            StructField("user_id", StringType(), True),
+            StructField("name", StringType(), True),
+            StructField("review_count", LongType(), True),
+            StructField("yelping_since", StringType(), True),
+            StructField("useful", LongType(), True),
+            StructField("funny", LongType(), True),
+            StructField("cool", LongType(), True),
+            StructField("elite", StringType(), True),
+            StructField("friends", StringType(), True),
+            StructField("fans", LongType(), True),
+            StructField("average_stars", DoubleType(), True),
+            StructField("compliment_hot", LongType(), True),
+            StructField("compliment_more", LongType(), True),
+            StructField("compliment_profile", LongType(), True),
+            StructField("compliment_cute", LongType(), True),
+            StructField("compliment_list", LongType(), True),
+            StructField("compliment_note", LongType(), True),
+            StructField("compliment_plain", LongType(), True),
+            StructField("compliment_cool", LongType(), True),
+            StructField("compliment_funny", LongType(), True),
+            StructField("compliment_writer", LongType(), True),
+            StructField("compliment_photos", LongType(), True)
+        ])
+    }
+}
+
+def get_bronze_schema(entity, columns=None, version=SCHEMA_VERSION):
+    """Return the registered schema for an entity, pruned to `columns` if given."""
+    if version not in BRONZE_SCHEMAS:
+        raise ValueError(f"Unknown bronze schema version: {version}")
+    if entity not in BRONZE_SCHEMAS[version]:
+        raise ValueError(f"Unknown bronze entity: {entity}")
+
+    schema = BRONZE_SCHEMAS[version][entity]
+    if columns is None:
+        return schema
+
+    wanted = set(columns)
+    unknown = wanted - set(schema.fieldNames())
+    if unknown:
+        raise ValueError(f"Columns not in {entity} schema {version}: {sorted(unknown)}")
+    # Keep registry order so the pruned schema is stable across callers
+    return StructType([field for field in schema.fields if field.name in wanted])
+
+def sample_json_schema(spark, path, sample_size=1000):
+    """Infer a schema from the first `sample_size` lines of a JSON-lines file."""
+    lines = spark.read.text(path).limit(sample_size)
+    return spark.read.json(lines.rdd.map(lambda row: row.value)).schema
+
+def _types_compatible(expected, observed):
+    if expected == observed:
+        return True
+    # JSON inference reports whole numbers as longs even for double columns
+    if isinstance(expected, NumericType) and isinstance(observed, NumericType):
+        return isinstance(expected, DoubleType) or not isinstance(observed, DoubleType)
+    # Free-form objects are registered as string maps but inferred as structs
+    if isinstance(expected, MapType) and isinstance(observed, StructType):
+        return all(isinstance(field.dataType, (StringType, StructType)) for field in observed.fields)
+    return False
+
+def detect_schema_drift(expected, observed):
+    """Compare an observed schema against the registry.
+
+    Returns a dict with `added` and `missing` column names and `type_changed`
+    mapping column name to (expected, observed) type strings. Columns missing
+    from a sample may simply be absent from the sampled rows.
+    """
+    expected_fields = {field.name: field.dataType for field in expected.fields}
+    observed_fields = {field.name: field.dataType for field in observed.fields}
+
+    return {
+        "added": sorted(set(observed_fields) - set(expected_fields)),
+        "missing": sorted(set(expected_fields) - set(observed_fields)),
+        "type_changed": {
+            name: (expected_fields[name].simpleString(), observed_fields[name].simpleString())
+            for name in sorted(set(expected_fields) & set(observed_fields))
+            if not _types_compatible(expected_fields[name], observed_fields[name])
+        }
+    }
+
+def has_drift(report):
+    """Return True if a drift report contains any difference."""
+    return bool(report["added"] or report["missing"] or report["type_changed"])
@@ -0,0 +1,123 @@
+"""
+Review sentiment scoring.
+
+Scores review text with a rule-based lexicon model, as the BRD specifies, or
+with a pickled scikit-learn text classifier:
+- text is scored in Arrow batches by a pandas UDF, one vectorized call per
+  batch; `spark.sql.execution.arrow.maxRecordsPerBatch` sets the batch size
+- the model is loaded once per Python worker process and reused across
+  batches and tasks (worker reuse is on by default)
+- scores lie in [-1, 1] and are labelled positive, negative or neutral
+
+Sentiment is aggregated as sums and counts, like the other gold measures.
+"""
+
+import math
+import pickle
+import numpy as np
+import pandas as pd
+from pyspark.sql.functions import col, count, pandas_udf, when
+from pyspark.sql.functions import sum as spark_sum
+from pyspark.sql.types import DoubleType
+
+# Word -> weight; a weighted sum of the words found scores a review
+LEXICON = {
+    "amazing": 2, "awesome": 2, "best": 2, "delicious": 2, "excellent": 2, "fantastic": 2, "love": 2,
+    "perfect": 2, "wonderful": 2, "outstanding": 2, "great": 1.5, "tasty": 1.5, "friendly": 1.5,
+    "recommend": 1.5, "good": 1, "nice": 1, "fresh": 1, "helpful": 1, "clean": 1, "enjoyed": 1, "happy": 1,
+    "awful": -2, "horrible": -2, "terrible": -2, "worst": -2, "disgusting": -2, "rude": -2,
+    "bad": -1.5, "disappointing": -1.5, "dirty": -1.5, "overpriced": -1.5, "bland": -1, "cold": -1,
+    "mediocre": -1, "slow": -1, "wrong": -1, "never": -1, "poor": -1.5, "stale": -1, "unfriendly": -1.5
+}
+
+# Scores at or beyond these are labelled positive or negative
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Normalizes a lexicon sum x into [-1, 1] as x / sqrt(x^2 + alpha)
+NORMALIZATION_ALPHA = 15
+
+# Sentiment measures added to the review aggregates
+SENTIMENT_COLUMNS = ["sentiment_sum", "sentiment_count", "positive_count", "negative_count", "neutral_count"]
+
+_MODELS = {}
+
+class LexiconModel:
+    """Rule-based sentiment: normalized sum of lexicon weights over a review's words."""
+
+    def __init__(self, lexicon=None):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        lexicon = lexicon or LEXICON
+        words = sorted(lexicon)
+        self.vectorizer = CountVectorizer(vocabulary=words, lowercase=True, token_pattern=r"(?u)\b\w+\b")
+        self.weights = np.array([lexicon[word] for word in words], dtype=float)
+
+    def score(self, texts):
+        totals = self.vectorizer.transform(texts) @ self.weights
+        return totals / np.sqrt(totals * totals + NORMALIZATION_ALPHA)
+
+class ClassifierModel:
+    """Sentiment from a binary scikit-learn text classifier (negative, positive classes)."""
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+
+    def score(self, texts):
+        return 2 * self.classifier.predict_proba(list(texts))[:, -1] - 1
+
+def load_model(model_path=None):
+    """Return the sentiment model, loading it once per process.
+
+    `model_path` is a local pickle of a scikit-learn text classifier (e.g.
+    shipped to executors with `--files`); without it, the lexicon model is used.
+    """
+    if model_path not in _MODELS:
+        if model_path is None:
+            _MODELS[model_path] = LexiconModel()
+        else:
+            with open(model_path, "rb") as model_file:
+                _MODELS[model_path] = ClassifierModel(pickle.load(model_file))
+    return _MODELS[model_path]
+
+def sentiment_udf(model_path=None):
+    """Return a pandas UDF scoring a text column in [-1, 1]; null text scores null."""
+    @pandas_udf(DoubleType())
+    def score(texts: pd.Series) -> pd.Series:
+        present = texts.notna()
+        scores = pd.Series(np.nan, index=texts.index)
+        if present.any():
+            scores[present] = load_model(model_path).score(texts[present])
+        return scores
+
+    return score
+
+def sentiment_label(score_column):
+    """Label a score column positive, negative or neutral (null stays null)."""
+    return when(score_column >= POSITIVE_THRESHOLD, "positive") \
+        .when(score_column <= NEGATIVE_THRESHOLD, "negative") \
+        .when(score_column.isNotNull(), "neutral")
+
+def add_sentiment(review_df, text_column="text", model_path=None):
+    """Add `sentiment_score` and `sentiment` columns scored from the review text."""
+    return review_df \
+        .withColumn("sentiment_score", sentiment_udf(model_path)(col(text_column))) \
+        .withColumn("sentiment", sentiment_label(col("sentiment_score")))
+
+def set_batch_size(spark, records):
+    """Set how many records each Arrow batch handed to the UDF holds."""
+    spark.conf.set("spark.sql.execution.arrow.maxRecordsPerBatch", str(records))
+
+def sentiment_aggregates():
+    """Aggregate columns summarizing `sentiment_score` and `sentiment` as sums and counts."""
+    return [
+        spark_sum("sentiment_score").alias("sentiment_sum"),
+        count("sentiment_score").alias("sentiment_count"),
+        count(when(col("sentiment") == "positive", 1)).alias("positive_count"),
+        count(when(col("sentiment") == "negative", 1)).alias("negative_count"),
+        count(when(col("sentiment") == "neutral", 1)).alias("neutral_count")
+    ]
+
+def reviews_per_second_per_core(reviews, task_time_ms):
+    """Throughput over the summed task time of all cores."""
+    return round(reviews / (task_time_ms / 1000), 1) if task_time_ms else math.nan
@@ -0,0 +1,68 @@
+"""
+Skew-aware joins.
+
+A handful of power users and very popular businesses own a large share of
+the reviews, so a plain sort-merge join leaves a few tasks holding most of the
+rows. This module finds those hot keys from a sample and joins them
+separately by broadcasting the matching rows of the other side:
+- detect_hot_keys: per-key skew statistics estimated from a sample
+- skew_join: hot keys via broadcast join, the rest via a regular join
+"""
+
+import logging
+from pyspark.sql.functions import broadcast, col, count, lit
+
+logger = logging.getLogger(__name__)
+
+def detect_hot_keys(df, key, sample_fraction=0.01, min_share=0.001, max_keys=1000, seed=42):
+    """Estimate the keys of `df` that hold at least `min_share` of its rows.
+
+    Returns a list of dicts sorted by estimated size with `key`,
+    `sampled_rows`, `estimated_rows` and `share` entries.
+    """
+    sample = df.select(key).where(col(key).isNotNull()).sample(fraction=sample_fraction, seed=seed)
+    # One row per sampled key, so the total comes from the same job as the counts
+    counts = sample.groupBy(key).agg(count(lit(1)).alias("sampled_rows")).collect()
+    sampled_total = sum(row["sampled_rows"] for row in counts)
+    if sampled_total == 0:
+        return []
+
+    threshold = max(1, int(sampled_total * min_share))
+    hot = sorted((row for row in counts if row["sampled_rows"] >= threshold),
+                 key=lambda row: row["sampled_rows"], reverse=True)[:max_keys]
+
+    return [{
+        "key": row[key],
+        "sampled_rows": row["sampled_rows"],
+        "estimated_rows": int(row["sampled_rows"] / sample_fraction),
+        "share": row["sampled_rows"] / sampled_total
+    } for row in hot]
+
+def log_skew_stats(name, stats):
+    """Log the per-key skew statistics returned by detect_hot_keys."""
+    if not stats:
+        logger.info("No hot keys found for %s", name)
+        return
+    logger.info("%d hot keys for %s covering %.1f%% of sampled rows",
+                len(stats), name, 100 * sum(stat["share"] for stat in stats))
+    for stat in stats[:20]:
+        logger.info("  %s: ~%d rows (%.2f%%)", stat["key"], stat["estimated_rows"], 100 * stat["share"])
+
+def skew_join(left, right, key, hot_keys, how="inner"):
+    """Join `left` to `right` on `key`, broadcasting `right`'s rows for hot keys.
+
+    Rows of `left` whose key is hot are joined against a broadcast of the
+    matching (few) rows of `right`, so no single task receives them all; the
+    remaining rows go through a regular shuffle join. Supports inner and left
+    joins, where the result equals `left.join(right, key, how)`; the two
+    halves are unioned by name, so the joined columns must be unique.
+    """
+    if how not in ("inner", "left"):
+        raise ValueError(f"Unsupported join type for skew_join: {how}")
+    if not hot_keys:
+        return left.join(right, key, how)
+
+    is_hot = col(key).isin(list(hot_keys))
+    hot_join = left.where(is_hot).join(broadcast(right.where(is_hot)), key, how)
+    cold_join = left.where(~is_hot | col(key).isNull()).join(right.where(~is_hot), key, how)
+    return cold_join.unionByName(hot_join)
@@ -0,0 +1,155 @@
+"""
+Fingerprint-keyed stage materialization.
+
+Each medallion stage's output is written under a key derived from what it
+was computed from, so a rerun (e.g. after a failed BigQuery write) resumes
+where the last run stopped instead of starting over:
+- source files are fingerprinted by path, size and modification time from
+  a listing, without reading them
+- a stage key hashes its inputs' fingerprints (or its upstream stages'
+  keys), its configuration and the pipeline code version
+- a stage whose key has a completion marker is read back instead of
+  recomputed; the first stage with a new key, and so every stage after it,
+  is recomputed
+- gold writes are tracked per table, so only tables whose write failed are
+  written again
+
+Layout: `<root>/<stage>/<key>/<table>` Parquet directories, plus a `_STAGE`
+marker written once all of them are complete.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+from datetime import datetime, timezone
+from src.spark.hadoop_fs import delete_path, list_directories, list_files, path_exists, read_text, write_text
+
+logger = logging.getLogger(__name__)
+
+# Modules whose code determines the stage outputs; changing any of them changes every key
+PIPELINE_MODULES = [
+    "src.geohash", "src.sketches", "src.spark.schemas", "src.spark.yelp_analytics", "src.spark.gold",
+    "src.spark.geo", "src.spark.approx", "src.spark.sentiment", "src.spark.incremental", "src.spark.skew",
+    "src.spark.leaderboards", "src.spark.sinks", "src.spark.bronze_cache", "src.spark.quality", "src.spark.profiles"
+]
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def code_version(modules=PIPELINE_MODULES):
+    """Hash of the pipeline's source code."""
+    return _digest({name: inspect.getsource(importlib.import_module(name)) for name in modules})
+
+def path_fingerprint(spark, path):
+    """Fingerprint a file or directory by the paths, sizes and modification times of its files."""
+    return _digest(list_files(spark, path))
+
+def stage_key(**parts):
+    """Key of a stage output: a hash of everything it was computed from."""
+    return _digest(parts)
+
+class StageStore:
+    """Materialized stage outputs under `root`, reused while their key is unchanged.
+
+    With `force`, every stage is recomputed (and its materialization
+    replaced) regardless of existing markers.
+    """
+
+    def __init__(self, spark, root, force=False):
+        self.spark = spark
+        self.root = root.rstrip("/")
+        self.force = force
+        self.code_version = code_version()
+
+    def key(self, stage, **parts):
+        """Key of `stage` for the given inputs and configuration, under the current code version."""
+        return stage_key(stage=stage, code_version=self.code_version, **parts)
+
+    def stage_path(self, stage, key):
+        return f"{self.root}/{stage}/{key}"
+
+    def _marker(self, stage, key):
+        return f"{self.stage_path(stage, key)}/_STAGE"
+
+    def is_complete(self, stage, key):
+        """Whether `stage` was materialized under `key`."""
+        return path_exists(self.spark, self._marker(stage, key))
+
+    def _read(self, stage, key, names):
+        return {name: self.spark.read.parquet(f"{self.stage_path(stage, key)}/{name}") for name in names}
+
+    def run(self, stage, key, build):
+        """Return the stage's tables (name -> DataFrame), building them only if not materialized under `key`.
+
+        `build()` returns name -> DataFrame; it may also write outputs of its
+        own and return nothing. The tables are written under the key and read
+        back, so later stages start from the materialized copy instead of
+        recomputing its lineage. Other keys of the stage are deleted once
+        the new one is complete.
+        """
+        marker = None if self.force else read_text(self.spark, self._marker(stage, key))
+        if marker is not None:
+            info = json.loads(marker)
+            logger.info("Reusing %s stage %s from %s", stage, key, info["completed_at"])
+            return self._read(stage, key, info["tables"])
+
+        path = self.stage_path(stage, key)
+        # Drop whatever a failed attempt left behind
+        delete_path(self.spark, path)
+        tables = build() or {}
+        for name, df in tables.items():
+            df.write.mode("overwrite").parquet(f"{path}/{name}")
+        write_text(self.spark, self._marker(stage, key), json.dumps({
+            "stage": stage,
+            "key": key,
+            "tables": sorted(tables),
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        }))
+        logger.info("Materialized %s stage %s", stage, key)
+
+        for directory in list_directories(self.spark, f"{self.root}/{stage}"):
+            if directory.rstrip("/").rsplit("/", 1)[-1] != key:
+                delete_path(self.spark, directory)
+        return self._read(stage, key, sorted(tables))
+
+    def _written_marker(self, key, table_name):
+        return f"{self.stage_path('write', key)}/{table_name}/_WRITTEN"
+
+    def pending(self, key, tables):
+        """Keep the tables (name -> DataFrame) not yet written under write key `key`."""
+        if self.force:
+            return dict(tables)
+        done = [name for name in tables if path_exists(self.spark, self._written_marker(key, name))]
+        if done:
+            logger.info("Skipping gold tables already written: %s", ", ".join(sorted(done)))
+        return {name: df for name, df in tables.items() if name not in done}
+
+    def tracked(self, sink, key):
+        """Wrap `sink` so each successful table write is recorded under write key `key`."""
+        return TrackedSink(sink, lambda table_name: write_text(
+            self.spark, self._written_marker(key, table_name), datetime.now(timezone.utc).isoformat()))
+
+class TrackedSink:
+    """A sink that reports each table it wrote successfully."""
+
+    def __init__(self, sink, on_written):
+        self.sink = sink
+        self.name = sink.name
+        self.on_written = on_written
+
+    def write(self, table_name, df):
+        self.sink.write(table_name, df)
+        self.on_written(table_name)
+
+def sink_fingerprint(sink):
+    """Describe where a sink writes, for the write stage key."""
+    return {"sink": sink.name, **{name: value for name, value in vars(sink).items() if not name.startswith("_")}}
+
+def materialize(store, stage, build, **parts):
+    """Run `build` as stage `stage` through `store` (None: just build). Returns (tables, key)."""
+    if store is None:
+        return build(), None
+    key = store.key(stage, **parts)
+    return store.run(stage, key, build), key
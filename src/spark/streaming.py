@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Structured Streaming ingestion of reviews.
+
+Keeps `review_trends`-style aggregates fresh between batch runs:
+- review JSON files landing in a directory are the stream source (locally,
+  and as the landing zone a Pub/Sub subscriber can write to)
+- reviews get the same cleaning as the silver layer and are joined to the
+  static business dimension
+- per-window review counts and star sums are maintained under an event-time
+  watermark; the query checkpoints its state so it resumes after a restart
+- each micro-batch appends its updated windows to a Parquet table, and
+  records how long after their files landed the results were written
+"""
+
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+from pyspark.sql import SparkSession, Window
+from pyspark.sql.functions import broadcast, col, count, lit, row_number, to_timestamp, window
+from pyspark.sql.functions import max as spark_max, sum as spark_sum
+from src.spark.gold import ratio
+from src.spark.schemas import BRONZE_FILES, SCHEMA_VERSION, get_bronze_schema
+from src.spark.yelp_analytics import SILVER_COLUMNS, clean_business, clean_reviews
+
+logger = logging.getLogger(__name__)
+
+def review_stream(spark, source_dir, schema_version=SCHEMA_VERSION, max_files_per_trigger=None):
+    """Stream review JSON files from `source_dir`, tagged with when each file arrived."""
+    reader = spark.readStream.schema(get_bronze_schema("review", SILVER_COLUMNS["review"], schema_version))
+    if max_files_per_trigger:
+        reader = reader.option("maxFilesPerTrigger", max_files_per_trigger)
+    return reader.json(source_dir).withColumn("arrived_at", col("_metadata.file_modification_time"))
+
+def streaming_review_trends(reviews, business_df, window_duration="1 day", watermark_delay="2 days"):
+    """Windowed review counts and ratings over a review stream.
+
+    Reviews are cleaned like the silver layer and inner-joined to the
+    business dimension. Windows whose end falls behind the watermark
+    (the latest review date seen minus `watermark_delay`) are finalized, and
+    reviews arriving for them later are dropped. Sums and counts are kept
+    next to the average so windows can be rolled up further.
+    """
+    businesses = clean_business(business_df).select("business_id")
+    events = clean_reviews(reviews, "arrived_at") \
+        .join(broadcast(businesses), "business_id") \
+        .withColumn("event_time", to_timestamp(col("date"))) \
+        .withWatermark("event_time", watermark_delay)
+
+    return events.groupBy(window(col("event_time"), window_duration)).agg(
+        count("*").alias("total_reviews"),
+        spark_sum("review_stars").alias("star_sum"),
+        count("review_stars").alias("star_count"),
+        spark_max("arrived_at").alias("last_arrival")
+    ).select(
+        col("window.start").alias("window_start"),
+        col("window.end").alias("window_end"),
+        col("total_reviews"),
+        ratio(col("star_sum"), col("star_count")).alias("avg_rating"),
+        col("star_sum"),
+        col("star_count"),
+        col("last_arrival")
+    )
+
+class WindowUpdateWriter:
+    """foreachBatch handler appending each micro-batch's updated windows to Parquet.
+
+    Every row carries its `batch_id`; `latest_windows` reads back the newest
+    version of each window. The end-to-end latency of a batch is the time
+    from the newest file it includes landing to its results being written.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.latencies_s = []
+
+    def __call__(self, batch_df, batch_id):
+        updates = batch_df.withColumn("batch_id", lit(batch_id)).persist()
+        try:
+            updates.write.mode("append").parquet(self.output_path)
+            last_arrival = updates.agg(spark_max("last_arrival")).first()[0]
+        finally:
+            updates.unpersist()
+        if last_arrival is not None:
+            latency = (datetime.now() - last_arrival).total_seconds()
+            self.latencies_s.append(latency)
+            logger.info("Batch %d written %.1fs after its newest file landed", batch_id, latency)
+
+def latest_windows(spark, output_path):
+    """Return the newest version of every window written by a WindowUpdateWriter."""
+    newest_first = Window.partitionBy("window_start").orderBy(col("batch_id").desc())
+    return spark.read.parquet(output_path) \
+        .withColumn("version", row_number().over(newest_first)) \
+        .filter(col("version") == 1) \
+        .drop("version")
+
+def start_review_trends(spark, source_dir, business_df, output_path, checkpoint_path, window_duration="1 day",
+                        watermark_delay="2 days", trigger_interval=None, max_files_per_trigger=None):
+    """Start the streaming review trends query.
+
+    Without `trigger_interval`, every file available now is processed and
+    the query then stops. Returns the query and its writer.
+    """
+    trends = streaming_review_trends(review_stream(spark, source_dir, max_files_per_trigger=max_files_per_trigger),
+                                     business_df, window_duration, watermark_delay)
+    writer = WindowUpdateWriter(output_path)
+    stream = trends.writeStream \
+        .queryName("review_trends") \
+        .outputMode("update") \
+        .foreachBatch(writer) \
+        .option("checkpointLocation", checkpoint_path)
+    if trigger_interval:
+        stream = stream.trigger(processingTime=trigger_interval)
+    else:
+        stream = stream.trigger(availableNow=True)
+    return stream.start(), writer
+
+def summarize_progress(query, writer=None):
+    """Summarize throughput and latency from a query's recent progress reports."""
+    batches = [progress for progress in query.recentProgress if progress["numInputRows"] > 0]
+    summary = {
+        "batches": len(batches),
+        "input_rows": sum(progress["numInputRows"] for progress in batches),
+        "processed_rows_per_s": 0.0,
+        "trigger_ms_avg": 0.0,
+        "trigger_ms_max": 0,
+        "watermark": query.recentProgress[-1]["eventTime"].get("watermark") if query.recentProgress else None
+    }
+    if batches:
+        trigger_ms = [progress["durationMs"]["triggerExecution"] for progress in batches]
+        summary["processed_rows_per_s"] = round(summary["input_rows"] / (sum(trigger_ms) / 1000), 1)
+        summary["trigger_ms_avg"] = round(sum(trigger_ms) / len(trigger_ms), 1)
+        summary["trigger_ms_max"] = max(trigger_ms)
+    if writer and writer.latencies_s:
+        latencies = sorted(writer.latencies_s)
+        summary["latency_s_p50"] = round(latencies[len(latencies) // 2], 3)
+        summary["latency_s_max"] = round(latencies[-1], 3)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream new Yelp reviews into windowed review trends")
+    parser.add_argument("--source-dir", required=True, help="Directory new review JSON files land in")
+    parser.add_argument("--input-bucket", required=True, help="Bronze input holding the business file")
+    parser.add_argument("--output-path", required=True, help="Parquet table the window updates are appended to")
+    parser.add_argument("--checkpoint-path", required=True, help="Checkpoint location of the streaming query")
+    parser.add_argument("--window", default="1 day", help="Aggregation window duration")
+    parser.add_argument("--watermark-delay", default="2 days", help="How late a review may arrive and still count")
+    parser.add_argument("--trigger-interval", default="1 minute",
+                        help="Micro-batch interval; ignored with --available-now")
+    parser.add_argument("--available-now", action="store_true", help="Process the files available now, then stop")
+    parser.add_argument("--max-files-per-trigger", type=int, help="Cap on new files per micro-batch")
+    parser.add_argument("--state-partitions", type=int, default=16,
+                        help="Shuffle partitions of the windowed state; fixed once the checkpoint exists")
+    parser.add_argument("--run-seconds", type=int, help="Stop after this many seconds (default: run until stopped)")
+    parser.add_argument("--metrics-output", help="Local path for the JSON throughput and latency summary")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    spark = (SparkSession.builder
+             .appName("Yelp Analytics Streaming")
+             .config("spark.sql.shuffle.partitions", args.state_partitions)
+             .getOrCreate())
+    try:
+        business_df = spark.read.schema(get_bronze_schema("business", SILVER_COLUMNS["business"])) \
+            .json(f"{args.input_bucket}/{BRONZE_FILES['business']}")
+        query, writer = start_review_trends(
+            spark, args.source_dir, business_df, args.output_path, args.checkpoint_path, args.window,
+            args.watermark_delay, None if args.available_now else args.trigger_interval,
+            args.max_files_per_trigger)
+        started = time.monotonic()
+        query.awaitTermination(args.run_seconds)
+        if query.isActive:
+            query.stop()
+        summary = summarize_progress(query, writer)
+        summary["wall_time_s"] = round(time.monotonic() - started, 3)
+        logger.info("Streaming summary: %s", summary)
+        if args.metrics_output:
+            with open(args.metrics_output, "w") as out:
+                json.dump(summary, out, indent=2)
+    finally:
+        spark.stop()
+
+if __name__ == "__main__":
+    main()
@@ -9,24 +9,45 @@ This script validates the entire pipeline execution on Dataproc, including:
 """
 
 import os
+import shutil
 import subprocess
+import tempfile
 import time
 from google.cloud import bigquery
 
-def run_dataproc_job(project_id, region, cluster_name, input_bucket, output_bucket):
-    """Submit and monitor a Dataproc job."""
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def package_sources():
+    """Zip the `src` package so the job's `src.spark.*` imports resolve on the cluster."""
+    archive_base = os.path.join(tempfile.mkdtemp(prefix="yelp-analytics-"), "src")
+    return shutil.make_archive(archive_base, "zip", root_dir=PROJECT_ROOT, base_dir="src")
+
+def run_dataproc_job(project_id, region, cluster_name, input_bucket, output_bucket, attempts=2):
+    """Submit and monitor a Dataproc job, resubmitting it if it fails.
+
+    Stage outputs are materialized under `<output_bucket>/stages`, so a
+    resubmitted job resumes at the stage that failed.
+    """
     job_command = [
         "gcloud", "dataproc", "jobs", "submit", "pyspark",
         "src/spark/yelp_analytics.py",
         f"--cluster={cluster_name}",
         f"--region={region}",
+        f"--py-files={package_sources()}",
         "--",
         f"--input-bucket={input_bucket}",
-        f"--output-bucket={output_bucket}"
+        f"--output-bucket={output_bucket}",
+        f"--stage-path={output_bucket}/stages"
     ]
 
-    print("Submitting Dataproc job...")
-    subprocess.run(job_command, check=True)
+    for attempt in range(1, attempts + 1):
+        print(f"Submitting Dataproc job (attempt {attempt} of {attempts})...")
+        try:
+            subprocess.run(job_command, check=True)
+            return
+        except subprocess.CalledProcessError:
+            if attempt == attempts:
+                raise
 
 def validate_bigquery_results(project_id, dataset_id):
     """Validate the results in BigQuery."""
@@ -9,30 +9,120 @@ This script processes the Yelp dataset using Apache Spark on Dataproc, following
 """
 
 import argparse
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, count, avg, desc, year, month, regexp_replace, lower, split, explode
-
-def create_spark_session():
-    """Create and configure Spark session."""
-    return (SparkSession.builder
-            .appName("Yelp Analytics Pipeline")
-            .config("spark.jars.packages", "com.google.cloud.spark:spark-bigquery-with-dependencies_2.12:0.32.0")
-            .config("spark.hadoop.fs.gs.temp.dir", "yelp-analytics-poc-data/temp")
-            .config("spark.sql.warehouse.dir", "yelp-analytics-poc-data/warehouse")
-            .config("spark.bigquery.temporaryGcsBucket", "yelp-analytics-poc-data/temp")
-            .getOrCreate())
-
-def read_bronze_data(spark, input_path):
-    """Read raw Yelp data from GCS (Bronze layer)."""
-    business_df = spark.read.json(f"{input_path}/yelp_academic_dataset_business.json")
-    review_df = spark.read.json(f"{input_path}/yelp_academic_dataset_review.json")
-    user_df = spark.read.json(f"{input_path}/yelp_academic_dataset_user.json")
+import logging
+from pyspark import StorageLevel
+from pyspark.sql.functions import col, count, lit, regexp_replace, lower, split, explode, when, year
+from src.sketches import DEFAULT_LG_CONFIG_K, DEFAULT_RATING_BIN_WIDTH, SketchConfig
+from src.spark.bronze_cache import cache_entity_path, cache_schema, ingest_bronze, is_cache_fresh
+from src.spark.geo import geo_sources, with_geohash
+from src.spark.gold import (
+    CATEGORY_TABLES, GEO_TABLES, GOLD_TABLES, SENTIMENT_TABLES, TIMESERIES_TABLES, business_months, category_sources,
+    business_months_from_silver, compute_gold_tables, gold_scan, leaderboard_tables, review_business_days, review_days,
+    review_months, review_periods, sketch_tables
+)
+from src.spark.incremental import (
+    DAY_KEYS, commit_review_state, load_review_state, merge_review_aggregates, reviews_since
+)
+from src.spark.leaderboards import DEFAULT_LEADERBOARD_SIZE, DEFAULT_MIN_REVIEWS, leaderboard_sources
+from src.spark.instrumentation import PipelineMetrics
+from src.spark.quality import DEFAULT_THRESHOLDS, DataQuality, parse_threshold
+from src.spark.profiles import PROFILES, configure_session, get_profile, session_builder
+from src.spark.sentiment import add_sentiment, set_batch_size
+from src.spark.sinks import GOLD_DATASET, TEMP_BUCKET, create_sink, write_gold_tables
+from src.spark.stages import StageStore, materialize, path_fingerprint, sink_fingerprint
+from src.spark.schemas import (
+    BRONZE_FILES, SCHEMA_VERSION, get_bronze_schema, sample_json_schema, detect_schema_drift, has_drift
+)
+from src.spark.skew import detect_hot_keys, log_skew_stats, skew_join
+
+logger = logging.getLogger(__name__)
+
+# Bronze columns consumed by silver_layer; everything else is skipped at parse time
+SILVER_COLUMNS = {
+    "business": ["business_id", "name", "address", "city", "state", "postal_code", "latitude",
+                 "longitude", "stars", "review_count", "is_open", "categories"],
+    "review": ["review_id", "user_id", "business_id", "stars", "date", "useful", "funny", "cool"],
+    "user": ["user_id", "name", "review_count", "yelping_since", "useful", "funny", "cool",
+             "fans", "average_stars"]
+}
+
+# Review columns of the silver text table; only read when a text-consuming stage runs
+TEXT_COLUMNS = ["review_id", "text"]
+
+# Bronze columns needed to build the gold tables without the silver join
+GOLD_COLUMNS = {
+    "business": ["business_id", "name", "city", "state", "latitude", "longitude", "review_count", "is_open",
+                 "categories"],
+    "review": ["user_id", "business_id", "stars", "date"],
+    "user": ["user_id"]
+}
+
+def create_spark_session(with_bigquery=True, profile=PROFILES["dataproc"], temp_bucket=TEMP_BUCKET):
+    """Create and configure Spark session.
+
+    Without `with_bigquery` the BigQuery connector is not fetched, so the
+    pipeline can run without GCP (e.g. with the Parquet sink). Shuffle and
+    broadcast settings are tuned to the input later (see `profiles.configure_session`).
+    """
+    builder = session_builder(profile, "Yelp Analytics Pipeline")
+    if with_bigquery:
+        builder = (builder
+                   .config("spark.jars.packages", "com.google.cloud.spark:spark-bigquery-with-dependencies_2.12:0.32.0")
+                   .config("spark.hadoop.fs.gs.temp.dir", temp_bucket)
+                   .config("spark.sql.warehouse.dir", f"{temp_bucket.split('/', 1)[0]}/warehouse")
+                   .config("spark.bigquery.temporaryGcsBucket", temp_bucket))
+    return builder.getOrCreate()
+
+def check_bronze_drift(spark, input_path, schema_version=SCHEMA_VERSION, sample_size=1000):
+    """Compare a sample of each bronze file against the schema registry."""
+    reports = {}
+    for entity, file_name in BRONZE_FILES.items():
+        observed = sample_json_schema(spark, f"{input_path}/{file_name}", sample_size)
+        reports[entity] = detect_schema_drift(get_bronze_schema(entity, version=schema_version), observed)
+        if has_drift(reports[entity]):
+            logger.warning("Schema drift in bronze %s (registry %s): %s", entity, schema_version, reports[entity])
+    return reports
+
+def read_bronze_data(spark, input_path, required_columns=None, schema_version=SCHEMA_VERSION, check_drift=False,
+                     cache_path=None, since=None):
+    """Read raw Yelp data from GCS (Bronze layer).
+
+    Files are parsed with the registered schema instead of inferring one, and
+    `required_columns` (entity -> column list) limits parsing to those fields.
+    Entities not listed keep their full registered schema. When `cache_path`
+    holds a fresh Parquet copy of an entity (see `bronze_cache`), it is read
+    instead of the JSON. With `since`, only reviews dated after it are read;
+    from the cache, older review years are skipped by partition pruning.
+    """
+    if check_drift:
+        check_bronze_drift(spark, input_path, schema_version)
+
+    required_columns = required_columns or {}
+    frames = []
+    for entity, file_name in BRONZE_FILES.items():
+        schema = get_bronze_schema(entity, required_columns.get(entity), schema_version)
+        incremental = entity == "review" and since is not None
+        if incremental and "date" not in schema.fieldNames():
+            raise ValueError("Reading reviews since a watermark requires the date column")
+        if cache_path and is_cache_fresh(spark, input_path, cache_path, entity, schema_version):
+            logger.info("Reading bronze %s from Parquet cache", entity)
+            df = spark.read.schema(cache_schema(entity, schema_version)) \
+                .parquet(cache_entity_path(cache_path, entity, schema_version))
+            if incremental:
+                df = df.filter(col("review_year") >= year(lit(since)))
+            df = df.select(*schema.fieldNames())
+        else:
+            df = spark.read.schema(schema).json(f"{input_path}/{file_name}")
+        if incremental:
+            df = reviews_since(df, since)
+        frames.append(df)
+
+    business_df, review_df, user_df = frames
     return business_df, review_df, user_df
 
-def silver_layer(business_df, review_df, user_df):
-    """Clean and enrich data (Silver layer)."""
-    # Clean business data
-    business_clean = business_df.select(
+def clean_business(business_df):
+    """Select and rename the business columns used by the silver layer."""
+    return business_df.select(
         col("business_id"),
         col("name"),
         col("address"),
@@ -47,86 +137,368 @@ def silver_layer(business_df, review_df, user_df):
         regexp_replace(lower(col("categories")), "\\|", ",").alias("categories")
     )
 
-    # Clean review data
-    review_clean = review_df.select(
+def clean_reviews(review_df, *passthrough):
+    """Select and rename the review columns used by the silver layer.
+
+    Columns named in `passthrough` are kept as they are.
+    """
+    return review_df.select(
         col("review_id"),
         col("user_id"),
         col("business_id"),
         col("stars").alias("review_stars"),
         col("date"),
-        col("text"),
         col("useful"),
         col("funny"),
-        col("cool")
+        col("cool"),
+        *passthrough
     )
 
-    # Clean user data
-    user_clean = user_df.select(
+def clean_users(user_df):
+    """Select the user columns used by the silver layer, prefixing those that clash with review columns."""
+    return user_df.select(
         col("user_id"),
-        col("name"),
-        col("review_count"),
+        col("name").alias("user_name"),
+        col("review_count").alias("user_review_count"),
         col("yelping_since"),
-        col("useful"),
-        col("funny"),
-        col("cool"),
+        col("useful").alias("user_useful"),
+        col("funny").alias("user_funny"),
+        col("cool").alias("user_cool"),
         col("fans"),
         col("average_stars")
     )
 
+def review_text(review_df):
+    """Silver text table: review text keyed by `review_id`, for text-consuming stages."""
+    return review_df.select(*TEXT_COLUMNS)
+
+def with_text_columns(required_columns):
+    """Add the review text to a set of required bronze columns."""
+    return dict(required_columns, review=list(dict.fromkeys(required_columns["review"] + TEXT_COLUMNS)))
+
+def silver_layer(business_df, review_df, user_df, join_mode="standard", skew_sample_fraction=0.01,
+                 skew_min_share=0.001, sentiment=False, sentiment_model=None, with_text=False, quality=None):
+    """Clean and enrich data (Silver layer).
+
+    The review fact is kept narrow: review text stays out of the joins and
+    lives in its own table (see `review_text`) unless `with_text` is set.
+    With `join_mode="skew"`, hot business and user keys are detected from a
+    sample of the reviews and joined via broadcast (see `skew.skew_join`).
+    With `sentiment`, reviews are scored from their text (see `sentiment`)
+    before it is dropped. Businesses are enriched with their geohash cells
+    (see `geo.with_geohash`). With a DataQuality in `quality`, the inputs are
+    profiled and the reviews dropped by the joins counted in the same pass
+    (see `quality`).
+    """
+    if quality is not None:
+        business_df = quality.profile("business", business_df)
+        review_df = quality.profile("review", review_df)
+        user_df = quality.profile("user", user_df)
+    business_clean = with_geohash(clean_business(business_df))
+    review_clean = clean_reviews(review_df, "text") if sentiment or with_text else clean_reviews(review_df)
+    user_clean = clean_users(user_df)
+    if sentiment:
+        review_clean = add_sentiment(review_clean, model_path=sentiment_model)
+        if not with_text:
+            review_clean = review_clean.drop("text")
+
+    # To count join misses, reviews are left-joined to flagged dimensions and the misses dropped afterwards
+    how = "inner"
+    if quality is not None:
+        how = "left"
+        business_clean = business_clean.withColumn("_business_match", lit(True))
+        user_clean = user_clean.withColumn("_user_match", lit(True))
+
     # Join data
-    silver_df = review_clean.join(business_clean, "business_id").join(user_clean, "user_id")
-    return silver_df
+    if join_mode == "standard":
+        silver_df = review_clean.join(business_clean, "business_id", how).join(user_clean, "user_id", how)
+    elif join_mode == "skew":
+        hot_businesses = detect_hot_keys(review_clean, "business_id", skew_sample_fraction, skew_min_share)
+        hot_users = detect_hot_keys(review_clean, "user_id", skew_sample_fraction, skew_min_share)
+        log_skew_stats("business_id", hot_businesses)
+        log_skew_stats("user_id", hot_users)
+
+        silver_df = skew_join(review_clean, business_clean, "business_id",
+                              [stat["key"] for stat in hot_businesses], how)
+        silver_df = skew_join(silver_df, user_clean, "user_id", [stat["key"] for stat in hot_users], how)
+    else:
+        raise ValueError(f"Unknown silver join mode: {join_mode}")
+
+    if quality is None:
+        return silver_df
+    business_miss, user_miss = col("_business_match").isNull(), col("_user_match").isNull()
+    return quality.observe(
+        "silver", silver_df,
+        count(when(business_miss, 1)).alias("business_misses"),
+        count(when(user_miss, 1)).alias("user_misses")
+    ).where(~business_miss & ~user_miss).drop("_business_match", "_user_match")
+
+def write_silver(silver_df, output_path, text_df=None, mode="overwrite"):
+    """Persist the narrow silver review fact, and the text table when one is given."""
+    silver_df.write.mode(mode).parquet(f"{output_path}/reviews")
+    if text_df is not None:
+        text_df.write.mode(mode).parquet(f"{output_path}/review_text")
 
 def gold_layer(silver_df):
     """Aggregate and prepare analytics-ready data (Gold layer)."""
-    # Aggregate business metrics
-    business_metrics = silver_df.groupBy("state").agg(
-        count("*").alias("total_reviews"),
-        avg("review_stars").alias("avg_rating"),
-        avg("business_review_count").alias("avg_business_reviews")
-    ).orderBy(desc("total_reviews"))
+    tables = compute_gold_tables({"business_months": business_months_from_silver(silver_df)})
+    return tables["business_metrics"], tables["review_trends"]
+
+def gold_sources(review_aggs, business_df, days_df=None):
+    """Build the gold sources from pre-aggregated reviews and the business dimension.
+
+    The category sources are included when the business dimension was read
+    with `categories` and `is_open`, the geo sources when it was read with
+    coordinates, `name` and `city`, and the leaderboard sources when it was
+    read with `name` and `city`. The time-series source is included when the
+    daily review aggregates are given in `days_df`.
+    """
+    sources = {"business_months": business_months(review_aggs, business_df)}
+    if days_df is not None:
+        sources["review_periods"] = review_periods(days_df)
+    if {"categories", "is_open"} <= set(business_df.columns):
+        sources.update(category_sources(sources["business_months"], business_df))
+    if {"name", "city", "latitude", "longitude"} <= set(business_df.columns):
+        sources.update(geo_sources(sources["business_months"], business_df))
+    if {"name", "city"} <= set(business_df.columns):
+        sources.update(leaderboard_sources(sources["business_months"], business_df, sources.get("category_index")))
+    return sources
+
+def gold_sources_from_bronze(business_df, review_df, user_df=None, sketches=None, quality=None):
+    """Build the shared gold sources by aggregating reviews before joining the business dimension.
 
-    # Aggregate review trends
-    review_trends = silver_df.withColumn("year", year("date")).withColumn("month", month("date")).groupBy("year", "month").agg(
-        count("*").alias("total_reviews"),
-        avg("review_stars").alias("avg_rating")
-    ).orderBy("year", "month")
+    With a SketchConfig in `sketches`, the sources carry the approximate-mode
+    sketches (see `gold.sketch_tables`). With a DataQuality in `quality`, the
+    business and review inputs are profiled as the sources are computed.
+    """
+    if quality is not None:
+        business_df = quality.profile("business", business_df)
+        review_df = quality.profile("review", review_df)
+    business_days = review_business_days(review_df, user_df, sketches)
+    # Persisted by `gold_scan` with the other sources, so both rollups read the reviews in one scan
+    return {"review_business_days": business_days,
+            **gold_sources(review_months(business_days), business_df, review_days(business_days, business_df))}
 
-    return business_metrics, review_trends
+def gold_layer_from_bronze(business_df, review_df, user_df=None):
+    """Build the gold tables by aggregating reviews before joining the business dimension.
+
+    Produces the same `business_metrics` and `review_trends` as
+    `gold_layer(silver_layer(...))` while shuffling only per-business monthly
+    aggregates instead of the full review fact.
+    """
+    tables = compute_gold_tables(gold_sources_from_bronze(business_df, review_df, user_df))
+    return tables["business_metrics"], tables["review_trends"]
+
+def incremental_gold_sources(spark, business_df, review_df, state_path, state=None, user_df=None, sketches=None,
+                             quality=None):
+    """Merge reviews newer than `state` into the stored review aggregates and build the gold sources.
+
+    `state` is the ReviewState the reviews were read against (None for a
+    full rebuild). The merged aggregates are committed under `state_path`
+    before the gold sources are built from them, so gold tables match a full
+    rebuild over the same reviews. Returns the sources and the new state.
+    With a DataQuality in `quality`, the new reviews and the business
+    dimension are profiled; the reviews only when there are any.
+    """
+    if state is not None and state.days_path is None:
+        raise ValueError(f"Review state v{state.version} has no daily aggregates for the time series; "
+                         "run once with --full-rebuild")
+    watermark = state.watermark if state else None
+    if quality is not None:
+        business_df = quality.profile("business", business_df)
+        # Spark prunes an empty delta from the plan together with its observation, which would then never report
+        if reviews_since(review_df, watermark).isEmpty():
+            logger.info("No reviews after the watermark; skipping the review profile")
+        else:
+            review_df = quality.profile("review", review_df)
+    # Both the monthly and the daily state are written from the same delta rows, so the reviews are scanned once
+    business_days = review_business_days(reviews_since(review_df, watermark), user_df, sketches) \
+        .persist(StorageLevel.MEMORY_AND_DISK)
+    try:
+        delta, days = review_months(business_days), review_days(business_days, business_df)
+        aggregates = merge_review_aggregates(spark.read.parquet(state.path), delta) if state else delta
+        if state is not None:
+            days = merge_review_aggregates(spark.read.parquet(state.days_path), days, keys=DAY_KEYS)
+        state, aggregates = commit_review_state(spark, state_path, aggregates, days)
+    finally:
+        business_days.unpersist()
+    return gold_sources(aggregates, business_df, spark.read.parquet(state.days_path)), state
 
 def main():
     parser = argparse.ArgumentParser(description="Yelp Analytics Spark Pipeline")
     parser.add_argument("--input-bucket", required=True, help="GCS bucket containing input data")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="dataproc",
+                        help="Spark execution profile; shuffle and broadcast settings are tuned to the input size")
     parser.add_argument("--output-bucket", required=True, help="GCS bucket for output data")
+    parser.add_argument("--schema-version", default=SCHEMA_VERSION, help="Bronze schema registry version")
+    parser.add_argument("--skip-drift-check", action="store_true", help="Do not compare bronze files to the schema registry")
+    parser.add_argument("--skip-quality-checks", action="store_true",
+                        help="Do not profile the bronze and silver data against the data-quality thresholds")
+    parser.add_argument("--quality-threshold", action="append", type=parse_threshold, default=[],
+                        metavar="CHECK=RATE[:warn|fail]",
+                        help="Override a data-quality threshold, e.g. silver.user_misses=0.1:fail (repeatable)")
+    parser.add_argument("--bronze-cache", help="Path for the Parquet copy of the bronze data; refreshed when stale")
+    parser.add_argument("--strict-user-join", action="store_true",
+                        help="Drop reviews whose author is missing from the user file, as the silver join does")
+    parser.add_argument("--metrics-output", help="Local path for the per-run JSON metrics report")
+    parser.add_argument("--sink", choices=["bigquery-direct", "bigquery-indirect", "parquet"],
+                        default="bigquery-indirect", help="Where the gold tables are written")
+    parser.add_argument("--dataset", default=GOLD_DATASET, help="BigQuery dataset for the gold tables")
+    parser.add_argument("--temp-bucket", default=TEMP_BUCKET, help="GCS staging bucket for indirect BigQuery writes")
+    parser.add_argument("--gold-path", help="Output path of the parquet sink (default: <output-bucket>/gold)")
+    parser.add_argument("--write-concurrency", type=int, help="Gold tables written at once (default: all)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process reviews newer than the stored watermark and merge them into the state")
+    parser.add_argument("--state-path", help="Review aggregate state for incremental runs (default: <output-bucket>/state)")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="With --incremental, rebuild the state from the complete review history")
+    parser.add_argument("--silver-output", help="Path to persist the silver review fact to")
+    parser.add_argument("--silver-join-mode", choices=["standard", "skew"], default="standard",
+                        help="How silver joins reviews to businesses and users; `skew` broadcasts hot keys")
+    parser.add_argument("--skew-min-share", type=float, default=0.001,
+                        help="Share of sampled reviews above which a key is joined as hot in skew mode")
+    parser.add_argument("--skew-sample-fraction", type=float, default=0.01,
+                        help="Fraction of reviews sampled to detect hot keys in skew mode")
+    parser.add_argument("--silver-text", action="store_true",
+                        help="With --silver-output, also persist the review text table")
+    parser.add_argument("--sentiment", action="store_true",
+                        help="Score review text for sentiment and write the sentiment_trends table")
+    parser.add_argument("--sentiment-model", help="Pickled scikit-learn text classifier (default: lexicon model)")
+    parser.add_argument("--sentiment-batch-size", type=int, default=10000, help="Reviews per Arrow batch when scoring")
+    parser.add_argument("--approx", action="store_true",
+                        help="Store mergeable sketches and write the review_distribution table")
+    parser.add_argument("--hll-lg-k", type=int, default=DEFAULT_LG_CONFIG_K,
+                        help="log2 of the HLL register count (4-21); error is about 1.04 / sqrt(2^k)")
+    parser.add_argument("--rating-bin-width", type=float, default=DEFAULT_RATING_BIN_WIDTH,
+                        help="Rating histogram bin width; percentiles are off by less than one bin")
+    parser.add_argument("--leaderboard-size", type=int, default=DEFAULT_LEADERBOARD_SIZE,
+                        help="Businesses kept per city (or category) and month in the leaderboards")
+    parser.add_argument("--leaderboard-min-reviews", type=int, default=DEFAULT_MIN_REVIEWS,
+                        help="Reviews a business needs in a month to be ranked")
+    parser.add_argument("--stage-path", help="Where stage outputs are materialized; reruns resume from them")
+    parser.add_argument("--force-recompute", action="store_true",
+                        help="With --stage-path, recompute every stage even if its inputs are unchanged")
     args = parser.parse_args()
 
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
     # Initialize Spark
-    spark = create_spark_session()
+    profile = get_profile(args.profile)
+    spark = create_spark_session(with_bigquery=args.sink != "parquet", profile=profile, temp_bucket=args.temp_bucket)
+    configure_session(spark, profile, args.input_bucket)
+    metrics = PipelineMetrics(spark)
+    sink = create_sink(args.sink, args.dataset, args.temp_bucket, args.gold_path or f"{args.output_bucket}/gold")
+
+    # Silver needs more bronze columns than gold; text is only read for the stages that consume it
+    required_columns = SILVER_COLUMNS if args.silver_output else GOLD_COLUMNS
+    if args.sentiment or (args.silver_output and args.silver_text):
+        required_columns = with_text_columns(required_columns)
+    tables = GOLD_TABLES + CATEGORY_TABLES + GEO_TABLES + TIMESERIES_TABLES + leaderboard_tables(args.leaderboard_size,
+                                                                             args.leaderboard_min_reviews)
+    if args.sentiment:
+        set_batch_size(spark, args.sentiment_batch_size)
+        tables = tables + SENTIMENT_TABLES
+    sketches = SketchConfig(args.hll_lg_k, args.rating_bin_width) if args.approx else None
+    if sketches:
+        tables = tables + sketch_tables(sketches)
+
+    state_path = args.state_path or f"{args.output_bucket}/state"
+    state = None
+    if args.incremental and not args.full_rebuild:
+        state = load_review_state(spark, state_path)
+        logger.info("Incremental run from watermark %s", state.watermark if state else None)
+
+    # Data-quality metrics are observed by the actions that compute each stage
+    quality = None if args.skip_quality_checks else DataQuality({**DEFAULT_THRESHOLDS, **dict(args.quality_threshold)})
+
+    # With a stage store, each stage is keyed by its inputs and reused by reruns until they change
+    store = StageStore(spark, args.stage_path, force=args.force_recompute) if args.stage_path else None
+
+    def build_bronze():
+        if args.bronze_cache:
+            ingest_bronze(spark, args.input_bucket, args.bronze_cache, schema_version=args.schema_version)
+        return dict(zip(BRONZE_FILES, read_bronze_data(
+            spark, args.input_bucket,
+            required_columns=required_columns,
+            schema_version=args.schema_version,
+            check_drift=not args.skip_drift_check,
+            cache_path=args.bronze_cache,
+            since=state.watermark if state else None
+        )))
+
+    def build_gold():
+        # Reviews are aggregated before the (small) business join, and users are only
+        # consulted when a strict join is requested
+        nonlocal state
+        users = bronze["user"] if args.strict_user_join else None
+        review_df = bronze["review"]
+        if args.sentiment:
+            review_df = add_sentiment(review_df, model_path=args.sentiment_model)
+        if args.incremental:
+            sources, state = incremental_gold_sources(spark, bronze["business"], review_df, state_path, state, users,
+                                                      sketches, quality)
+            return sources
+        return gold_sources_from_bronze(bronze["business"], review_df, users, sketches, quality)
 
     try:
-        # Read bronze data
-        business_df, review_df, user_df = read_bronze_data(spark, args.input_bucket)
-
-        # Process silver layer
-        silver_df = silver_layer(business_df, review_df, user_df)
-
-        # Process gold layer
-        business_metrics, review_trends = gold_layer(silver_df)
-
-        # Write results to BigQuery
-        business_metrics.write.format("bigquery") \
-            .option("table", "yelp_analytics.business_metrics") \
-            .option("temporaryGcsBucket", "yelp-analytics-poc-data/temp") \
-            .mode("overwrite") \
-            .save()
-            
-        review_trends.write.format("bigquery") \
-            .option("table", "yelp_analytics.review_trends") \
-            .option("temporaryGcsBucket", "yelp-analytics-poc-data/temp") \
-            .mode("overwrite") \
-            .save()
+        # Refresh the columnar bronze cache, then read bronze data
+        with metrics.stage("bronze"):
+            bronze, bronze_key = materialize(
+                store, "bronze", build_bronze,
+                inputs={entity: path_fingerprint(spark, f"{args.input_bucket}/{file_name}") if store else None
+                        for entity, file_name in BRONZE_FILES.items()},
+                columns=required_columns, schema_version=args.schema_version,
+                since=state.watermark if state else None)
+
+        # Persist silver as a narrow review fact plus, on request, the review text table
+        if args.silver_output:
+            with metrics.stage("silver"):
+                materialize(store, "silver", lambda: write_silver(
+                    silver_layer(bronze["business"], bronze["review"], bronze["user"],
+                                 join_mode=args.silver_join_mode, skew_sample_fraction=args.skew_sample_fraction,
+                                 skew_min_share=args.skew_min_share, quality=quality),
+                    args.silver_output,
+                    review_text(bronze["review"]) if args.silver_text else None,
+                    mode="append" if state else "overwrite"
+                ), bronze=bronze_key, output=args.silver_output, text=args.silver_text)
+                if quality is not None:
+                    quality.check()
+
+        # Process gold layer: the shared gold sources every table is rolled up from
+        with metrics.stage("gold"):
+            sources, gold_key = materialize(
+                store, "gold", build_gold, bronze=bronze_key, strict_user_join=args.strict_user_join,
+                sentiment=args.sentiment and (args.sentiment_model or "lexicon"),
+                sentiment_model=path_fingerprint(spark, args.sentiment_model) if store and args.sentiment_model
+                else None,
+                sketches=sketches, incremental=args.incremental and (state_path, state.version if state else None))
+
+        # Write the gold tables and the lookup indexes concurrently; every table reads a persisted gold source.
+        # Tables a previous run already wrote from the same gold sources are skipped
+        with gold_scan(sources, tables, exports=["category_index", "business_geo_index"]) as gold_tables:
+            if store:
+                write_key = store.key("write", gold=gold_key, sink=sink_fingerprint(sink),
+                                      tables=sorted(gold_tables),
+                                      leaderboards=[args.leaderboard_size, args.leaderboard_min_reviews])
+                gold_tables, sink = store.pending(write_key, gold_tables), store.tracked(sink, write_key)
+            first = next((table.name for table in tables
+                          if table.source == "business_months" and table.name in gold_tables), None)
+            if quality is not None and quality.pending and first is not None:
+                # The first business_months table computes the persisted sources, and the observations in
+                # their lineage; check them before the other tables are written
+                write_gold_tables({first: gold_tables[first]}, sink, metrics)
+                quality.check()
+                gold_tables = {name: df for name, df in gold_tables.items() if name != first}
+            write_gold_tables(gold_tables, sink, metrics, args.write_concurrency)
 
     finally:
+        # The report is read from the Spark UI, so collect it before stopping
+        report = metrics.report()
+        if quality is not None:
+            report["data_quality"] = quality.results
+        metrics.log_report(report)
+        if args.metrics_output:
+            metrics.write_report(args.metrics_output, report)
         spark.stop()
 
 if __name__ == "__main__":
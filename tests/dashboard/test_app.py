@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests rendering the dashboard app end to end against exported gold tables.
+"""
+
+from pathlib import Path
+import pandas as pd
+import pytest
+from src.geohash import INDEX_PRECISION, encode
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+@pytest.fixture
+def gold_dir(tmp_path):
+    """Gold tables of a default run: every table but the `--approx` review distribution."""
+    pd.DataFrame({
+        "state": ["AZ", "NV"],
+        "total_reviews": [300, 200],
+        "avg_rating": [4.1, 3.9],
+        "avg_business_reviews": [10.0, 20.0]
+    }).to_parquet(tmp_path / "business_metrics.parquet", index=False)
+    pd.DataFrame({
+        "year": [2022, 2022],
+        "month": [1, 2],
+        "total_reviews": [3, 4],
+        "avg_rating": [4.0, 3.5]
+    }).to_parquet(tmp_path / "review_trends", partition_cols=["year"], index=False)
+    days = pd.date_range("2022-01-01", "2022-02-28", freq="D")
+    pd.DataFrame({
+        "resolution": ["day"] * len(days),
+        "period_start": days.date,
+        "period_key": [int(day.strftime("%Y%m%d")) for day in days],
+        "total_reviews": [1] * len(days),
+        "star_sum": [4.0] * len(days),
+        "rated_reviews": [1] * len(days),
+        "avg_rating": [4.0] * len(days)
+    }).to_parquet(tmp_path / "review_timeseries", partition_cols=["resolution"], index=False)
+    pd.DataFrame({
+        "category": ["pizza"],
+        "state": ["AZ"],
+        "businesses": [1],
+        "open_businesses": [1],
+        "open_ratio": [1.0],
+        "total_reviews": [30],
+        "rated_reviews": [30],
+        "avg_rating": [4.0]
+    }).to_parquet(tmp_path / "category_metrics.parquet", index=False)
+    pd.DataFrame({
+        "category": ["pizza"],
+        "business_id": ["b1"],
+        "state": ["AZ"],
+        "is_open": [1]
+    }).to_parquet(tmp_path / "category_index.parquet", index=False)
+    pd.DataFrame({
+        "precision": [5],
+        "geohash": [encode(33.45, -112.07, 5)],
+        "center_latitude": [33.45],
+        "center_longitude": [-112.07],
+        "area_km2": [20.0],
+        "businesses": [1],
+        "total_reviews": [30],
+        "rated_reviews": [30],
+        "avg_rating": [4.0],
+        "reviews_per_km2": [1.5]
+    }).to_parquet(tmp_path / "geo_cell_metrics.parquet", index=False)
+    pd.DataFrame({
+        "geohash": [encode(33.45, -112.07, INDEX_PRECISION)],
+        "business_id": ["b1"],
+        "name": ["Cafe"],
+        "city": ["Phoenix"],
+        "state": ["AZ"],
+        "latitude": [33.45],
+        "longitude": [-112.07],
+        "review_count": [30],
+        "avg_rating": [4.0]
+    }).to_parquet(tmp_path / "business_geo_index.parquet", index=False)
+    board = {
+        "state": ["AZ", "AZ"],
+        "city": ["Phoenix", "Phoenix"],
+        "year": [2022, 2022],
+        "month": [2, 2],
+        "ranking": ["reviews", "rating"],
+        "rank": [1, 1],
+        "business_id": ["b1", "b1"],
+        "name": ["Cafe", "Cafe"],
+        "review_count": [20, 20],
+        "avg_rating": [4.0, 4.0]
+    }
+    pd.DataFrame(board).to_parquet(tmp_path / "city_leaderboard.parquet", index=False)
+    pd.DataFrame(dict(board, category=["pizza", "pizza"])).to_parquet(tmp_path / "category_leaderboard.parquet",
+                                                                     index=False)
+    return tmp_path
+
+def test_app_renders_without_optional_tables(gold_dir, tmp_path, monkeypatch):
+    """Test that a default run's gold tables render every section, skipping the review distribution."""
+    testing = pytest.importorskip("streamlit.testing.v1")
+    pytest.importorskip("plotly")
+    import streamlit as st
+
+    monkeypatch.setenv("DASHBOARD_BACKEND", "parquet")
+    monkeypatch.setenv("DASHBOARD_PARQUET_DIR", str(gold_dir))
+    monkeypatch.setenv("DASHBOARD_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    st.cache_resource.clear()
+
+    app = testing.AppTest.from_file(str(PROJECT_ROOT / "src" / "dashboard" / "app.py"), default_timeout=60).run()
+    st.cache_resource.clear()
+
+    assert not app.exception
+    assert any("--approx" in caption.value for caption in app.caption)
+    headers = [header.value for header in app.header]
+    assert headers.index("Reviewers and Rating Distribution") < headers.index("Raw Data")
+
+def test_app_checks_optional_tables_once_per_ttl(gold_dir, tmp_path, monkeypatch):
+    """Test that reruns reuse the optional table check instead of asking the backend again."""
+    testing = pytest.importorskip("streamlit.testing.v1")
+    pytest.importorskip("plotly")
+    import streamlit as st
+    from src.dashboard.backends import ParquetBackend
+
+    checked = []
+    has_table = ParquetBackend.has_table
+    monkeypatch.setattr(ParquetBackend, "has_table", lambda self, name: checked.append(name) or has_table(self, name))
+    monkeypatch.setenv("DASHBOARD_BACKEND", "parquet")
+    monkeypatch.setenv("DASHBOARD_PARQUET_DIR", str(gold_dir))
+    monkeypatch.setenv("DASHBOARD_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    st.cache_resource.clear()
+
+    app = testing.AppTest.from_file(str(PROJECT_ROOT / "src" / "dashboard" / "app.py"), default_timeout=60).run()
+    app.run()
+    st.cache_resource.clear()
+
+    assert not app.exception
+    assert checked == ["review_distribution"]
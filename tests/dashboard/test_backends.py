@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the dashboard backends and the app's import cost.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pandas as pd
+import pytest
+from src.dashboard.backends import BigQueryBackend, ParquetBackend, get_backend
+from src.dashboard.queries import business_metrics_query, review_trends_query, states_query
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+@pytest.fixture
+def gold_dir(tmp_path):
+    """Gold tables exported as Parquet: one single file, one partitioned directory."""
+    pd.DataFrame({
+        "state": ["AZ", "NV", "PA"],
+        "total_reviews": [300, 200, 500],
+        "avg_rating": [4.1, 3.9, 3.7],
+        "avg_business_reviews": [10.0, 20.0, 30.0]
+    }).to_parquet(tmp_path / "business_metrics.parquet", index=False)
+    pd.DataFrame({
+        "year": [2021, 2021, 2022],
+        "month": [11, 12, 1],
+        "total_reviews": [5, 6, 7],
+        "avg_rating": [4.0, 3.5, 3.0]
+    }).to_parquet(tmp_path / "review_trends", partition_cols=["year"], index=False)
+    return tmp_path
+
+def test_parquet_backend_runs_dashboard_queries(gold_dir):
+    """Test that the offline backend answers the same queries as BigQuery."""
+    backend = ParquetBackend(str(gold_dir))
+
+    result = backend.query(business_metrics_query(backend.table("business_metrics"), states=["AZ", "PA"], limit=1))
+    assert result["state"].tolist() == ["PA"]
+    assert backend.query(states_query(backend.table("business_metrics")))["state"].tolist() == ["AZ", "NV", "PA"]
+
+    trends = backend.query(review_trends_query(backend.table("review_trends"), start=(2021, 12)))
+    assert list(zip(trends["year"], trends["month"])) == [(2021, 12), (2022, 1)]
+
+def test_parquet_backend_reloads_changed_tables(gold_dir):
+    """Test that rewritten Parquet files are picked up and versioned by mtime."""
+    backend = ParquetBackend(str(gold_dir))
+    query = states_query(backend.table("business_metrics"))
+    assert len(backend.query(query)) == 3
+    version = backend.last_modified("business_metrics")
+
+    path = gold_dir / "business_metrics.parquet"
+    pd.DataFrame({"state": ["TX"], "total_reviews": [1], "avg_rating": [5.0],
+                  "avg_business_reviews": [1.0]}).to_parquet(path, index=False)
+    os.utime(path, (os.path.getmtime(path) + 10, os.path.getmtime(path) + 10))
+
+    assert backend.last_modified("business_metrics") != version
+    assert backend.query(query)["state"].tolist() == ["TX"]
+    with pytest.raises(FileNotFoundError):
+        backend.last_modified("missing_table")
+    assert backend.has_table("business_metrics") and backend.has_table("review_trends")
+    assert not backend.has_table("missing_table")
+
+def test_get_backend_is_lazy(monkeypatch, tmp_path):
+    """Test that backends are selected from the environment without connecting to GCP."""
+    monkeypatch.setenv("DASHBOARD_BACKEND", "bigquery")
+    backend = get_backend()
+    assert isinstance(backend, BigQueryBackend)
+    assert backend._client is None
+    assert backend.table("business_metrics").endswith(".business_metrics`")
+
+    monkeypatch.setenv("DASHBOARD_BACKEND", "parquet")
+    monkeypatch.setenv("DASHBOARD_PARQUET_DIR", str(tmp_path))
+    assert get_backend().root == str(tmp_path)
+
+    monkeypatch.setenv("DASHBOARD_BACKEND", "duckdb")
+    with pytest.raises(ValueError):
+        get_backend()
+
+def test_app_import_stays_within_startup_budget():
+    """Test that importing the app skips heavy clients and fits the startup budget."""
+    pytest.importorskip("streamlit")
+    script = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import src.dashboard.app as app\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started, 'budget': app.STARTUP_BUDGET_SECONDS,\n"
+        "                  'modules': [m for m in ('google.cloud.bigquery', 'plotly.express') if m in sys.modules]}))\n"
+    )
+    env = dict(os.environ, DASHBOARD_BACKEND="parquet")
+    env.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
+    result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    imported = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert imported["modules"] == []
+    assert imported["seconds"] < imported["budget"]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the dashboard data cache.
+"""
+
+import os
+import threading
+import time
+import pandas as pd
+from src.dashboard.cache import SingleFlightCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return pd.DataFrame({"state": ["AZ"], "total_reviews": [self.calls]})
+
+def test_ttl_and_version_invalidation():
+    """Test that expired entries are only reloaded when the version changes."""
+    clock, loader = Clock(), CountingLoader()
+    version = {"value": "v1"}
+    cache = SingleFlightCache(ttl_seconds=60, clock=clock)
+
+    cache.get("metrics", loader, lambda: version["value"])
+    cache.get("metrics", loader, lambda: version["value"])
+    assert loader.calls == 1
+
+    clock.now += 120
+    assert cache.get("metrics", loader, lambda: version["value"])["total_reviews"][0] == 1
+    assert loader.calls == 1
+
+    clock.now += 120
+    version["value"] = "v2"
+    assert cache.get("metrics", loader, lambda: version["value"])["total_reviews"][0] == 2
+
+    cache.invalidate("metrics")
+    cache.get("metrics", loader, lambda: version["value"])
+    assert loader.calls == 3
+
+def test_concurrent_requests_share_one_load():
+    """Test that concurrent sessions wait for a single in-flight load."""
+    loader = CountingLoader(delay=0.2)
+    cache = SingleFlightCache(ttl_seconds=60)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get("trends", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == 1
+    assert len(results) == 8
+
+def test_snapshot_serves_cold_start(tmp_path):
+    """Test that a new process starts from the on-disk snapshot."""
+    clock, loader = Clock(), CountingLoader()
+    SingleFlightCache(ttl_seconds=60, snapshot_dir=str(tmp_path), clock=clock).get("metrics", loader, lambda: "v1")
+
+    def failing_version():
+        raise AssertionError("cold start within the TTL must not contact the backend")
+
+    restarted = SingleFlightCache(ttl_seconds=60, snapshot_dir=str(tmp_path), clock=clock)
+    assert restarted.get("metrics", loader, failing_version)["state"][0] == "AZ"
+    assert loader.calls == 1
+
+    # After the TTL, an unchanged version still avoids the query
+    clock.now += 120
+    restarted = SingleFlightCache(ttl_seconds=60, snapshot_dir=str(tmp_path), clock=clock)
+    restarted.get("metrics", loader, lambda: "v1")
+    assert loader.calls == 1
+
+def test_least_recently_used_keys_are_evicted(tmp_path):
+    """Test that the cache keeps at most `max_entries` keys, dropping their locks and snapshots."""
+    clock, loader = Clock(), CountingLoader()
+    cache = SingleFlightCache(ttl_seconds=60, snapshot_dir=str(tmp_path), clock=clock, max_entries=2)
+
+    cache.get("page-1", loader)
+    cache.get("page-2", loader)
+    cache.get("page-1", loader)
+    cache.get("page-3", loader)
+    assert list(cache._entries) == ["page-1", "page-3"]
+    assert sorted(cache._key_locks) == ["page-1", "page-3"]
+    assert len(os.listdir(tmp_path)) == 4
+
+    # The evicted key is loaded again; the recently used one is still served from memory
+    cache.get("page-1", loader)
+    cache.get("page-2", loader)
+    assert loader.calls == 4
+
+def test_eviction_keeps_the_lock_of_an_inflight_load():
+    """Test that sessions waiting on a load still share it while other keys are stored and evicted."""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append("trends")
+        started.set()
+        release.wait(5)
+        return pd.DataFrame({"state": ["AZ"]})
+
+    cache = SingleFlightCache(ttl_seconds=60, max_entries=1)
+    threads = [threading.Thread(target=cache.get, args=("trends", slow_loader)) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    for page in range(3):
+        cache.get(f"page-{page}", CountingLoader())
+    assert "trends" in cache._key_locks
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["trends"]
+    assert sorted(cache._key_locks) == ["trends"]
+
+def test_invalidate_clears_every_snapshot(tmp_path):
+    """Test that a full invalidation also removes snapshots of keys not held in memory."""
+    clock, loader = Clock(), CountingLoader()
+    SingleFlightCache(ttl_seconds=60, snapshot_dir=str(tmp_path), clock=clock).get("other-process", loader)
+    cache = SingleFlightCache(ttl_seconds=60, snapshot_dir=str(tmp_path), clock=clock)
+    cache.get("metrics", loader)
+
+    cache.invalidate("metrics")
+    assert len(os.listdir(tmp_path)) == 2
+    cache.get("metrics", loader)
+    cache.invalidate()
+    assert os.listdir(tmp_path) == []
+    assert cache.get("other-process", loader)["total_reviews"][0] == 4
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the dashboard query layer, run against an SQLite stand-in backend.
+"""
+
+import sqlite3
+import pandas as pd
+import pytest
+from src.dashboard.queries import (
+    business_metrics_query, business_metrics_count_query, review_trends_query, review_trends_count_query,
+    states_query, period_bounds_query, category_metrics_query, categories_query, category_businesses_query,
+    category_businesses_count_query, geo_cells_query, businesses_within_query,
+    review_distribution_query, leaderboard_query, leaderboard_cities_query, leaderboard_categories_query,
+    review_timeseries_query
+)
+from src.geohash import INDEX_PRECISION, distance_km, encode
+from src.sketches import summarize_distribution
+
+def reviewer_sketch(user_ids):
+    """Serialize an HLL sketch of user ids, as the pipeline's approximate mode stores them."""
+    from datasketches import hll_sketch
+
+    sketch = hll_sketch(12)
+    for user_id in user_ids:
+        sketch.update(user_id)
+    return sketch.serialize_compact()
+
+@pytest.fixture
+def backend():
+    """An in-memory database holding small gold tables."""
+    connection = sqlite3.connect(":memory:")
+    pd.DataFrame({
+        "state": ["AZ", "NV", "PA", "FL", "TN"],
+        "total_reviews": [300, 200, 500, 100, 50],
+        "avg_rating": [4.1, 3.9, 3.7, 4.3, 4.0],
+        "avg_business_reviews": [10.0, 20.0, 30.0, 40.0, 50.0]
+    }).to_sql("business_metrics", connection, index=False)
+    pd.DataFrame({
+        "year": [2021] * 12 + [2022] * 12,
+        "month": list(range(1, 13)) * 2,
+        "total_reviews": list(range(24)),
+        "avg_rating": [4.0] * 24
+    }).to_sql("review_trends", connection, index=False)
+    pd.DataFrame({
+        "category": ["pizza", "pizza", "bars", "bars"],
+        "state": ["AZ", "NV", "AZ", "NV"],
+        "businesses": [2, 1, 1, 1],
+        "open_businesses": [1, 1, 0, 1],
+        "total_reviews": [30, 10, 0, 5],
+        "rated_reviews": [30, 10, 0, 5],
+        "avg_rating": [4.0, 2.0, None, 3.0]
+    }).to_sql("category_metrics", connection, index=False)
+    pd.DataFrame({
+        "category": ["pizza", "pizza", "pizza", "bars", "bars"],
+        "business_id": ["b2", "b1", "b3", "b2", "b4"],
+        "state": ["AZ", "AZ", "NV", "AZ", "NV"],
+        "is_open": [0, 1, 1, 0, 1]
+    }).to_sql("category_index", connection, index=False)
+
+    # Businesses around Philadelphia City Hall, up to 30 km away; p6 lies in the corner of a 5 km box
+    places = [("p1", 39.9526, -75.1652), ("p2", 39.9566, -75.1652), ("p3", 39.9800, -75.1400),
+              ("p4", 40.0200, -75.1652), ("p5", 39.9526, -74.8200), ("p6", 39.9926, -75.1102)]
+    pd.DataFrame({
+        "geohash": [encode(lat, lon, INDEX_PRECISION) for _, lat, lon in places],
+        "business_id": [business_id for business_id, _, _ in places],
+        "name": ["Place"] * 6,
+        "city": ["Philadelphia"] * 6,
+        "state": ["PA"] * 6,
+        "latitude": [lat for _, lat, _ in places],
+        "longitude": [lon for _, _, lon in places],
+        "review_count": [10, 20, 30, 40, 50, 60],
+        "avg_rating": [4.0] * 6
+    }).to_sql("business_geo_index", connection, index=False)
+    pd.DataFrame({
+        "precision": [4, 4, 5],
+        "geohash": ["dr4e", "dr4s", "dr4e3"],
+        "center_latitude": [39.9, 40.1, 39.97],
+        "center_longitude": [-75.1, -75.0, -75.17],
+        "businesses": [4, 1, 2],
+        "total_reviews": [100, 50, 30],
+        "avg_rating": [4.0, 3.5, 4.0],
+        "reviews_per_km2": [0.1, 0.05, 1.6]
+    }).to_sql("geo_cell_metrics", connection, index=False)
+
+    pd.DataFrame({
+        "state": ["AZ", "AZ", "NV"],
+        "year": [2022, 2022, 2022],
+        "month": [1, 2, 1],
+        "total_reviews": [4, 2, 3],
+        "distinct_reviewers": [2, 2, 1],
+        "reviewer_sketch": [reviewer_sketch(["u1", "u2"]), reviewer_sketch(["u2", "u3"]), reviewer_sketch(["u4"])],
+        "rating_bin_0": [1, 0, 3],
+        "rating_bin_1": [0, 0, 0],
+        "rating_bin_2": [1, 0, 0],
+        "rating_bin_3": [0, 1, 0],
+        "rating_bin_4": [2, 1, 0]
+    }).to_sql("review_distribution", connection, index=False)
+
+    # Top 2 per city and month, and per category within a city and month
+    board = {
+        "state": ["PA"] * 4 + ["AZ"] * 2,
+        "city": ["Philadelphia"] * 4 + ["Phoenix"] * 2,
+        "year": [2022] * 6,
+        "month": [1] * 6,
+        "ranking": ["reviews", "reviews", "rating", "rating", "reviews", "rating"],
+        "rank": [1, 2, 1, 2, 1, 1],
+        "business_id": ["p1", "p2", "p2", "p1", "z1", "z1"],
+        "name": ["Pizza", "Bar", "Bar", "Pizza", "Cafe", "Cafe"],
+        "review_count": [40, 12, 12, 40, 60, 60],
+        "avg_rating": [3.5, 4.5, 4.5, 3.5, 4.0, 4.0]
+    }
+    pd.DataFrame(board).to_sql("city_leaderboard", connection, index=False)
+    pd.DataFrame(dict(board, category=["pizza", "bars", "bars", "pizza", "cafes", "cafes"])) \
+        .to_sql("category_leaderboard", connection, index=False)
+
+    # Daily and monthly periods of the review time series
+    days = pd.date_range("2021-12-30", "2022-02-02", freq="D")
+    pd.DataFrame({
+        "resolution": ["day"] * len(days) + ["month"] * 3,
+        "period_start": [day.strftime("%Y-%m-%d") for day in days] + ["2021-12-01", "2022-01-01", "2022-02-01"],
+        "period_key": [int(day.strftime("%Y%m%d")) for day in days] + [20211201, 20220101, 20220201],
+        "total_reviews": [1] * len(days) + [2, 31, 2],
+        "star_sum": [4.0] * len(days) + [8.0, 124.0, 8.0],
+        "rated_reviews": [1] * len(days) + [2, 31, 2],
+        "avg_rating": [4.0] * (len(days) + 3)
+    }).to_sql("review_timeseries", connection, index=False)
+
+    def run(query):
+        return pd.read_sql_query(query.sql, connection, params=query.params)
+    return run
+
+def test_business_metrics_filters_and_top_n(backend):
+    """Test that state filters and top-N are applied in the query."""
+    result = backend(business_metrics_query("business_metrics", limit=2))
+    assert result["state"].tolist() == ["PA", "AZ"]
+
+    result = backend(business_metrics_query("business_metrics", states=["AZ", "TN", "NV"], limit=2))
+    assert result["state"].tolist() == ["AZ", "NV"]
+    assert backend(business_metrics_count_query("business_metrics", ["AZ", "TN"]))["row_count"][0] == 2
+
+    with pytest.raises(ValueError):
+        business_metrics_query("business_metrics", order_by="state; DROP TABLE business_metrics")
+
+def test_business_metrics_paging(backend):
+    """Test that pages are disjoint and cover every row."""
+    pages = [backend(business_metrics_query("business_metrics", limit=2, offset=offset))["state"].tolist()
+             for offset in (0, 2, 4)]
+    assert pages == [["PA", "AZ"], ["NV", "FL"], ["TN"]]
+
+def test_review_trends_date_range(backend):
+    """Test that (year, month) bounds are inclusive and pushed down."""
+    result = backend(review_trends_query("review_trends", start=(2021, 11), end=(2022, 2)))
+    assert list(zip(result["year"], result["month"])) == [(2021, 11), (2021, 12), (2022, 1), (2022, 2)]
+    assert backend(review_trends_count_query("review_trends", start=(2022, 6)))["row_count"][0] == 7
+
+    page = backend(review_trends_query("review_trends", start=(2022, 1), limit=3, offset=3))
+    assert page["month"].tolist() == [4, 5, 6]
+
+def test_review_timeseries_by_resolution(backend):
+    """Test that one resolution is read, with periods starting within the (year, month) bounds."""
+    january = backend(review_timeseries_query("review_timeseries", "day", start=(2022, 1), end=(2022, 1)))
+    assert january["period_key"].tolist() == list(range(20220101, 20220132))
+    assert january.columns.tolist() == ["period_key", "total_reviews", "avg_rating"]
+
+    months = backend(review_timeseries_query("review_timeseries", "month", end=(2022, 1)))
+    assert months["period_key"].tolist() == [20211201, 20220101]
+    with pytest.raises(ValueError):
+        review_timeseries_query("review_timeseries", "hour")
+
+def test_filter_options(backend):
+    """Test the queries that populate the filter controls."""
+    assert backend(states_query("business_metrics"))["state"].tolist() == ["AZ", "FL", "NV", "PA", "TN"]
+    bounds = backend(period_bounds_query("review_trends"))
+    assert (bounds["first_period"][0], bounds["last_period"][0]) == (202101, 202212)
+
+def test_category_metrics_roll_up_exactly(backend):
+    """Test that category metrics are re-aggregated across states from counts."""
+    result = backend(category_metrics_query("category_metrics")).set_index("category")
+    assert result.index.tolist() == ["pizza", "bars"]
+    assert result.loc["pizza", "businesses"] == 3
+    assert abs(result.loc["pizza", "open_ratio"] - 2 / 3) < 1e-9
+    assert result.loc["pizza", "avg_rating"] == (30 * 4.0 + 10 * 2.0) / 40
+
+    result = backend(category_metrics_query("category_metrics", states=["AZ"], limit=1))
+    assert result["category"].tolist() == ["pizza"]
+    assert backend(categories_query("category_metrics"))["category"].tolist() == ["bars", "pizza"]
+
+def test_category_business_lookup(backend):
+    """Test that the category index answers paged business lookups."""
+    result = backend(category_businesses_query("category_index", "pizza", limit=2))
+    assert result["business_id"].tolist() == ["b1", "b2"]
+    result = backend(category_businesses_query("category_index", "pizza", states=["NV"]))
+    assert result["business_id"].tolist() == ["b3"]
+    assert backend(category_businesses_count_query("category_index", "pizza", ["AZ"]))["row_count"][0] == 2
+
+def test_geo_cells_by_precision(backend):
+    """Test that cells are read one precision at a time, busiest first."""
+    assert backend(geo_cells_query("geo_cell_metrics", 4))["geohash"].tolist() == ["dr4e", "dr4s"]
+    assert backend(geo_cells_query("geo_cell_metrics", 5, limit=1))["geohash"].tolist() == ["dr4e3"]
+
+def test_businesses_within_radius(backend):
+    """Test that the radius lookup only returns candidates from the covering cells and box."""
+    query = businesses_within_query("business_geo_index", 39.9526, -75.1652, 5)
+    assert all(key.startswith(("cell_", "min_", "max_")) for key in query.params)
+    candidates = backend(query)
+    assert sorted(candidates["business_id"]) == ["p1", "p2", "p3", "p6"]
+
+    # The exact distance drops the box's corners
+    nearby = [business_id for business_id, lat, lon in
+              zip(candidates["business_id"], candidates["latitude"], candidates["longitude"])
+              if distance_km(39.9526, -75.1652, lat, lon) <= 5]
+    assert sorted(nearby) == ["p1", "p2", "p3"]
+    assert sorted(backend(businesses_within_query("business_geo_index", 39.9526, -75.1652, 10))["business_id"]) \
+        == ["p1", "p2", "p3", "p4", "p6"]
+
+def test_review_distribution_merges_sketches(backend):
+    """Test that sketch rows are filtered in SQL and merged into estimates."""
+    rows = backend(review_distribution_query("review_distribution", states=["AZ"], start=(2022, 1), end=(2022, 2)))
+    assert len(rows) == 2
+    bins = [int(rows[f"rating_bin_{index}"].sum()) for index in range(5)]
+    summary = summarize_distribution(bins, rows["reviewer_sketch"].tolist())
+    assert summary["rated_reviews"] == 6
+    assert round(summary["distinct_reviewers"]) == 3
+    assert summary["percentiles"] == {0.25: 3.0, 0.5: 4.0, 0.75: 5.0, 0.9: 5.0}
+
+    rows = backend(review_distribution_query("review_distribution", end=(2022, 1)))
+    assert sorted(rows["state"]) == ["AZ", "NV"]
+
+def test_leaderboard_lookups(backend):
+    """Test that a leaderboard is read for one city, month and ranking, in rank order."""
+    result = backend(leaderboard_query("city_leaderboard", "rating", 2022, 1, "PA", "Philadelphia"))
+    assert result["business_id"].tolist() == ["p2", "p1"]
+    assert result.columns.tolist() == ["rank", "business_id", "name", "review_count", "avg_rating"]
+    result = backend(leaderboard_query("category_leaderboard", "reviews", 2022, 1, "PA", "Philadelphia", "pizza"))
+    assert result["business_id"].tolist() == ["p1"]
+    assert backend(leaderboard_query("city_leaderboard", "reviews", 2022, 2, "PA", "Philadelphia")).empty
+    with pytest.raises(ValueError):
+        leaderboard_query("city_leaderboard", "name", 2022, 1, "PA", "Philadelphia")
+
+    cities = backend(leaderboard_cities_query("city_leaderboard"))
+    assert list(zip(cities["state"], cities["city"])) == [("AZ", "Phoenix"), ("PA", "Philadelphia")]
+    categories = backend(leaderboard_categories_query("category_leaderboard", "PA", "Philadelphia"))
+    assert categories["category"].tolist() == ["bars", "pizza"]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the dashboard's time-series resolution choice and LTTB downsampling.
+"""
+
+import numpy as np
+import pandas as pd
+from src.dashboard.timeseries import downsample, lttb, pick_resolution, range_days
+
+def reference_lttb(x, y, threshold):
+    """Point-by-point LTTB as originally described, for comparison."""
+    size = len(x)
+    every = (size - 2) / (threshold - 2)
+    selected, previous = [0], 0
+    for bucket in range(threshold - 2):
+        low, high = int(bucket * every) + 1, int((bucket + 1) * every) + 1
+        next_low, next_high = high, min(int((bucket + 2) * every) + 1, size)
+        next_x = sum(x[next_low:next_high]) / (next_high - next_low)
+        next_y = sum(y[next_low:next_high]) / (next_high - next_low)
+        areas = [abs((x[previous] - next_x) * (y[index] - y[previous])
+                     - (x[previous] - x[index]) * (next_y - y[previous])) for index in range(low, high)]
+        previous = low + areas.index(max(areas))
+        selected.append(previous)
+    return selected + [size - 1]
+
+def test_pick_resolution_follows_the_range():
+    """Test that zoomed-in ranges read days and long ranges coarser periods."""
+    assert range_days((2024, 1), (2024, 2)) == 60
+    assert pick_resolution((2022, 1), (2022, 3)) == "day"
+    assert pick_resolution((2010, 1), (2022, 12)) == "week"
+    assert pick_resolution((2010, 1), (2022, 12), max_points=200) == "month"
+    assert pick_resolution((1900, 1), (2022, 12), max_points=100) == "quarter"
+    assert pick_resolution(None, None) == "month"
+
+def test_lttb_matches_a_per_point_reference():
+    """Test that the numpy LTTB picks the same points as a plain loop, keeping both ends."""
+    rng = np.random.default_rng(3)
+    x = np.arange(1000, dtype=float)
+    y = np.cumsum(rng.normal(size=1000))
+    y[437] = 80.0
+    for threshold in (3, 10, 97, 500):
+        selected = lttb(x, y, threshold)
+        assert len(selected) == threshold
+        assert selected[0] == 0 and selected[-1] == 999
+        assert np.all(np.diff(selected) > 0)
+        assert selected.tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+        assert 437 in selected
+
+    assert lttb(x[:50], y[:50], 100).tolist() == list(range(50))
+    assert lttb(x, y, 2).tolist() == list(range(1000))
+
+def test_downsample_dates_and_missing_values():
+    """Test that date columns are downsampled and rows without a value are dropped first."""
+    frame = pd.DataFrame({"period_start": pd.date_range("2020-01-01", periods=365, freq="D"),
+                          "avg_rating": np.linspace(1.0, 5.0, 365)})
+    frame.loc[[0, 100], "avg_rating"] = None
+
+    chart = downsample(frame, "period_start", "avg_rating", threshold=50)
+    assert len(chart) == 50 and chart["avg_rating"].notna().all()
+    assert chart["period_start"].iloc[0] == pd.Timestamp("2020-01-02")
+    assert chart["period_start"].iloc[-1] == pd.Timestamp("2020-12-30")
+    assert len(downsample(frame, "period_start", "avg_rating", threshold=1000)) == 363
@@ -0,0 +1,11 @@
+"""
+Shared fixtures for the Spark pipeline tests.
+"""
+
+import pytest
+from src.spark.profiles import PROFILES, session_builder
+
+@pytest.fixture(scope="session")
+def spark():
+    """Create a Spark session for testing."""
+    return session_builder(PROFILES["test"], "Yelp Analytics Test").getOrCreate()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the approximate aggregation mode.
+"""
+
+import math
+from pyspark.sql.functions import col, countDistinct, hll_sketch_agg, hll_sketch_estimate, month
+from src.sketches import SketchConfig, hll_relative_error, histogram_quantile, summarize_distribution
+from src.spark.datagen import generate_yelp_dataset
+from src.spark.gold import GOLD_TABLES, compute_gold_tables, review_aggregates, rollup_distribution, sketch_tables
+from src.spark.incremental import merge_review_aggregates
+from src.spark.yelp_analytics import gold_sources_from_bronze, read_bronze_data
+
+def nearest_rank(values, quantile):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(quantile * len(ordered)), 1) - 1]
+
+def test_sketches_match_exact_results_on_generated_data(spark, tmp_path):
+    """Test distinct reviewers within the HLL error bound and exact whole-star percentiles."""
+    generate_yelp_dataset(str(tmp_path), scale_factor=0.2)
+    business_df, review_df, _ = read_bronze_data(spark, str(tmp_path))
+    config = SketchConfig(lg_config_k=10, rating_bin_width=1.0)
+    tables = compute_gold_tables(gold_sources_from_bronze(business_df, review_df, sketches=config),
+                                 GOLD_TABLES + sketch_tables(config))
+
+    # Roll the (state, year, month) rows up to states from their sketches alone
+    by_state = {row["state"]: row for row in
+                rollup_distribution(tables["review_distribution"], ["state"], config).collect()}
+    reviews = review_df.join(business_df.select("business_id", "state"), "business_id")
+    exact = {row["state"]: row["reviewers"] for row in
+             reviews.groupBy("state").agg(countDistinct("user_id").alias("reviewers")).collect()}
+    stars = {}
+    for row in reviews.select("state", "stars").collect():
+        stars.setdefault(row["state"], []).append(row["stars"])
+
+    bound = 3 * hll_relative_error(config.lg_config_k)
+    assert sorted(by_state) == sorted(exact)
+    for state, row in by_state.items():
+        assert abs(row["distinct_reviewers"] - exact[state]) <= bound * exact[state] + 1
+        assert row["total_reviews"] == len(stars[state])
+        for quantile in (0.25, 0.5, 0.75, 0.9):
+            assert row[f"rating_p{int(quantile * 100)}"] == nearest_rank(stars[state], quantile)
+
+    # The dashboard merges the stored sketches the same way
+    summary = summarize_distribution([sum(row[f"rating_bin_{index}"] for row in by_state.values())
+                                      for index in range(5)], [row["reviewer_sketch"] for row in by_state.values()])
+    total = review_df.select(countDistinct("user_id")).first()[0]
+    assert abs(summary["distinct_reviewers"] - total) <= bound * total
+    assert summary["percentiles"][0.5] == nearest_rank([row["stars"] for row in review_df.collect()], 0.5)
+
+def test_error_bounds_follow_the_configuration(spark):
+    """Test that HLL error shrinks with lg_config_k and percentiles stay within one bin."""
+    users = spark.range(50000).select((col("id") * 7919 % 20011).cast("string").alias("user_id"))
+    exact = users.distinct().count()
+    for lg_config_k in (6, 12):
+        sketch = users.agg(hll_sketch_agg("user_id", lg_config_k).alias("sketch")).first()["sketch"]
+        estimate = summarize_distribution([0], [sketch])["distinct_reviewers"]
+        assert abs(estimate - exact) <= 3 * hll_relative_error(lg_config_k) * exact
+
+    ratings = [1.0 + (index % 41) / 10 for index in range(1000)]
+    for width in (0.5, 1.0):
+        counts = [0] * int(4 / width + 1)
+        for rating in ratings:
+            counts[int((rating - 1.0) // width)] += 1
+        for quantile in (0.1, 0.5, 0.9):
+            assert 0 <= nearest_rank(ratings, quantile) - histogram_quantile(counts, quantile, width) < width
+
+def test_incremental_merge_unions_sketches(spark):
+    """Test that merged batches keep exact counts and sketches within the error bound."""
+    config = SketchConfig(lg_config_k=10, rating_bin_width=1.0)
+    reviews = spark.range(4000).select(
+        col("id"),
+        (col("id") % 3000).cast("string").alias("user_id"),
+        (col("id") % 2).cast("string").alias("business_id"),
+        (col("id") % 5 + 1).cast("double").alias("stars"),
+        (col("id") % 3 + 1).cast("string").alias("month")
+    ).selectExpr("id", "user_id", "business_id", "stars", "concat('2023-0', month, '-01 12:00:00') AS date")
+
+    # Both batches hold reviews of every business and month
+    merged = merge_review_aggregates(review_aggregates(reviews.filter(col("id") < 2500), sketches=config),
+                                     review_aggregates(reviews.filter(col("id") >= 2500), sketches=config))
+    full = review_aggregates(reviews, sketches=config)
+
+    exact = {(row["business_id"], row["month"]): row["reviewers"] for row in
+             reviews.groupBy("business_id", month("date").alias("month"))
+             .agg(countDistinct("user_id").alias("reviewers")).collect()}
+
+    def by_key(df):
+        rows = df.select("business_id", "month", "review_count", "rating_bin_0",
+                         hll_sketch_estimate("reviewer_sketch").alias("reviewers")).collect()
+        return {(row["business_id"], row["month"]): row for row in rows}
+    merged, full = by_key(merged), by_key(full)
+    assert sorted(merged) == sorted(full) == sorted(exact)
+    for key, row in merged.items():
+        assert (row["review_count"], row["rating_bin_0"]) == (full[key]["review_count"], full[key]["rating_bin_0"])
+        assert abs(row["reviewers"] - exact[key]) <= 3 * hll_relative_error(config.lg_config_k) * exact[key]
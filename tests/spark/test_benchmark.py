@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the synthetic data generator and the benchmark harness.
+"""
+
+import json
+from collections import Counter
+from src.spark.benchmark import append_result, compare_runs, run_benchmark
+from src.spark.datagen import generate_yelp_dataset
+from src.spark.schemas import BRONZE_FILES
+from src.spark.sinks import ParquetSink
+
+def test_generate_yelp_dataset(tmp_path):
+    """Test that generated files are Yelp-shaped, consistent and skewed."""
+    counts = generate_yelp_dataset(str(tmp_path), scale_factor=0.1, seed=7)
+    assert counts == {"business": 100, "user": 500, "review": 2500}
+
+    reviews = [json.loads(line) for line in open(tmp_path / BRONZE_FILES["review"])]
+    businesses = {b["business_id"]: b for b in map(json.loads, open(tmp_path / BRONZE_FILES["business"]))}
+    users = [json.loads(line) for line in open(tmp_path / BRONZE_FILES["user"])]
+    assert len(reviews) == 2500 and len(businesses) == 100 and len(users) == 500
+
+    per_business = Counter(review["business_id"] for review in reviews)
+    assert all(businesses[business_id]["review_count"] == n for business_id, n in per_business.items())
+    # The most reviewed business holds far more than an even share
+    assert per_business.most_common(1)[0][1] > 10 * 2500 / 100
+    assert min(review["date"] for review in reviews) >= "2005-01-01"
+
+    # Same seed, same data
+    generate_yelp_dataset(str(tmp_path / "again"), scale_factor=0.1, seed=7)
+    assert (tmp_path / "again" / BRONZE_FILES["review"]).read_text() == (tmp_path / BRONZE_FILES["review"]).read_text()
+
+def test_run_benchmark(spark, tmp_path):
+    """Test that each layer reports wall time, shuffle and memory metrics."""
+    generate_yelp_dataset(str(tmp_path), scale_factor=0.02)
+    layers = run_benchmark(spark, str(tmp_path))
+
+    assert list(layers) == ["bronze", "silver", "gold"]
+    for metrics in layers.values():
+        assert metrics["wall_time_s"] > 0
+        assert "shuffle_write_bytes" in metrics
+        assert "peak_execution_memory_bytes" in metrics
+    assert layers["bronze"]["input_records"] > 0
+    assert layers["gold"]["shuffle_write_bytes"] > 0
+
+def test_narrow_silver_shrinks_silver_layer(spark, tmp_path):
+    """Test that splitting text out of silver cuts its shuffle and persisted bytes."""
+    generate_yelp_dataset(str(tmp_path), scale_factor=0.02)
+    # At full scale the silver joins shuffle; keep them from broadcasting at this size
+    spark.conf.set("spark.sql.autoBroadcastJoinThreshold", "-1")
+    try:
+        narrow = run_benchmark(spark, str(tmp_path))["silver"]
+        wide = run_benchmark(spark, str(tmp_path), silver_text=True)["silver"]
+    finally:
+        spark.conf.unset("spark.sql.autoBroadcastJoinThreshold")
+
+    assert narrow["shuffle_write_bytes"] < wide["shuffle_write_bytes"] / 2
+    assert narrow["persisted_bytes"] < wide["persisted_bytes"] / 2
+
+def test_run_benchmark_with_sink(spark, tmp_path):
+    """Test that writing the gold tables is measured as its own layer."""
+    generate_yelp_dataset(str(tmp_path / "bronze"), scale_factor=0.02)
+    layers = run_benchmark(spark, str(tmp_path / "bronze"), sink=ParquetSink(str(tmp_path / "gold")))
+
+    assert list(layers) == ["bronze", "silver", "gold", "write"]
+    assert layers["write"]["output_records"] > 0
+    assert sorted(layers["write"]["tables"]) == ["business_metrics", "review_trends"]
+    assert (tmp_path / "gold" / "review_trends").is_dir()
+
+def test_append_and_compare_runs(tmp_path):
+    """Test that runs accumulate in the results file and compare by ratio."""
+    results = str(tmp_path / "results.json")
+    first = {"scale_factor": 1, "layers": {"gold": {"wall_time_s": 2.0, "shuffle_write_bytes": 100}}}
+    second = {"scale_factor": 1, "layers": {"gold": {"wall_time_s": 3.0, "shuffle_write_bytes": 50}}}
+    append_result(results, first)
+    assert len(append_result(results, second)) == 2
+    assert compare_runs(first, second) == {"gold": {"wall_time_s": 1.5, "shuffle_write_bytes": 0.5}}
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the columnar bronze cache.
+"""
+
+import json
+import os
+import time
+import pyarrow.parquet as pq
+from src.spark import bronze_cache
+from src.spark.bronze_cache import cache_entity_path, ingest_bronze, is_cache_fresh
+from src.spark.yelp_analytics import read_bronze_data
+
+def write_bronze_files(path):
+    (path / "yelp_academic_dataset_business.json").write_text(
+        '{"business_id": "b1", "name": "Restaurant A", "state": "AZ", "review_count": 100}\n'
+        '{"business_id": "b2", "name": "Restaurant B", "state": "NV", "review_count": 50}\n')
+    (path / "yelp_academic_dataset_review.json").write_text(
+        '{"review_id": "r1", "user_id": "u1", "business_id": "b1", "stars": 5.0, "date": "2022-01-01 12:00:00"}\n'
+        '{"review_id": "r2", "user_id": "u2", "business_id": "b2", "stars": 3.0, "date": "2023-06-02 12:00:00"}\n')
+    (path / "yelp_academic_dataset_user.json").write_text('{"user_id": "u1", "name": "User A"}\n')
+
+def test_ingest_bronze_layout(spark, tmp_path):
+    """Test that ingest writes partitioned Parquet and skips fresh entities."""
+    input_path, cache_path = tmp_path / "bronze", tmp_path / "cache"
+    input_path.mkdir()
+    write_bronze_files(input_path)
+
+    written = ingest_bronze(spark, str(input_path), str(cache_path))
+    assert written == ["business", "review", "user"]
+    assert os.path.isdir(os.path.join(cache_entity_path(str(cache_path), "review"), "review_year=2022"))
+    assert os.path.isdir(os.path.join(cache_entity_path(str(cache_path), "business"), "state=NV"))
+
+    assert ingest_bronze(spark, str(input_path), str(cache_path)) == []
+
+def test_busy_partition_value_is_spread_over_tasks(spark, tmp_path, monkeypatch):
+    """Test that one review year is written by several tasks, in files capped at the record limit."""
+    input_path, cache_path = tmp_path / "bronze", tmp_path / "cache"
+    input_path.mkdir()
+    write_bronze_files(input_path)
+    with open(input_path / "yelp_academic_dataset_review.json", "w") as out:
+        out.writelines(json.dumps({"review_id": f"r{index}", "user_id": "u1", "business_id": "b1", "stars": 4.0,
+                                   "date": "2022-03-01 12:00:00"}) + "\n" for index in range(400))
+    monkeypatch.setattr(bronze_cache, "MAX_RECORDS_PER_FILE", 60)
+
+    # Keep adaptive execution from coalescing the tiny shuffle partitions back into one
+    spark.conf.set("spark.sql.adaptive.coalescePartitions.enabled", "false")
+    try:
+        ingest_bronze(spark, str(input_path), str(cache_path), entities=["review"])
+    finally:
+        spark.conf.unset("spark.sql.adaptive.coalescePartitions.enabled")
+    year_path = os.path.join(cache_entity_path(str(cache_path), "review"), "review_year=2022")
+    counts = [pq.ParquetFile(os.path.join(year_path, name)).metadata.num_rows
+              for name in os.listdir(year_path) if name.endswith(".parquet")]
+    assert sum(counts) == 400 and max(counts) <= 60
+    tasks = {name.split("-")[1] for name in os.listdir(year_path) if name.endswith(".parquet")}
+    assert len(tasks) > 1
+
+def test_read_bronze_data_prefers_fresh_cache(spark, tmp_path):
+    """Test that reads use the cache only while it is newer than the source."""
+    input_path, cache_path = tmp_path / "bronze", tmp_path / "cache"
+    input_path.mkdir()
+    write_bronze_files(input_path)
+    ingest_bronze(spark, str(input_path), str(cache_path))
+
+    required = {"review": ["review_id", "business_id", "stars", "date"], "business": ["business_id", "state"]}
+    business_df, review_df, _ = read_bronze_data(spark, str(input_path), required, cache_path=str(cache_path))
+    assert review_df.columns == ["review_id", "business_id", "stars", "date"]
+    assert all(path.endswith(".parquet") for path in review_df.inputFiles())
+    assert sorted(row["state"] for row in business_df.collect()) == ["AZ", "NV"]
+
+    # A newer source invalidates the cached copy
+    review_source = input_path / "yelp_academic_dataset_review.json"
+    future = time.time() + 60
+    os.utime(review_source, (future, future))
+    assert not is_cache_fresh(spark, str(input_path), str(cache_path), "review")
+
+    _, review_df, _ = read_bronze_data(spark, str(input_path), required, cache_path=str(cache_path))
+    assert review_df.inputFiles()[0].endswith("yelp_academic_dataset_review.json")
+    assert review_df.count() == 2
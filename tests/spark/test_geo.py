@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the geohash enrichment and geographic gold tables.
+"""
+
+from pyspark.sql.functions import col
+from src.geohash import GEOHASH_PRECISIONS, encode
+from src.spark.geo import geohash, with_geohash
+from src.spark.gold import GEO_TABLES, GOLD_TABLES, gold_scan
+from src.spark.yelp_analytics import gold_sources_from_bronze
+
+POINTS = [(57.64911, 10.40744), (39.9526, -75.1652), (-33.8688, 151.2093), (90.0, 180.0), (-90.0, -180.0),
+          (0.0, 0.0)]
+
+def test_native_geohash_matches_reference(spark):
+    """Test that the Spark expression agrees with the reference encoder, and nulls stay null."""
+    df = spark.createDataFrame(POINTS + [(None, 1.0)], "latitude double, longitude double")
+    rows = with_geohash(df).withColumn("geohash_9", geohash(col("latitude"), col("longitude"), 9)).collect()
+
+    for row in rows[:-1]:
+        for precision in GEOHASH_PRECISIONS + [9]:
+            assert row[f"geohash_{precision}"] == encode(row["latitude"], row["longitude"], precision)
+    assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert rows[-1]["geohash_6"] is None and rows[-1]["geohash_4"] is None
+
+def test_geo_cell_metrics_and_index(spark):
+    """Test that cell rollups come from per-business totals at every precision."""
+    business_df = spark.createDataFrame([
+        ("b1", "Pizza", "Philadelphia", "PA", 39.9526, -75.1652, 10),
+        ("b2", "Bar", "Philadelphia", "PA", 39.9530, -75.1650, 5),
+        ("b3", "Cafe", "Philadelphia", "PA", 40.0200, -75.1652, 3),
+        ("b4", "Nowhere", None, "PA", None, None, 1)
+    ], "business_id string, name string, city string, state string, latitude double, longitude double, "
+       "review_count long")
+    review_df = spark.createDataFrame([
+        ("u1", "b1", 5.0, "2023-01-01 12:00:00"),
+        ("u2", "b1", 3.0, "2023-02-01 12:00:00"),
+        ("u1", "b2", 4.0, "2023-01-05 12:00:00"),
+        ("u3", "b4", 1.0, "2023-01-05 12:00:00")
+    ], "user_id string, business_id string, stars double, date string")
+    sources = gold_sources_from_bronze(business_df, review_df)
+
+    with gold_scan(sources, GOLD_TABLES + GEO_TABLES, exports=["business_geo_index"]) as tables:
+        cells = {(row["precision"], row["geohash"]): row for row in tables["geo_cell_metrics"].collect()}
+        index = {row["business_id"]: row for row in tables["business_geo_index"].collect()}
+        # The business dimension is multiplied by the precisions, not the reviews
+        assert sources["geo_cells"].count() == 3 * len(GEOHASH_PRECISIONS)
+
+    city_hall = cells[(6, encode(39.9526, -75.1652, 6))]
+    assert (city_hall["businesses"], city_hall["total_reviews"], city_hall["avg_rating"]) == (2, 3, 4.0)
+    assert city_hall["area_km2"] > 0
+    assert city_hall["reviews_per_km2"] == 3 / city_hall["area_km2"]
+    assert cells[(4, "dr4e")]["businesses"] == 3
+    # Businesses without reviews are counted with zero reviews; unlocated ones are left out
+    assert cells[(6, encode(40.0200, -75.1652, 6))]["total_reviews"] == 0
+    assert sum(row["total_reviews"] for (precision, _), row in cells.items() if precision == 4) == 3
+
+    assert sorted(index) == ["b1", "b2", "b3"]
+    assert index["b1"]["geohash"] == encode(39.9526, -75.1652, 5)
+    assert (index["b1"]["review_count"], index["b1"]["avg_rating"]) == (2, 4.0)
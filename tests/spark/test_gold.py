@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the gold table engine.
+"""
+
+from datetime import datetime
+from pyspark import StorageLevel
+from pyspark.sql.functions import count, date_trunc, sum as spark_sum, to_date
+from src.spark.datagen import generate_yelp_dataset
+from src.spark.gold import (
+    CATEGORY_TABLES, GOLD_TABLES, TIMESERIES_RESOLUTIONS, TIMESERIES_TABLES, GoldTable, compute_gold_tables, gold_scan,
+    mean, total
+)
+from src.spark.yelp_analytics import GOLD_COLUMNS, gold_sources_from_bronze, read_bronze_data
+
+def bronze_frames(spark):
+    business_df = spark.createDataFrame(
+        [("b1", "AZ", 100), ("b2", "AZ", 50), ("b3", "NV", None)],
+        "business_id string, state string, review_count long")
+    review_df = spark.createDataFrame([
+        ("u1", "b1", 5.0, "2023-01-01 12:00:00"),
+        ("u2", "b1", 4.0, "2023-01-15 12:00:00"),
+        ("u1", "b2", 3.0, "2023-02-03 12:00:00"),
+        ("u3", "b3", 1.0, "2023-02-04 12:00:00")
+    ], "user_id string, business_id string, stars double, date string")
+    return business_df, review_df
+
+def test_gold_scan_persists_shared_source(spark):
+    """Test that every declared table is built from one persisted source."""
+    business_df, review_df = bronze_frames(spark)
+    sources = gold_sources_from_bronze(business_df, review_df)
+
+    with gold_scan(sources) as tables:
+        assert sorted(tables) == sorted(table.name for table in GOLD_TABLES)
+        assert sources["business_months"].storageLevel == StorageLevel.MEMORY_AND_DISK
+        metrics = {row["state"]: row for row in tables["business_metrics"].collect()}
+        trends = [(row["year"], row["month"], row["total_reviews"]) for row in tables["review_trends"].collect()]
+
+    assert sources["business_months"].storageLevel == StorageLevel.NONE
+    assert metrics["AZ"]["total_reviews"] == 3
+    assert metrics["AZ"]["avg_rating"] == 4.0
+    assert metrics["AZ"]["avg_business_reviews"] == (100 + 100 + 50) / 3
+    assert metrics["NV"]["avg_business_reviews"] is None
+    assert trends == [(2023, 1, 2), (2023, 2, 2)]
+
+def test_declared_table_shares_source(spark):
+    """Test that a new declaration is computed from the shared source."""
+    business_df, review_df = bronze_frames(spark)
+    monthly_by_state = GoldTable(
+        name="state_trends",
+        source="business_months",
+        group_by=["state", "year", "month"],
+        metrics=[("total_reviews", total("review_count")), ("avg_rating", mean("star_sum", "star_count"))],
+        order_by=[("state", True), ("month", True)]
+    )
+    tables = compute_gold_tables(gold_sources_from_bronze(business_df, review_df), [monthly_by_state])
+    rows = [(row["state"], row["month"], row["total_reviews"], row["avg_rating"])
+            for row in tables["state_trends"].collect()]
+    assert rows == [("AZ", 1, 2, 4.5), ("AZ", 2, 1, 3.0), ("NV", 2, 1, 1.0)]
+
+def test_category_metrics_explode_only_the_business_dimension(spark):
+    """Test that category metrics count each business once per category."""
+    business_df = spark.createDataFrame([
+        ("b1", "AZ", 100, 1, "Restaurants, Pizza"),
+        ("b2", "AZ", 50, 0, "Pizza|Bars"),
+        ("b3", "NV", 10, 1, "restaurants"),
+        ("b4", "AZ", 5, 1, None)
+    ], "business_id string, state string, review_count long, is_open long, categories string")
+    review_df = spark.createDataFrame([
+        ("u1", "b1", 5.0, "2023-01-01 12:00:00"),
+        ("u2", "b1", 4.0, "2023-02-15 12:00:00"),
+        ("u1", "b2", 2.0, "2023-02-03 12:00:00")
+    ], "user_id string, business_id string, stars double, date string")
+    sources = gold_sources_from_bronze(business_df, review_df)
+
+    with gold_scan(sources, GOLD_TABLES + CATEGORY_TABLES, exports=["category_index"]) as tables:
+        metrics = {(row["category"], row["state"]): row for row in tables["category_metrics"].collect()}
+        index = sorted((row["category"], row["business_id"]) for row in tables["category_index"].collect())
+
+    assert index == [("bars", "b2"), ("pizza", "b1"), ("pizza", "b2"), ("restaurants", "b1"), ("restaurants", "b3")]
+    pizza = metrics[("pizza", "AZ")]
+    assert (pizza["businesses"], pizza["open_businesses"], pizza["open_ratio"]) == (2, 1, 0.5)
+    assert (pizza["total_reviews"], pizza["rated_reviews"], pizza["avg_rating"]) == (3, 3, 11.0 / 3)
+    # Businesses without reviews still count towards the open ratio
+    assert (metrics[("restaurants", "NV")]["total_reviews"], metrics[("restaurants", "NV")]["avg_rating"]) == (0, None)
+    assert metrics[("restaurants", "NV")]["open_ratio"] == 1.0
+
+def test_review_timeseries_rolls_up_every_resolution(spark, tmp_path):
+    """Test that one daily pass gives the exact series at every resolution, and monthly matches review_trends."""
+    generate_yelp_dataset(str(tmp_path), scale_factor=0.2)
+    business_df, review_df, _ = read_bronze_data(spark, str(tmp_path), required_columns=GOLD_COLUMNS)
+    sources = gold_sources_from_bronze(business_df, review_df)
+
+    with gold_scan(sources, GOLD_TABLES + TIMESERIES_TABLES) as tables:
+        series = tables["review_timeseries"].collect()
+        trends = tables["review_trends"].collect()
+
+    reviews = review_df.join(business_df.select("business_id"), "business_id", "left_semi")
+    for resolution in TIMESERIES_RESOLUTIONS:
+        expected = reviews.groupBy(date_trunc(resolution, to_date("date")).cast("date").alias("period_start")).agg(
+            count("*").alias("total_reviews"), spark_sum("stars").alias("star_sum"),
+            count("stars").alias("rated_reviews"))
+        actual = [row for row in series if row["resolution"] == resolution]
+        assert sorted((row["period_start"], row["total_reviews"], row["star_sum"], row["rated_reviews"])
+                      for row in actual) == sorted(tuple(row) for row in expected.collect())
+        assert all(row["period_key"] == int(row["period_start"].strftime("%Y%m%d")) for row in actual)
+    assert {row["period_start"].weekday() for row in series if row["resolution"] == "week"} == {0}
+
+    monthly = {(row["period_start"].year, row["period_start"].month): (row["total_reviews"], row["avg_rating"])
+               for row in series if row["resolution"] == "month"}
+    assert monthly == {(row["year"], row["month"]): (row["total_reviews"], row["avg_rating"]) for row in trends}
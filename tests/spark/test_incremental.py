@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incremental, watermark-based gold runs.
+"""
+
+import json
+import os
+import pytest
+from src.spark.bronze_cache import ingest_bronze
+from src.spark.gold import TIMESERIES_TABLES, compute_gold_tables
+from src.spark.incremental import load_review_state, merge_review_aggregates
+from src.spark.yelp_analytics import (
+    GOLD_COLUMNS, gold_layer_from_bronze, gold_sources_from_bronze, incremental_gold_sources, read_bronze_data
+)
+
+FIRST_BATCH = [
+    {"review_id": "r1", "user_id": "u1", "business_id": "b1", "stars": 5.0, "date": "2022-12-30 10:00:00"},
+    {"review_id": "r2", "user_id": "u2", "business_id": "b1", "stars": 3.0, "date": "2023-01-02 10:00:00"},
+    {"review_id": "r3", "user_id": "u1", "business_id": "b2", "stars": 4.0, "date": "2023-01-05 10:00:00"}
+]
+SECOND_BATCH = [
+    {"review_id": "r4", "user_id": "u3", "business_id": "b1", "stars": 1.0, "date": "2023-01-20 10:00:00"},
+    {"review_id": "r5", "user_id": "u2", "business_id": "b3", "stars": None, "date": "2023-02-01 10:00:00"},
+    {"review_id": "r6", "user_id": "u1", "business_id": "b2", "stars": 2.0, "date": "2023-02-03 10:00:00"}
+]
+
+def write_bronze(path, reviews):
+    path.mkdir(exist_ok=True)
+    businesses = [
+        {"business_id": "b1", "state": "AZ", "review_count": 100},
+        {"business_id": "b2", "state": "NV", "review_count": 20},
+        {"business_id": "b3", "state": "AZ", "review_count": None}
+    ]
+    users = [{"user_id": user_id} for user_id in ("u1", "u2", "u3")]
+    for name, rows in (("business", businesses), ("review", reviews), ("user", users)):
+        with open(path / f"yelp_academic_dataset_{name}.json", "w") as out:
+            out.writelines(json.dumps(row) + "\n" for row in rows)
+
+def incremental_run(spark, input_path, state_path, cache_path=None, full_rebuild=False):
+    state = None if full_rebuild else load_review_state(spark, state_path)
+    business_df, review_df, _ = read_bronze_data(spark, input_path, GOLD_COLUMNS, cache_path=cache_path,
+                                                 since=state.watermark if state else None)
+    sources, state = incremental_gold_sources(spark, business_df, review_df, state_path, state)
+    tables = compute_gold_tables(sources)
+    return tables["business_metrics"], tables["review_trends"], state
+
+def timeseries_rows(sources):
+    return rows(compute_gold_tables(sources, TIMESERIES_TABLES)["review_timeseries"])
+
+def rows(df):
+    return sorted(tuple(row) for row in df.collect())
+
+def test_incremental_runs_match_full_rebuild(spark, tmp_path):
+    """Test that merging a second batch gives the same gold tables as a full rebuild."""
+    input_path, state_path = tmp_path / "bronze", str(tmp_path / "state")
+    write_bronze(input_path, FIRST_BATCH)
+    _, _, state = incremental_run(spark, str(input_path), state_path)
+    assert state.version == 1
+    assert state.watermark == "2023-01-05 10:00:00"
+
+    write_bronze(input_path, FIRST_BATCH + SECOND_BATCH)
+    business_metrics, review_trends, state = incremental_run(spark, str(input_path), state_path)
+    assert state.version == 2
+    assert state.watermark == "2023-02-03 10:00:00"
+    # The superseded state version is cleaned up
+    assert sorted(name for name in os.listdir(state_path) if not name.startswith(".")) == \
+        ["_CURRENT", "v2", "v2_days"]
+
+    expected_metrics, expected_trends = gold_layer_from_bronze(
+        *read_bronze_data(spark, str(input_path), GOLD_COLUMNS)[:2])
+    assert rows(business_metrics) == rows(expected_metrics)
+    assert rows(review_trends) == rows(expected_trends)
+
+    # A run without new reviews leaves the results unchanged
+    business_metrics, _, state = incremental_run(spark, str(input_path), state_path)
+    assert state.watermark == "2023-02-03 10:00:00"
+    assert rows(business_metrics) == rows(expected_metrics)
+
+def test_undated_reviews_are_left_out_of_every_path(spark, tmp_path):
+    """Test that a review without a date counts in neither the monthly nor the daily aggregates, on either path."""
+    input_path, state_path = tmp_path / "bronze", str(tmp_path / "state")
+    undated = {"review_id": "r7", "user_id": "u1", "business_id": "b1", "stars": 2.0, "date": None}
+    write_bronze(input_path, FIRST_BATCH + [undated])
+    incremental_run(spark, str(input_path), state_path)
+    write_bronze(input_path, FIRST_BATCH + [undated] + SECOND_BATCH)
+    state = load_review_state(spark, state_path)
+    business_df, review_df, _ = read_bronze_data(spark, str(input_path), GOLD_COLUMNS, since=state.watermark)
+    sources, _ = incremental_gold_sources(spark, business_df, review_df, state_path, state)
+
+    expected = gold_sources_from_bronze(*read_bronze_data(spark, str(input_path), GOLD_COLUMNS)[:2])
+    metrics = compute_gold_tables(sources)["business_metrics"]
+    assert rows(metrics) == rows(compute_gold_tables(expected)["business_metrics"])
+    assert timeseries_rows(sources) == timeseries_rows(expected)
+    assert {row["state"]: row["total_reviews"] for row in metrics.collect()} == {"AZ": 4, "NV": 2}
+    daily = compute_gold_tables(expected, TIMESERIES_TABLES)["review_timeseries"].where("resolution = 'day'")
+    assert sum(row["total_reviews"] for row in daily.collect()) == 6
+
+def test_full_rebuild_replaces_state(spark, tmp_path):
+    """Test that a full rebuild ignores the watermark and recounts every review."""
+    input_path, state_path = tmp_path / "bronze", str(tmp_path / "state")
+    write_bronze(input_path, FIRST_BATCH + SECOND_BATCH)
+    incremental_run(spark, str(input_path), state_path)
+    business_metrics, _, state = incremental_run(spark, str(input_path), state_path, full_rebuild=True)
+
+    assert state.version == 2
+    assert {row["state"]: row["total_reviews"] for row in business_metrics.collect()} == {"AZ": 4, "NV": 2}
+
+def test_read_bronze_since_prunes_cached_years(spark, tmp_path):
+    """Test that cached reviews are read from the watermark's year onwards only."""
+    input_path, cache_path = tmp_path / "bronze", str(tmp_path / "cache")
+    write_bronze(input_path, FIRST_BATCH + SECOND_BATCH)
+    ingest_bronze(spark, str(input_path), cache_path)
+
+    _, review_df, _ = read_bronze_data(spark, str(input_path), GOLD_COLUMNS, cache_path=cache_path,
+                                       since="2023-01-05 10:00:00")
+    assert sorted(row["date"] for row in review_df.collect()) == ["2023-01-20 10:00:00", "2023-02-01 10:00:00",
+                                                                  "2023-02-03 10:00:00"]
+    plan = review_df._jdf.queryExecution().executedPlan().toString()
+    partition_filters = plan[plan.index("PartitionFilters"):].split("]")[0]
+    assert "review_year" in partition_filters and ">= 2023" in partition_filters
+
+def test_merge_review_aggregates(spark):
+    """Test that aggregates merge by adding sums and counts per business and month."""
+    schema = "business_id string, year int, month int, review_count long, star_sum double, star_count long, " \
+             "last_review_date string"
+    state = spark.createDataFrame([("b1", 2023, 1, 2, 8.0, 2, "2023-01-10"), ("b2", 2023, 1, 1, 3.0, 1, "2023-01-03")],
+                                  schema)
+    delta = spark.createDataFrame([("b1", 2023, 1, 1, None, 0, "2023-01-20"), ("b1", 2023, 2, 1, 5.0, 1, "2023-02-01")],
+                                  schema)
+
+    merged = {(row["business_id"], row["month"]): row for row in merge_review_aggregates(state, delta).collect()}
+    assert (merged[("b1", 1)]["review_count"], merged[("b1", 1)]["star_sum"], merged[("b1", 1)]["star_count"]) == (3, 8.0, 2)
+    assert merged[("b1", 1)]["last_review_date"] == "2023-01-20"
+    assert merged[("b2", 1)]["review_count"] == 1
+    assert merged[("b1", 2)]["star_sum"] == 5.0
+
+def test_incremental_daily_aggregates_match_full_rebuild(spark, tmp_path):
+    """Test that the merged daily state gives the same time series as a full rebuild."""
+    input_path, state_path = tmp_path / "bronze", str(tmp_path / "state")
+    write_bronze(input_path, FIRST_BATCH)
+    incremental_run(spark, str(input_path), state_path)
+    write_bronze(input_path, FIRST_BATCH + SECOND_BATCH)
+    state = load_review_state(spark, state_path)
+    business_df, review_df, _ = read_bronze_data(spark, str(input_path), GOLD_COLUMNS, since=state.watermark)
+    sources, state = incremental_gold_sources(spark, business_df, review_df, state_path, state)
+
+    expected = gold_sources_from_bronze(*read_bronze_data(spark, str(input_path), GOLD_COLUMNS)[:2])
+    assert state.days_path.endswith("v2_days")
+    assert timeseries_rows(sources) == timeseries_rows(expected)
+
+    # States committed without daily aggregates need a full rebuild
+    with pytest.raises(ValueError):
+        incremental_gold_sources(spark, business_df, review_df, state_path, state._replace(days_path=None))
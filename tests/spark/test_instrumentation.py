@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pipeline stage instrumentation.
+"""
+
+import json
+import pytest
+from src.spark.instrumentation import PipelineMetrics
+
+def test_pipeline_metrics_report(spark, tmp_path):
+    """Test that stage blocks are measured from the jobs they trigger."""
+    metrics = PipelineMetrics(spark, run_id="test-run")
+    with metrics.stage("bronze"):
+        df = spark.range(0, 10000, 1, 4).selectExpr("id % 10 AS key", "id AS value")
+    with metrics.stage("gold"):
+        df.groupBy("key").count().write.format("noop").mode("overwrite").save()
+
+    report = metrics.write_report(str(tmp_path / "metrics" / "run.json"))
+    assert json.loads((tmp_path / "metrics" / "run.json").read_text())["run_id"] == "test-run"
+
+    # Lazy definitions trigger no jobs, and instrumentation adds none
+    assert report["stages"]["bronze"]["metrics"]["jobs"] == 0
+    gold = report["stages"]["gold"]
+    assert gold["status"] == "succeeded"
+    assert gold["metrics"]["jobs"] >= 1
+    assert gold["metrics"]["shuffle_write_bytes"] > 0
+    assert gold["metrics"]["shuffle_read_bytes"] > 0
+    assert [stage["kind"] for stage in gold["metrics"]["spark_stages"]] == ["scan", "output"]
+    assert report["by_kind"]["scan"]["input_records"] == 10000
+
+def test_pipeline_metrics_failed_stage(spark):
+    """Test that a failing stage is reported as failed."""
+    metrics = PipelineMetrics(spark)
+    with pytest.raises(RuntimeError):
+        with metrics.stage("write:broken"):
+            raise RuntimeError("sink unavailable")
+    assert metrics.report()["stages"]["write:broken"]["status"] == "failed"
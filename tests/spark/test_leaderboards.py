@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the top-K business leaderboards.
+"""
+
+import random
+from pyspark.sql import Window
+from pyspark.sql.functions import asc, col, desc, row_number
+from src.spark.datagen import generate_yelp_dataset
+from src.spark.gold import compute_gold_tables, gold_scan, leaderboard_tables
+from src.spark.leaderboards import Entry, RANKINGS, add_entry, empty_leaderboard, merge_leaderboards, ranked_rows
+from src.spark.yelp_analytics import GOLD_COLUMNS, gold_sources_from_bronze, read_bronze_data
+
+def test_partial_leaderboards_stay_bounded_and_merge_exactly():
+    """Test that bounded partial leaderboards, merged in any split, equal a full sort."""
+    rng = random.Random(7)
+    entries = [Entry(f"b{index:03d}", f"Business {index}", rng.randint(1, 20),
+                     rng.choice([None, 1.0, 2.5, 4.0, 4.5, 5.0])) for index in range(300)]
+    size = 5
+
+    partials = []
+    for start in range(0, len(entries), 70):
+        board = empty_leaderboard()
+        for entry in entries[start:start + 70]:
+            board = add_entry(board, entry, size)
+            assert all(len(kept) < 2 * size for kept in board.values())
+        partials.append(board)
+    merged = partials[0]
+    for board in partials[1:]:
+        merged = merge_leaderboards(merged, board, size)
+
+    rows = ranked_rows(("PA",), merged, size)
+    for ranking, key in RANKINGS.items():
+        expected = sorted(entries, key=key)[:size]
+        assert [row[2:] for row in rows if row[1] == ranking] == [(rank, *entry) for rank, entry in
+                                                                 enumerate(expected, start=1)]
+    # Unrated businesses rank last by rating
+    assert all(row[-1] is not None for row in rows if row[1] == "rating")
+
+def test_leaderboards_match_a_full_window_ranking(spark, tmp_path):
+    """Test that the heap-built leaderboards equal a row_number ranking over the same source."""
+    generate_yelp_dataset(str(tmp_path), scale_factor=0.2)
+    business_df, review_df, _ = read_bronze_data(spark, str(tmp_path), required_columns=GOLD_COLUMNS)
+    sources = gold_sources_from_bronze(business_df, review_df)
+    tables = leaderboard_tables(size=3, min_reviews=2)
+
+    with gold_scan(sources, tables) as leaderboards:
+        for board in tables:
+            actual = leaderboards[board.name].collect()
+            candidates = sources[board.source].where(col("review_count") >= 2) \
+                .withColumn("avg_rating", col("star_sum") / col("star_count"))
+            orders = {
+                "reviews": [desc("review_count"), desc("avg_rating"), asc("business_id")],
+                "rating": [col("avg_rating").desc_nulls_last(), desc("review_count"), asc("business_id")]
+            }
+            expected = []
+            for ranking, order in orders.items():
+                ranked = candidates.withColumn("rank", row_number().over(
+                    Window.partitionBy(*board.group_by).orderBy(*order))).where(col("rank") <= 3)
+                expected += [(*[row[name] for name in board.group_by], ranking, row["rank"], row["business_id"],
+                              row["name"], row["review_count"], row["avg_rating"]) for row in ranked.collect()]
+            assert expected and sorted(map(tuple, actual)) == sorted(expected)
+            assert leaderboards[board.name].columns[-6:] == ["ranking", "rank", "business_id", "name",
+                                                             "review_count", "avg_rating"]
+
+    # Raising the threshold only drops businesses, and a group never holds more than `size` per ranking
+    strict = compute_gold_tables(sources, leaderboard_tables(size=3, min_reviews=4))["city_leaderboard"]
+    assert strict.where(col("review_count") < 4).count() == 0
+    assert strict.groupBy("state", "city", "year", "month", "ranking").count().where(col("count") > 3).count() == 0
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Spark session profiles.
+"""
+
+import pytest
+from src.spark.profiles import MB, PROFILES, configure_session, estimate_input_bytes, get_profile, tune_settings
+
+def test_settings_scale_with_input_size():
+    """Test that partitions and the broadcast threshold follow the input, within the profile's bounds."""
+    dataproc = PROFILES["dataproc"]
+    small = tune_settings(dataproc, {"business": MB, "review": 5 * MB}, 8)
+    assert small["spark.sql.shuffle.partitions"] == "8"
+    assert small["spark.sql.autoBroadcastJoinThreshold"] == str(10 * MB)
+
+    large = tune_settings(dataproc, {"business": 120 * MB, "review": 6000 * MB, "user": 3000 * MB}, 32)
+    # 72 partitions of 128 MB, rounded up to whole waves over 32 cores
+    assert large["spark.sql.shuffle.partitions"] == "96"
+    assert large["spark.sql.autoBroadcastJoinThreshold"] == str(120 * MB)
+    assert large["spark.sql.adaptive.advisoryPartitionSizeInBytes"] == str(128 * MB)
+
+    huge = tune_settings(dataproc, {"business": 1000 * MB, "review": 10 ** 7 * MB}, 32)
+    assert huge["spark.sql.shuffle.partitions"] == "2000"
+    assert huge["spark.sql.autoBroadcastJoinThreshold"] == str(256 * MB)
+
+    assert tune_settings(PROFILES["test"], {"review": 100 * MB}, 16)["spark.sql.shuffle.partitions"] == "4"
+    with pytest.raises(ValueError):
+        get_profile("laptop")
+
+def test_session_is_tuned_from_the_bronze_files(spark, tmp_path):
+    """Test that the input is sized from a listing and the tuned settings are applied."""
+    (tmp_path / "yelp_academic_dataset_business.json").write_text("x" * 1000)
+    (tmp_path / "yelp_academic_dataset_review.json").write_text("x" * 3000)
+    sizes = estimate_input_bytes(spark, str(tmp_path))
+    assert (sizes["business"], sizes["review"], sizes["user"]) == (1000, 3000, 0)
+
+    keys = list(tune_settings(PROFILES["local"], sizes, 1))
+    previous = {key: spark.conf.get(key, None) for key in keys}
+    try:
+        settings = configure_session(spark, PROFILES["local"], str(tmp_path))
+        assert {key: spark.conf.get(key) for key in keys} == {key: settings[key] for key in keys}
+        assert settings["spark.sql.shuffle.partitions"] == str(min(spark.sparkContext.defaultParallelism, 200))
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                spark.conf.unset(key)
+            else:
+                spark.conf.set(key, value)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for single-pass data-quality profiling.
+"""
+
+import json
+import pytest
+from src.sketches import DEFAULT_SKETCHES
+from src.spark.gold import gold_scan
+from src.spark.incremental import load_review_state
+from src.spark.quality import DataQuality, DataQualityError, Threshold, parse_threshold
+from src.spark.stages import StageStore, materialize
+from src.spark.yelp_analytics import (
+    GOLD_COLUMNS, SILVER_COLUMNS, gold_sources_from_bronze, incremental_gold_sources, read_bronze_data, silver_layer
+)
+
+def write_json_lines(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+@pytest.fixture
+def dirty_bronze(spark, tmp_path):
+    """Bronze data with a null key, an unparseable date, an out-of-range rating and orphan reviews."""
+    write_json_lines(tmp_path / "yelp_academic_dataset_business.json", [
+        {"business_id": "b1", "name": "Cafe", "city": "Phoenix", "state": "AZ", "latitude": 33.4,
+         "longitude": -112.0, "stars": 4.0, "review_count": 5, "is_open": 1, "categories": "Food"},
+        {"business_id": "b2", "name": "Bar", "city": "Phoenix", "state": "AZ", "latitude": 33.5,
+         "longitude": -112.1, "stars": 3.5, "review_count": 2, "is_open": 1, "categories": "Bars"}
+    ])
+    write_json_lines(tmp_path / "yelp_academic_dataset_review.json", [
+        {"review_id": "r1", "user_id": "u1", "business_id": "b1", "stars": 5.0, "date": "2022-01-01 10:00:00"},
+        {"review_id": "r2", "user_id": "u2", "business_id": "b1", "stars": 7.0, "date": "2022-01-02 10:00:00"},
+        {"review_id": "r3", "user_id": "u1", "business_id": "b2", "stars": 3.0, "date": "not a date"},
+        {"review_id": "r4", "user_id": "u1", "business_id": None, "stars": 4.0, "date": "2022-01-03 10:00:00"},
+        {"review_id": "r5", "user_id": "u1", "business_id": "b9", "stars": 2.0, "date": "2022-01-04 10:00:00"},
+        {"review_id": "r6", "user_id": "u9", "business_id": "b2", "stars": 1.0, "date": "2022-01-05 10:00:00"}
+    ])
+    write_json_lines(tmp_path / "yelp_academic_dataset_user.json", [
+        {"user_id": "u1", "name": "Ann", "review_count": 4, "yelping_since": "2015-03-01 00:00:00",
+         "average_stars": 3.5},
+        {"user_id": "u2", "name": "Bob", "review_count": 1, "yelping_since": "2018-07-01 00:00:00",
+         "average_stars": 5.0}
+    ])
+    return read_bronze_data(spark, str(tmp_path), required_columns=SILVER_COLUMNS)
+
+def test_silver_is_profiled_in_the_write_pass(dirty_bronze, tmp_path):
+    """Test that profiling keeps the silver rows and observes the metrics during the write."""
+    business_df, review_df, user_df = dirty_bronze
+    expected = sorted(row["review_id"] for row in silver_layer(business_df, review_df, user_df).collect())
+    for join_mode in ("standard", "skew"):
+        quality = DataQuality({})
+        silver_df = silver_layer(business_df, review_df, user_df, join_mode=join_mode, skew_sample_fraction=1.0,
+                                 skew_min_share=0.3, quality=quality)
+        assert "_business_match" not in silver_df.columns
+        silver_df.write.mode("overwrite").parquet(str(tmp_path / join_mode))
+        assert quality.pending == ["business", "review", "silver", "user"]
+        results = quality.collect()
+        assert sorted(row["review_id"] for row in silver_df.collect()) == expected == ["r1", "r2", "r3"]
+
+        assert results["silver"] == {"rows": 6, "business_misses": 2, "user_misses": 1}
+        review = results["review"]
+        assert (review["rows"], review["business_id_nulls"], review["date_unparseable"]) == (6, 1, 1)
+        assert (review["stars_out_of_range"], review["stars_max"], review["business_id_distinct"]) == (1, 7.0, 3)
+        assert review["date_min"] == "2022-01-01 10:00:00"
+        assert (results["business"]["rows"], results["user"]["user_id_distinct"]) == (2, 2)
+
+def test_thresholds_warn_or_fail(dirty_bronze, tmp_path):
+    """Test that breached checks are reported, and fail the run when configured to."""
+    business_df, review_df, user_df = dirty_bronze
+    quality = DataQuality({"review.stars_out_of_range": Threshold(0.2, "warn"),
+                           "silver.business_misses": Threshold(0.2, "warn"),
+                           "silver.user_misses": Threshold(0.0, "warn")})
+    silver_layer(business_df, review_df, user_df, quality=quality).write.parquet(str(tmp_path / "warn"))
+    breaches = quality.check()
+    assert [(breach["check"], breach["count"]) for breach in breaches] == \
+        [("silver.business_misses", 2), ("silver.user_misses", 1)]
+    assert quality.pending == []
+
+    # Default thresholds: null business ids and unparseable dates fail the run
+    quality = DataQuality()
+    with gold_scan(gold_sources_from_bronze(business_df, review_df, quality=quality)) as gold_tables:
+        gold_tables["business_metrics"].collect()
+        with pytest.raises(DataQualityError) as error:
+            quality.check()
+    assert sorted(breach["check"] for breach in error.value.breaches) == \
+        ["review.business_id_nulls", "review.date_unparseable"]
+    assert quality.results["business"]["rows"] == 2
+
+def test_incremental_run_without_new_reviews_is_checked(spark, tmp_path):
+    """Test that an incremental rerun over the same input skips profiling its empty review delta, so the check returns."""
+    input_path, state_path = tmp_path / "bronze", str(tmp_path / "state")
+    input_path.mkdir()
+    write_json_lines(input_path / "yelp_academic_dataset_business.json", [
+        {"business_id": "b1", "state": "AZ", "review_count": 5}])
+    write_json_lines(input_path / "yelp_academic_dataset_review.json", [
+        {"review_id": "r1", "user_id": "u1", "business_id": "b1", "stars": 5.0, "date": "2022-01-01 10:00:00"},
+        {"review_id": "r2", "user_id": "u2", "business_id": "b1", "stars": 3.0, "date": "2022-01-02 10:00:00"}])
+    write_json_lines(input_path / "yelp_academic_dataset_user.json", [{"user_id": "u1"}, {"user_id": "u2"}])
+    store = StageStore(spark, str(tmp_path / "stages"))
+
+    for expected_reviews in (2, None):
+        state = load_review_state(spark, state_path)
+        since = state.watermark if state else None
+        # Bronze goes through the stage store as in the job, so the second run reads back an empty review stage
+        bronze, _ = materialize(store, "bronze", lambda: dict(zip(
+            ["business", "review"], read_bronze_data(spark, str(input_path), GOLD_COLUMNS, since=since)[:2])),
+            since=since)
+        quality = DataQuality()
+        sources, state = incremental_gold_sources(spark, bronze["business"], bronze["review"], state_path, state,
+                                                  sketches=DEFAULT_SKETCHES, quality=quality)
+        with gold_scan(sources):
+            assert sources["business_months"].count() == 1
+            assert quality.check() == []
+        assert quality.results.get("review", {}).get("rows") == expected_reviews
+        assert quality.results["business"]["rows"] == 1
+
+def test_parse_threshold():
+    """Test the command-line threshold syntax."""
+    assert parse_threshold("silver.user_misses=0.1") == ("silver.user_misses", Threshold(0.1, "fail"))
+    assert parse_threshold("review.date_unparseable=0:warn") == ("review.date_unparseable", Threshold(0.0, "warn"))
+    for text in ("user_misses=0.1", "silver.user_misses", "silver.user_misses=0.1:ignore"):
+        with pytest.raises(ValueError):
+            parse_threshold(text)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bronze schema registry.
+"""
+
+import pytest
+from pyspark.sql.types import StructType, StructField, StringType, LongType, DoubleType
+from src.spark.schemas import get_bronze_schema, sample_json_schema, detect_schema_drift, has_drift
+from src.spark.yelp_analytics import read_bronze_data, check_bronze_drift, SILVER_COLUMNS
+
+def test_get_bronze_schema_prunes_in_registry_order():
+    """Test that a pruned schema keeps only the requested columns."""
+    schema = get_bronze_schema("review", ["date", "stars", "review_id"])
+    assert schema.fieldNames() == ["review_id", "stars", "date"]
+
+def test_get_bronze_schema_rejects_unknown():
+    """Test that unknown entities, versions and columns are rejected."""
+    with pytest.raises(ValueError):
+        get_bronze_schema("tip")
+    with pytest.raises(ValueError):
+        get_bronze_schema("review", version="v0")
+    with pytest.raises(ValueError):
+        get_bronze_schema("review", ["sentiment"])
+
+def test_detect_schema_drift():
+    """Test drift detection tolerates inference quirks but reports real changes."""
+    expected = get_bronze_schema("review", ["review_id", "stars", "useful", "date"])
+    observed = StructType([
+        StructField("review_id", StringType(), True),
+        StructField("stars", LongType(), True),
+        StructField("useful", DoubleType(), True),
+        StructField("language", StringType(), True)
+    ])
+    report = detect_schema_drift(expected, observed)
+    assert report["added"] == ["language"]
+    assert report["missing"] == ["date"]
+    assert report["type_changed"] == {"useful": ("bigint", "double")}
+    assert has_drift(report)
+    assert not has_drift(detect_schema_drift(expected, expected))
+
+def test_sample_json_schema_nested_attributes(spark, tmp_path):
+    """Test that sampled nested objects are compatible with registered maps."""
+    path = tmp_path / "business.json"
+    path.write_text('{"business_id": "b1", "stars": 4, "attributes": {"WiFi": "free"}}\n')
+    observed = sample_json_schema(spark, str(path))
+    report = detect_schema_drift(get_bronze_schema("business", ["business_id", "stars", "attributes"]), observed)
+    assert not has_drift(report)
+
+def test_read_bronze_data_prunes_columns(spark, tmp_path):
+    """Test that only required columns are parsed and drift is reported."""
+    (tmp_path / "yelp_academic_dataset_business.json").write_text(
+        '{"business_id": "b1", "name": "Test Business", "state": "AZ"}\n')
+    (tmp_path / "yelp_academic_dataset_review.json").write_text(
+        '{"review_id": "r1", "business_id": "b1", "stars": 5.0, "text": "Great", "language": "en"}\n')
+    (tmp_path / "yelp_academic_dataset_user.json").write_text('{"user_id": "u1", "name": "Test User"}\n')
+
+    business_df, review_df, user_df = read_bronze_data(
+        spark, str(tmp_path), required_columns={"review": ["review_id", "stars"]})
+
+    assert review_df.columns == ["review_id", "stars"]
+    assert review_df.first()["stars"] == 5.0
+    assert business_df.columns == get_bronze_schema("business").fieldNames()
+
+    _, review_df, _ = read_bronze_data(spark, str(tmp_path), required_columns=SILVER_COLUMNS)
+    assert sorted(review_df.columns) == sorted(SILVER_COLUMNS["review"])
+
+    reports = check_bronze_drift(spark, str(tmp_path))
+    assert reports["review"]["added"] == ["language"]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for review sentiment scoring.
+"""
+
+import pickle
+from pyspark.sql.functions import avg
+from src.spark.benchmark import measure_sentiment
+from src.spark.datagen import generate_yelp_dataset
+from src.spark.gold import GOLD_TABLES, SENTIMENT_TABLES, compute_gold_tables
+from src.spark.sentiment import LexiconModel, add_sentiment, load_model, set_batch_size
+from src.spark.yelp_analytics import gold_sources_from_bronze, read_bronze_data
+
+def test_lexicon_model_scores():
+    """Test that lexicon scores are signed, bounded and zero without sentiment words."""
+    scores = LexiconModel().score(["Amazing food, friendly staff. Highly recommend!",
+                                   "Terrible service and the food was cold",
+                                   "We ordered dinner at six", ""])
+    assert scores[0] > 0.5
+    assert scores[1] < -0.5
+    assert scores[2] == 0 and scores[3] == 0
+    assert all(-1 <= score <= 1 for score in scores)
+
+def test_add_sentiment_in_small_batches(spark):
+    """Test that scores and labels do not depend on the Arrow batch size."""
+    reviews = spark.createDataFrame(
+        [("r1", "great tacos, love it"), ("r2", "rude and slow"), ("r3", "we went on a tuesday"), ("r4", None)],
+        "review_id string, text string")
+    default = {row["review_id"]: (row["sentiment_score"], row["sentiment"]) for row in add_sentiment(reviews).collect()}
+
+    set_batch_size(spark, 1)
+    try:
+        batched = {row["review_id"]: (row["sentiment_score"], row["sentiment"])
+                   for row in add_sentiment(reviews).collect()}
+    finally:
+        spark.conf.unset("spark.sql.execution.arrow.maxRecordsPerBatch")
+
+    assert batched == default
+    assert [default[review_id][1] for review_id in ("r1", "r2", "r3")] == ["positive", "negative", "neutral"]
+    assert default["r4"] == (None, None)
+    assert load_model() is load_model()
+
+def test_pickled_classifier_model(spark, tmp_path):
+    """Test that a pickled scikit-learn classifier can replace the lexicon."""
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+
+    classifier = make_pipeline(CountVectorizer(), LogisticRegression())
+    classifier.fit(["yummy yummy", "so yummy", "yucky", "very yucky"], [1, 1, 0, 0])
+    model_path = str(tmp_path / "model.pkl")
+    with open(model_path, "wb") as model_file:
+        pickle.dump(classifier, model_file)
+
+    reviews = spark.createDataFrame([("r1", "yummy"), ("r2", "yucky")], "review_id string, text string")
+    labels = {row["review_id"]: row["sentiment"] for row in add_sentiment(reviews, model_path=model_path).collect()}
+    assert labels == {"r1": "positive", "r2": "negative"}
+
+def test_sentiment_trends_gold_table(spark):
+    """Test that sentiment is aggregated by state and month."""
+    business_df = spark.createDataFrame([("b1", "AZ", 10), ("b2", "NV", 5)],
+                                        "business_id string, state string, review_count long")
+    review_df = spark.createDataFrame([
+        ("u1", "b1", 5.0, "2023-01-01 12:00:00", "excellent, best pizza"),
+        ("u2", "b1", 1.0, "2023-01-02 12:00:00", "awful"),
+        ("u3", "b1", 4.0, "2023-01-03 12:00:00", "fine"),
+        ("u1", "b2", 5.0, "2023-02-01 12:00:00", "wonderful")
+    ], "user_id string, business_id string, stars double, date string, text string")
+
+    sources = gold_sources_from_bronze(business_df, add_sentiment(review_df))
+    tables = compute_gold_tables(sources, GOLD_TABLES + SENTIMENT_TABLES)
+    trends = {(row["state"], row["month"]): row for row in tables["sentiment_trends"].collect()}
+
+    az = trends[("AZ", 1)]
+    assert (az["scored_reviews"], az["positive_reviews"], az["negative_reviews"], az["neutral_reviews"]) == (3, 1, 1, 1)
+    assert abs(az["positive_share"] - 1 / 3) < 1e-9
+    assert trends[("NV", 2)]["avg_sentiment"] > 0
+    assert tables["business_metrics"].count() == 2
+
+def test_sentiment_throughput_on_generated_reviews(spark, tmp_path):
+    """Test that throughput is reported and scores follow the star ratings."""
+    generate_yelp_dataset(str(tmp_path), scale_factor=0.02)
+    metrics = measure_sentiment(spark, str(tmp_path))
+    assert metrics["input_records"] == 500
+    assert metrics["reviews_per_s_per_core"] > 0
+
+    _, review_df, _ = read_bronze_data(spark, str(tmp_path), {"review": ["stars", "text"]})
+    by_stars = {row["stars"]: row["score"] for row in
+                add_sentiment(review_df).groupBy("stars").agg(avg("sentiment_score").alias("score")).collect()}
+    assert by_stars[5.0] > 0 > by_stars[1.0]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the gold table sinks.
+"""
+
+import pytest
+from src.spark.instrumentation import PipelineMetrics
+from src.spark.sinks import BigQueryDirectSink, BigQueryIndirectSink, ParquetSink, create_sink, write_gold_tables
+
+def gold_frames(spark):
+    business_metrics = spark.createDataFrame(
+        [("AZ", 3, 4.0), ("NV", 1, 1.0)], "state string, total_reviews long, avg_rating double")
+    review_trends = spark.createDataFrame(
+        [(2022, 12, 1, 3.0), (2023, 1, 2, 4.5), (2023, 2, 1, 1.0)],
+        "year int, month int, total_reviews long, avg_rating double")
+    return {"business_metrics": business_metrics, "review_trends": review_trends}
+
+def test_parquet_sink_writes_partitioned_tables(spark, tmp_path):
+    """Test that tables round-trip and review trends are partitioned by year."""
+    sink = ParquetSink(str(tmp_path))
+    timings = write_gold_tables(gold_frames(spark), sink)
+
+    assert sorted(timings) == ["business_metrics", "review_trends"]
+    assert all(timing["sink"] == "parquet" and timing["wall_time_s"] > 0 for timing in timings.values())
+    assert sorted(path.name for path in (tmp_path / "review_trends").glob("year=*")) == ["year=2022", "year=2023"]
+    trends = spark.read.parquet(sink.table_path("review_trends")).orderBy("year", "month").collect()
+    assert [(row["year"], row["month"], row["total_reviews"]) for row in trends] == [(2022, 12, 1), (2023, 1, 2),
+                                                                                     (2023, 2, 1)]
+    assert spark.read.parquet(sink.table_path("business_metrics")).count() == 2
+
+def test_concurrent_writes_report_their_own_stages(spark, tmp_path):
+    """Test that each concurrent write is tagged as its own pipeline stage."""
+    metrics = PipelineMetrics(spark)
+    write_gold_tables(gold_frames(spark), ParquetSink(str(tmp_path)), metrics)
+    report = metrics.report()
+
+    for name in ("write:business_metrics", "write:review_trends"):
+        assert report["stages"][name]["status"] == "succeeded"
+        assert report["stages"][name]["metrics"]["jobs"] >= 1
+        assert report["stages"][name]["metrics"]["output_records"] > 0
+
+def test_failed_write_is_raised_after_the_others(spark, tmp_path):
+    """Test that one failing table does not stop the other writes."""
+    class FailingSink(ParquetSink):
+        def write(self, table_name, df):
+            if table_name == "business_metrics":
+                raise RuntimeError("write failed")
+            super().write(table_name, df)
+
+    sink = FailingSink(str(tmp_path))
+    with pytest.raises(RuntimeError, match="write failed"):
+        write_gold_tables(gold_frames(spark), sink)
+    assert spark.read.parquet(sink.table_path("review_trends")).count() == 3
+
+def test_create_sink():
+    """Test that sinks are created by name with their BigQuery write options."""
+    direct = create_sink("bigquery-direct", dataset="analytics")
+    assert isinstance(direct, BigQueryDirectSink)
+    assert direct.options("review_trends") == {"table": "analytics.review_trends", "writeMethod": "direct"}
+
+    indirect = create_sink("bigquery-indirect", temp_bucket="bucket/tmp")
+    assert isinstance(indirect, BigQueryIndirectSink)
+    assert indirect.options("review_trends")["temporaryGcsBucket"] == "bucket/tmp"
+    assert indirect.options("business_geo_index")["clusteredFields"] == "geohash"
+    assert create_sink("parquet", path="gs://bucket/gold/").table_path("review_trends") == "gs://bucket/gold/review_trends"
+
+    with pytest.raises(ValueError):
+        create_sink("parquet")
+    with pytest.raises(ValueError):
+        create_sink("csv")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit tests for skew-aware joins on a synthetic skewed dataset.
+"""
+
+import pytest
+from src.spark.skew import detect_hot_keys, skew_join
+from src.spark.yelp_analytics import silver_layer
+
+@pytest.fixture(scope="module")
+def skewed_data(spark):
+    """One power user and one mega-business own most of the reviews."""
+    businesses = [(f"b{i}", f"Business {i}", "1 Main St", "Phoenix", "AZ", "85001", 33.4, -112.0, 4.0, 10, 1,
+                   "Restaurants|Food") for i in range(20)]
+    users = [(f"u{i}", f"User {i}", 10, "2020-01-01 00:00:00", 1, 1, 1, 0, 4.0) for i in range(50)]
+    reviews = []
+    for i in range(2000):
+        user = "u0" if i % 4 else f"u{i % 50}"
+        business = "b0" if i % 3 else f"b{i % 20}"
+        reviews.append((f"r{i}", user, business, float(i % 5 + 1), "2023-01-01 12:00:00", "text", 0, 0, 0))
+    # A review for an unknown user must still be dropped by the inner join
+    reviews.append(("r-orphan", "u-missing", "b0", 3.0, "2023-01-01 12:00:00", "text", 0, 0, 0))
+
+    business_df = spark.createDataFrame(businesses, "business_id string, name string, address string, city string, "
+                                        "state string, postal_code string, latitude double, longitude double, "
+                                        "stars double, review_count long, is_open long, categories string")
+    user_df = spark.createDataFrame(users, "user_id string, name string, review_count long, yelping_since string, "
+                                    "useful long, funny long, cool long, fans long, average_stars double")
+    review_df = spark.createDataFrame(reviews, "review_id string, user_id string, business_id string, stars double, "
+                                      "date string, text string, useful long, funny long, cool long")
+    return business_df, review_df, user_df
+
+def test_detect_hot_keys(skewed_data):
+    """Test that the dominant keys are reported with their estimated share."""
+    _, review_df, _ = skewed_data
+    stats = detect_hot_keys(review_df, "user_id", sample_fraction=0.5, min_share=0.1)
+    assert [stat["key"] for stat in stats] == ["u0"]
+    assert 0.6 < stats[0]["share"] < 0.9
+    assert stats[0]["estimated_rows"] > 1000
+
+def test_skew_join_matches_regular_join(skewed_data):
+    """Test that splitting hot keys does not change inner or left join results."""
+    _, review_df, user_df = skewed_data
+    # The halves are unioned by name, so the joined columns must be unique (as they are in silver)
+    user_df = user_df.select("user_id", "fans", "average_stars")
+    for how in ("inner", "left"):
+        expected = sorted(review_df.join(user_df, "user_id", how).collect())
+        assert sorted(skew_join(review_df, user_df, "user_id", ["u0"], how).collect()) == expected
+
+def test_silver_layer_skew_mode(skewed_data):
+    """Test that the skew join mode produces the same silver rows."""
+    business_df, review_df, user_df = skewed_data
+    expected = silver_layer(business_df, review_df, user_df)
+    skewed = silver_layer(business_df, review_df, user_df, join_mode="skew",
+                          skew_sample_fraction=0.5, skew_min_share=0.1)
+    assert skewed.columns == expected.columns
+    assert sorted(skewed.collect()) == sorted(expected.collect())
+    assert skewed.count() == 2000
+
+    with pytest.raises(ValueError):
+        silver_layer(business_df, review_df, user_df, join_mode="salted")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fingerprint-keyed stage materialization.
+"""
+
+import os
+import pytest
+from src.spark import gold, yelp_analytics
+from src.spark.sinks import ParquetSink, write_gold_tables
+from src.spark.stages import PIPELINE_MODULES, StageStore, materialize, path_fingerprint
+
+def test_path_fingerprint_tracks_file_changes(spark, tmp_path):
+    """Test that a fingerprint changes with a file's contents or modification time, not its reads."""
+    data = tmp_path / "reviews.json"
+    data.write_text('{"review_id": "r1"}\n')
+    first = path_fingerprint(spark, str(data))
+    assert path_fingerprint(spark, str(data)) == first
+
+    os.utime(data, (0, os.path.getmtime(data) + 10))
+    touched = path_fingerprint(spark, str(data))
+    assert touched != first
+    data.write_text('{"review_id": "r1"}\n{"review_id": "r2"}\n')
+    assert path_fingerprint(spark, str(data)) not in (first, touched)
+    assert path_fingerprint(spark, str(tmp_path)) != path_fingerprint(spark, str(tmp_path / "missing"))
+
+def test_code_version_covers_the_gold_engine():
+    """Test that every project module the gold engine builds on is hashed into the stage keys."""
+    used = {getattr(value, "__module__", None) for value in vars(gold).values()}
+    project = {name for name in used if name and name.startswith("src.")}
+    assert "src.spark.leaderboards" in project
+    assert project <= set(PIPELINE_MODULES)
+
+def test_code_version_covers_the_pipeline():
+    """Test that every project module the pipeline entry point uses is hashed, bar metrics and the store itself."""
+    used = {getattr(value, "__module__", None) for value in vars(yelp_analytics).values()}
+    project = {name for name in used if name and name.startswith("src.")}
+    assert project - {"src.spark.instrumentation", "src.spark.stages"} <= set(PIPELINE_MODULES)
+
+def test_stage_is_reused_until_its_key_changes(spark, tmp_path):
+    """Test that a completed stage is read back, recomputed on a new key or when forced, and pruned."""
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"numbers": spark.range(5)}
+
+    store = StageStore(spark, str(tmp_path / "stages"))
+    tables, key = materialize(store, "bronze", build, inputs="v1")
+    assert tables["numbers"].count() == 5
+    again, same_key = materialize(store, "bronze", build, inputs="v1")
+    assert (len(builds), same_key) == (1, key)
+    assert sorted(row["id"] for row in again["numbers"].collect()) == [0, 1, 2, 3, 4]
+
+    _, new_key = materialize(store, "bronze", build, inputs="v2")
+    assert len(builds) == 2 and new_key != key
+    # Only the newest materialization of a stage is kept
+    assert not store.is_complete("bronze", key)
+    assert os.listdir(tmp_path / "stages" / "bronze") == [new_key]
+
+    materialize(StageStore(spark, str(tmp_path / "stages"), force=True), "bronze", build, inputs="v2")
+    assert len(builds) == 3
+    assert materialize(None, "bronze", build, inputs="v2")[1] is None
+
+def test_failed_stage_is_rebuilt(spark, tmp_path):
+    """Test that a stage without a completion marker is recomputed from scratch."""
+    store = StageStore(spark, str(tmp_path / "stages"))
+
+    def failing():
+        spark.range(3).write.parquet(f"{store.stage_path('gold', key)}/partial")
+        raise RuntimeError("executor lost")
+
+    key = store.key("gold", bronze="abc")
+    with pytest.raises(RuntimeError):
+        store.run("gold", key, failing)
+    assert not store.is_complete("gold", key)
+
+    tables = store.run("gold", key, lambda: {"sources": spark.range(2)})
+    assert store.is_complete("gold", key)
+    assert sorted(name for name in os.listdir(store.stage_path("gold", key)) if not name.startswith(".")) \
+        == ["_STAGE", "sources"]
+    assert tables["sources"].count() == 2
+
+def test_rerun_writes_only_the_failed_tables(spark, tmp_path):
+    """Test that a resumed write skips the tables an earlier attempt wrote."""
+    store = StageStore(spark, str(tmp_path / "stages"))
+    tables = {"business_metrics": spark.range(2), "review_trends": spark.range(3)}
+    key = store.key("write", gold="abc")
+    written = []
+
+    class FlakySink(ParquetSink):
+        fail = True
+
+        def write(self, table_name, df):
+            if table_name == "review_trends" and self.fail:
+                raise RuntimeError("BigQuery quota exceeded")
+            written.append(table_name)
+            super().write(table_name, df)
+
+    sink = FlakySink(str(tmp_path / "gold"))
+    with pytest.raises(RuntimeError):
+        write_gold_tables(store.pending(key, tables), store.tracked(sink, key))
+    assert sorted(store.pending(key, tables)) == ["review_trends"]
+
+    sink.fail = False
+    timings = write_gold_tables(store.pending(key, tables), store.tracked(sink, key))
+    assert sorted(timings) == ["review_trends"]
+    assert written == ["business_metrics", "review_trends"]
+    assert store.pending(key, tables) == {}
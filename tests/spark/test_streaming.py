@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming review trends.
+"""
+
+import json
+from src.spark.schemas import get_bronze_schema
+from src.spark.streaming import latest_windows, start_review_trends, summarize_progress
+from src.spark.yelp_analytics import SILVER_COLUMNS
+
+def write_reviews(path, reviews):
+    with open(path, "w") as out:
+        out.writelines(json.dumps(review) + "\n" for review in reviews)
+
+def review(review_id, business_id, stars, date):
+    return {"review_id": review_id, "user_id": "u1", "business_id": business_id, "stars": stars, "date": date}
+
+def business_frame(spark):
+    schema = get_bronze_schema("business", SILVER_COLUMNS["business"])
+    businesses = [{"business_id": "b1", "state": "AZ"}, {"business_id": "b2", "state": "NV"}]
+    return spark.createDataFrame([tuple(row.get(name) for name in schema.fieldNames()) for row in businesses], schema)
+
+def run(spark, source, business_df, output, checkpoint):
+    # Few state partitions keep the micro-batches quick, as --state-partitions does
+    partitions = spark.conf.get("spark.sql.shuffle.partitions")
+    spark.conf.set("spark.sql.shuffle.partitions", "2")
+    try:
+        query, writer = start_review_trends(spark, str(source), business_df, str(output), str(checkpoint),
+                                            window_duration="1 day", watermark_delay="2 days")
+        query.awaitTermination()
+    finally:
+        spark.conf.set("spark.sql.shuffle.partitions", partitions)
+    return summarize_progress(query, writer)
+
+def test_streaming_review_trends(spark, tmp_path):
+    """Test that windows update across restarts and late reviews are dropped."""
+    source, output, checkpoint = tmp_path / "reviews", tmp_path / "trends", tmp_path / "checkpoint"
+    source.mkdir()
+    business_df = business_frame(spark)
+    write_reviews(source / "part-1.json", [
+        review("r1", "b1", 5.0, "2023-01-01 10:00:00"),
+        review("r2", "b2", 3.0, "2023-01-01 18:00:00"),
+        review("r3", "b1", 4.0, "2023-01-10 09:00:00"),
+        review("r4", "missing", 1.0, "2023-01-10 09:00:00")
+    ])
+
+    summary = run(spark, source, business_df, output, checkpoint)
+    assert summary["input_rows"] == 4
+    assert summary["processed_rows_per_s"] > 0
+    assert summary["latency_s_max"] >= 0
+    windows = {str(row["window_start"].date()): row for row in latest_windows(spark, str(output)).collect()}
+    assert sorted(windows) == ["2023-01-01", "2023-01-10"]
+    assert (windows["2023-01-01"]["total_reviews"], windows["2023-01-01"]["avg_rating"]) == (2, 4.0)
+
+    # Resuming from the checkpoint updates open windows and drops reviews behind the watermark
+    write_reviews(source / "part-2.json", [
+        review("r5", "b2", 2.0, "2023-01-10 20:00:00"),
+        review("r6", "b1", 1.0, "2023-01-02 10:00:00")
+    ])
+    summary = run(spark, source, business_df, output, checkpoint)
+    assert summary["input_rows"] == 2
+    windows = {str(row["window_start"].date()): row for row in latest_windows(spark, str(output)).collect()}
+    assert sorted(windows) == ["2023-01-01", "2023-01-10"]
+    assert (windows["2023-01-10"]["total_reviews"], windows["2023-01-10"]["star_sum"]) == (2, 6.0)
+    assert windows["2023-01-01"]["total_reviews"] == 2
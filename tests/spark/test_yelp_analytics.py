@@ -6,22 +6,16 @@ This module tests the main pipeline functions:
 - read_bronze_data
 - silver_layer
 - gold_layer
+- gold_layer_from_bronze
 """
 
 import pytest
-from pyspark.sql import SparkSession
 from pyspark.sql.types import StructType, StructField, StringType, IntegerType, FloatType, TimestampType
-from src.spark.yelp_analytics import read_bronze_data, silver_layer, gold_layer
+from src.spark.yelp_analytics import (
+    read_bronze_data, silver_layer, gold_layer, gold_layer_from_bronze, review_text, write_silver
+)
 from datetime import datetime
 
-@pytest.fixture(scope="session")
-def spark():
-    """Create a Spark session for testing."""
-    return (SparkSession.builder
-            .appName("Yelp Analytics Test")
-            .master("local[*]")
-            .getOrCreate())
-
 @pytest.fixture(scope="session")
 def sample_data(spark):
     """Create sample data for testing."""
@@ -116,6 +110,20 @@ def test_silver_layer(spark, sample_data):
     assert "review_stars" in silver_df.columns
     assert "categories" in silver_df.columns
 
+def test_silver_text_split(spark, sample_data, tmp_path):
+    """Test that review text is kept out of the silver fact and stored by review_id."""
+    business_df, review_df, user_df = sample_data
+    silver_df = silver_layer(business_df, review_df, user_df)
+    assert "text" not in silver_df.columns
+    assert len(silver_df.columns) == len(set(silver_df.columns))
+    assert "text" in silver_layer(business_df, review_df, user_df, with_text=True).columns
+
+    write_silver(silver_df, str(tmp_path), review_text(review_df))
+    stored_text = spark.read.parquet(str(tmp_path / "review_text"))
+    assert stored_text.columns == ["review_id", "text"]
+    joined = spark.read.parquet(str(tmp_path / "reviews")).join(stored_text, "review_id")
+    assert joined.count() == 3
+
 def test_gold_layer(spark, sample_data):
     """Test gold layer processing."""
     business_df, review_df, user_df = sample_data
@@ -131,6 +139,29 @@ def test_gold_layer(spark, sample_data):
     assert review_trends.count() == 3  # 3 months
     assert review_trends.first()["total_reviews"] == 1
 
+def test_gold_layer_from_bronze_matches_silver_path(spark, sample_data):
+    """Test that aggregating before the join reproduces the silver-based gold tables."""
+    business_df, review_df, user_df = sample_data
+    # Reviews for an unknown business, an unknown user and with a missing rating
+    extra_reviews = spark.createDataFrame([
+        ("r4", "u1", "b9", 2, datetime(2023, 2, 1, 12, 0, 0), "Orphan business", 0, 0, 0),
+        ("r5", "u9", "b2", 1, datetime(2023, 2, 2, 12, 0, 0), "Orphan user", 0, 0, 0),
+        ("r6", "u2", "b2", None, datetime(2023, 2, 3, 12, 0, 0), "No rating", 0, 0, 0)
+    ], review_df.schema)
+    review_df = review_df.union(extra_reviews)
+
+    expected_metrics, expected_trends = gold_layer(silver_layer(business_df, review_df, user_df))
+    business_metrics, review_trends = gold_layer_from_bronze(business_df, review_df, user_df)
+
+    assert business_metrics.columns == expected_metrics.columns
+    assert review_trends.columns == expected_trends.columns
+    assert business_metrics.collect() == expected_metrics.collect()
+    assert review_trends.collect() == expected_trends.collect()
+
+    # Without the user table only the orphan-user review is additionally counted
+    business_metrics, _ = gold_layer_from_bronze(business_df, review_df)
+    assert business_metrics.first()["total_reviews"] == expected_metrics.first()["total_reviews"] + 1
+
 def test_edge_cases(spark):
     """Test edge cases."""
     # Empty dataframes with full expected schema